@@ -0,0 +1,13 @@
+"""Benchmarks for the Connect Four solutions.
+
+Run the suite from the `.internal/solutions` directory:
+
+    python -m benchmarks run --output results.json
+
+and compare two runs with:
+
+    python -m benchmarks compare before.json after.json
+
+All benchmarks run on game corpora generated from a fixed seed, so two
+runs with the same options measure exactly the same work.
+"""
@@ -0,0 +1,67 @@
+"""Command line interface for the benchmark suite."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import pathlib
+import sys
+
+from benchmarks import (  # noqa: F401
+    codec,
+    domain,
+    harness,
+    network,
+    repository,
+    startup,
+)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Run and compare the Connect Four benchmarks.",
+    )
+    defaults = harness.Options()
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument("--output", type=pathlib.Path, help="JSON report path")
+    run_parser.add_argument("--select", default="", help="Run matching benchmarks")
+    run_parser.add_argument("--seed", type=int, default=defaults.seed)
+    run_parser.add_argument("--games", type=int, default=defaults.games)
+    run_parser.add_argument("--repeat", type=int, default=defaults.repeat)
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two reports")
+    compare_parser.add_argument("baseline", type=pathlib.Path)
+    compare_parser.add_argument("candidate", type=pathlib.Path)
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        _run(args)
+    else:
+        _compare(args)
+
+
+def _run(args: argparse.Namespace) -> None:
+    options = harness.Options(seed=args.seed, games=args.games, repeat=args.repeat)
+    results = harness.run(options, selection=args.select)
+    for result in results:
+        print(
+            f"{result.name:<40} {result.operations_per_second:>14,.0f} "
+            f"{result.unit}/s (median {result.median * 1000:.2f} ms)"
+        )
+    if args.output is not None:
+        report = harness.build_report(options, results)
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+def _compare(args: argparse.Namespace) -> None:
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    candidate = json.loads(args.candidate.read_text(encoding="utf-8"))
+    for name, before, after, ratio in harness.compare_reports(baseline, candidate):
+        print(f"{name:<40} {before:>14,.0f} -> {after:>14,.0f} ({ratio:.2f}x)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,126 @@
+"""Benchmarks for mapping events to and from the event store format."""
+
+from __future__ import annotations
+
+from benchmarks import corpus, harness
+from connect_four_solutions.exercise_03.domain import events
+from connect_four_solutions.exercise_03.domain import game as game_
+from connect_four_solutions.exercise_03.domain import record
+from connect_four_solutions.exercise_03.persistence import game_repository
+
+EVENT_TYPES = ("GameStarted", "MoveMade", "GameFinished")
+
+
+def _register(event_type: str) -> None:
+    """Register the encode and decode benchmarks for an event type."""
+
+    @harness.benchmark(f"codec.encode[{event_type}]")
+    def encode(options: harness.Options) -> harness.Case:
+        """Map domain events to `NewEvent`s."""
+        events = [
+            event
+            for game in corpus.generate_games(options.games, options.seed)
+            for event in game.events
+            if type(event).__name__ == event_type
+        ]
+
+        def run() -> None:
+            for event in events:
+                game_repository.map_domain_event_to_eventstore_event(event)
+
+        return harness.Case(run, len(events), unit="event")
+
+    @harness.benchmark(f"codec.decode[{event_type}]")
+    def decode(options: harness.Options) -> harness.Case:
+        """Map `RecordedEvent`s to domain events."""
+        recorded_events = [
+            event
+            for game in corpus.generate_games(options.games, options.seed)
+            for event in corpus.record_events(game)
+            if event.type == event_type
+        ]
+
+        def run() -> None:
+            for event in recorded_events:
+                game_repository.map_eventstore_event_to_domain_event(event)
+
+        return harness.Case(run, len(recorded_events), unit="event")
+
+
+for _event_type in EVENT_TYPES:
+    _register(_event_type)
+
+
+@harness.benchmark("codec.load[events]")
+def load_from_events(options: harness.Options) -> harness.Case:
+    """Restore complete games from their recorded events."""
+    histories = [
+        corpus.record_events(game)
+        for game in corpus.generate_games(options.games, options.seed)
+    ]
+
+    def run() -> None:
+        for recorded_events in histories:
+            game_.Game.load_from_history(
+                "game-id",
+                [
+                    game_repository.map_eventstore_event_to_domain_event(event)
+                    for event in recorded_events
+                ],
+            )
+
+    return harness.Case(run, len(histories), unit="game")
+
+
+@harness.benchmark("codec.load[record]")
+def load_from_record(options: harness.Options) -> harness.Case:
+    """Restore complete games from their packed records."""
+    packed_records = [
+        record.GameRecord.from_events(game.events).to_bytes()
+        for game in corpus.generate_games(options.games, options.seed)
+    ]
+
+    def run() -> None:
+        for packed in packed_records:
+            game_.Game.from_record(record.GameRecord.from_bytes(packed), "game-id")
+
+    return harness.Case(run, len(packed_records), unit="game")
+
+
+@harness.benchmark("codec.scan[decoded]")
+def scan_decoded(options: harness.Options) -> harness.Case:
+    """Count the moves of finished games by decoding every event."""
+    histories = [
+        corpus.record_events(game)
+        for game in corpus.generate_games(options.games, options.seed)
+    ]
+
+    def run() -> None:
+        for recorded_events in histories:
+            domain_events = [
+                game_repository.map_eventstore_event_to_domain_event(event)
+                for event in recorded_events
+            ]
+            if isinstance(domain_events[-1], events.GameFinished):
+                sum(isinstance(event, events.MoveMade) for event in domain_events)
+
+    return harness.Case(run, len(histories), unit="game")
+
+
+@harness.benchmark("codec.scan[lazy]")
+def scan_lazy(options: harness.Options) -> harness.Case:
+    """Count the moves of finished games with lazily decoded events."""
+    histories = [
+        corpus.record_events(game)
+        for game in corpus.generate_games(options.games, options.seed)
+    ]
+
+    def run() -> None:
+        for recorded_events in histories:
+            lazy_events = [
+                game_repository.LazyGameEvent(event) for event in recorded_events
+            ]
+            if lazy_events[-1].type == "GameFinished":
+                sum(event.type == "MoveMade" for event in lazy_events)
+
+    return harness.Case(run, len(histories), unit="game")
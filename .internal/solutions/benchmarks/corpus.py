@@ -0,0 +1,85 @@
+"""Reproducible corpora of randomly played games."""
+
+from __future__ import annotations
+
+import random
+from collections.abc import Iterator
+
+import kurrentdbclient
+from connect_four_solutions.exercise_03.domain import enums
+from connect_four_solutions.exercise_03.domain import events as events_
+from connect_four_solutions.exercise_03.domain import game as game_
+from connect_four_solutions.exercise_03.persistence import game_repository
+
+
+def generate_games(count: int, seed: int) -> list[game_.Game]:
+    """Play `count` random games until each of them has finished.
+
+    :param count: the number of games to play
+    :param seed: the seed for the random number generator
+    :return: the finished games, with all events still uncommitted
+    """
+    rng = random.Random(seed)
+    return [_play_random_game(rng, index) for index in range(count)]
+
+
+def generate_move_sequences(count: int, seed: int) -> list[list[enums.Column]]:
+    """Generate the column choices of `count` random, complete games.
+
+    :param count: the number of move sequences
+    :param seed: the seed for the random number generator
+    :return: a list of move sequences, one per game
+    """
+    return [
+        [event.column for event in game.events if isinstance(event, events_.MoveMade)]
+        for game in generate_games(count, seed)
+    ]
+
+
+def iter_histories(
+    games: list[game_.Game], length: int
+) -> Iterator[list[events_.GameEvent]]:
+    """Yield the first `length` events of each game that is long enough.
+
+    :param games: the games to take the histories from
+    :param length: the number of events in each history
+    :return: an iterator of event histories
+    """
+    for game in games:
+        if len(game.events) >= length:
+            yield game.events[:length]
+
+
+def record_events(game: game_.Game) -> list[kurrentdbclient.RecordedEvent]:
+    """Encode the events of a game as if they were read from a stream.
+
+    :param game: the game with the events to encode
+    :return: the events as they would be recorded in the event store
+    """
+    recorded_events = []
+    for position, event in enumerate(game.events):
+        new_event = game_repository.map_domain_event_to_eventstore_event(event)
+        recorded_events.append(
+            kurrentdbclient.RecordedEvent(
+                type=new_event.type,
+                data=new_event.data,
+                metadata=new_event.metadata,
+                content_type=new_event.content_type,
+                id=new_event.id,
+                stream_name=f"game-{game.id}",
+                stream_position=position,
+                commit_position=None,
+                prepare_position=None,
+            )
+        )
+    return recorded_events
+
+
+def _play_random_game(rng: random.Random, index: int) -> game_.Game:
+    """Play a single game with random, legal moves."""
+    game = game_.Game(id=f"benchmark-{index:06d}")
+    game.start_game(player_one="player-one", player_two="player-two")
+    while not game.is_finished:
+        columns = [c for c, tokens in game.board.items() if len(tokens) < 6]
+        game.make_move(game.next_player, rng.choice(columns))
+    return game
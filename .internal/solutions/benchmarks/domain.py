@@ -0,0 +1,66 @@
+"""Benchmarks for the domain layer."""
+
+from __future__ import annotations
+
+import itertools
+
+from benchmarks import corpus, harness
+from connect_four_solutions.exercise_03.domain import board as board_
+from connect_four_solutions.exercise_03.domain import game as game_
+
+HISTORY_LENGTHS = (2, 8, 16, 24)
+
+
+@harness.benchmark("domain.make_move")
+def make_move(options: harness.Options) -> harness.Case:
+    """Play complete games through `Game.make_move`."""
+    sequences = corpus.generate_move_sequences(options.games, options.seed)
+
+    def run() -> None:
+        for sequence in sequences:
+            game = game_.Game()
+            game.start_game(player_one="player-one", player_two="player-two")
+            for column in sequence:
+                game.make_move(game.next_player, column)
+
+    return harness.Case(run, sum(map(len, sequences)), unit="move")
+
+
+@harness.benchmark("domain.board.get_result")
+def get_result(options: harness.Options) -> harness.Case:
+    """Compute the result of final positions."""
+    boards = [
+        board_.Board(game.board)
+        for game in corpus.generate_games(options.games, options.seed)
+    ]
+
+    def run() -> None:
+        for board in boards:
+            board.get_result()
+
+    return harness.Case(run, len(boards), unit="board")
+
+
+def _register_load_from_history(length: int) -> None:
+    """Register a replay benchmark for histories of a given length."""
+
+    @harness.benchmark(f"domain.load_from_history[{length}]")
+    def load_from_history(options: harness.Options) -> harness.Case:
+        """Restore games from histories of `length` events."""
+        games = corpus.generate_games(options.games, options.seed)
+        histories = list(corpus.iter_histories(games, length))
+        if not histories:
+            raise ValueError(f"No game in the corpus has {length} events.")
+        # Not every random game lasts long enough; reuse the ones that do
+        # so each length replays the same number of histories.
+        histories = list(itertools.islice(itertools.cycle(histories), len(games)))
+
+        def run() -> None:
+            for history in histories:
+                game_.Game.load_from_history("game-id", history)
+
+        return harness.Case(run, len(histories), unit="history")
+
+
+for _length in HISTORY_LENGTHS:
+    _register_load_from_history(_length)
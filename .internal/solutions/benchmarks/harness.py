@@ -0,0 +1,171 @@
+"""A minimal harness for registering, running and comparing benchmarks."""
+
+from __future__ import annotations
+
+import gc
+import platform
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from typing import Any
+
+import attrs
+
+
+@attrs.define(frozen=True)
+class Options:
+    """Options shared by all benchmarks."""
+
+    seed: int = 2025
+    games: int = 200
+    repeat: int = 5
+
+
+@attrs.define(frozen=True)
+class Case:
+    """A prepared benchmark.
+
+    `run` performs `operations` operations of the given `unit`. The
+    optional `teardown` releases resources, like servers, after the
+    benchmark was timed.
+    """
+
+    run: Callable[[], object]
+    operations: int
+    unit: str
+    teardown: Callable[[], object] | None = None
+
+
+@attrs.define(frozen=True)
+class Result:
+    """The timings of a benchmark."""
+
+    name: str
+    unit: str
+    operations: int
+    timings: list[float]
+
+    @property
+    def median(self) -> float:
+        """The median duration of a run in seconds."""
+        return statistics.median(self.timings)
+
+    @property
+    def operations_per_second(self) -> float:
+        """The throughput based on the median duration."""
+        return self.operations / self.median if self.median else float("inf")
+
+    def to_dict(self) -> dict[str, Any]:
+        """Serialize the result for a JSON report."""
+        return {
+            "unit": self.unit,
+            "operations": self.operations,
+            "timings": self.timings,
+            "median": self.median,
+            "min": min(self.timings),
+            "operations_per_second": self.operations_per_second,
+        }
+
+
+_REGISTRY: dict[str, Callable[[Options], Case]] = {}
+
+
+def benchmark(name: str) -> Callable[[Callable[[Options], Case]], Callable]:
+    """Register a function that prepares a benchmark case.
+
+    :param name: the unique name of the benchmark
+    :return: a decorator that registers the function
+    """
+
+    def register(setup: Callable[[Options], Case]) -> Callable[[Options], Case]:
+        if name in _REGISTRY:
+            raise ValueError(f"Benchmark {name!r} is registered twice.")
+        _REGISTRY[name] = setup
+        return setup
+
+    return register
+
+
+def run(options: Options, selection: str = "") -> list[Result]:
+    """Run every registered benchmark with `selection` in its name.
+
+    :param options: the options for all benchmarks
+    :param selection: a substring to filter the benchmarks by
+    :return: the results in the order the benchmarks were registered
+    """
+    results = []
+    for name, setup in _REGISTRY.items():
+        if selection not in name:
+            continue
+        case = setup(options)
+        try:
+            timings = _time(case.run, options.repeat)
+        finally:
+            if case.teardown is not None:
+                case.teardown()
+        results.append(
+            Result(
+                name=name,
+                unit=case.unit,
+                operations=case.operations,
+                timings=timings,
+            )
+        )
+    return results
+
+
+def build_report(options: Options, results: list[Result]) -> dict[str, Any]:
+    """Build a JSON-serializable report of a run.
+
+    :param options: the options used for the run
+    :param results: the results of the run
+    :return: the report
+    """
+    return {
+        "metadata": {
+            "python": sys.version,
+            "platform": platform.platform(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "options": attrs.asdict(options),
+        },
+        "results": {result.name: result.to_dict() for result in results},
+    }
+
+
+def compare_reports(
+    baseline: dict[str, Any], candidate: dict[str, Any]
+) -> list[tuple[str, float, float, float]]:
+    """Compare the throughput of the benchmarks in both reports.
+
+    :param baseline: the report to compare against
+    :param candidate: the report to compare
+    :return: (name, baseline ops/s, candidate ops/s, ratio)-tuples for
+      the benchmarks that are present in both reports
+    """
+    comparison = []
+    for name, result in candidate["results"].items():
+        if name not in baseline["results"]:
+            continue
+        before = baseline["results"][name]["operations_per_second"]
+        after = result["operations_per_second"]
+        ratio = after / before if before else float("inf")
+        comparison.append((name, before, after, ratio))
+    return comparison
+
+
+def _time(function: Callable[[], object], repeat: int) -> list[float]:
+    """Time `repeat` calls to the function with garbage collection off."""
+    function()  # Warm up caches and lazily initialized state.
+    timings = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return timings
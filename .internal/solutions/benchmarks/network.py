@@ -0,0 +1,94 @@
+"""Benchmarks for the repository with network round-trips.
+
+The in-memory event store answers instantly, which hides the cost of a
+round-trip to a real event store. These benchmarks put either a
+simulated network with a median latency of half a millisecond or a
+real `KurrentDBClient` with a local stand-in server in between.
+"""
+
+from __future__ import annotations
+
+from benchmarks import corpus, harness
+from connect_four_solutions import helpers
+from connect_four_solutions.exercise_03 import persistence
+from connect_four_solutions.exercise_03.domain import game as game_
+
+_PROFILE = helpers.NetworkProfile(
+    latency=helpers.LogNormalLatency(median=0.0005, sigma=0.5),
+    bytes_per_second=100e6,
+)
+
+
+@harness.benchmark("network.get")
+def get(options: harness.Options) -> harness.Case:
+    """Load complete games over a simulated network."""
+    client = helpers.InMemoryEventStoreClient(isolated=True)
+    repository = persistence.GameRepository(
+        helpers.FaultInjectingClient(client, read_profile=_PROFILE, seed=options.seed)
+    )
+    games = corpus.generate_games(options.games, options.seed)
+    game_ids = []
+    for game in games:
+        persistence.GameRepository(client).add(
+            game_.Game(id=game.id, uncommitted_events=game.events)
+        )
+        game_ids.append(game.id)
+
+    def run() -> None:
+        for game_id in game_ids:
+            repository.get(game_id)
+
+    return harness.Case(run, len(game_ids), unit="game")
+
+
+@harness.benchmark("network.get_many")
+def get_many(options: harness.Options) -> harness.Case:
+    """Load complete games at once over a simulated network.
+
+    Compare with `network.get`, which reads one stream at a time.
+    """
+    client = helpers.InMemoryEventStoreClient(isolated=True)
+    repository = persistence.GameRepository(
+        helpers.FaultInjectingClient(client, read_profile=_PROFILE, seed=options.seed),
+        max_concurrency=16,
+    )
+    games = corpus.generate_games(options.games, options.seed)
+    game_ids = []
+    for game in games:
+        persistence.GameRepository(client).add(
+            game_.Game(id=game.id, uncommitted_events=game.events)
+        )
+        game_ids.append(game.id)
+
+    def run() -> None:
+        repository.get_many(game_ids)
+
+    return harness.Case(run, len(game_ids), unit="game")
+
+
+@harness.benchmark("network.get[kurrentdb-standin]")
+def get_from_standin(options: harness.Options) -> harness.Case:
+    """Load complete games with a KurrentDBClient from a local server."""
+    import kurrentdbclient
+    from connect_four_solutions.helpers import kurrentdb_standin
+
+    server = kurrentdb_standin.KurrentDBStandIn()
+    server.start()
+    client = kurrentdbclient.KurrentDBClient(server.uri)
+    repository = persistence.GameRepository(client)
+    games = corpus.generate_games(options.games, options.seed)
+    game_ids = []
+    for game in games:
+        game_id = f"{game.id}-standin-{options.seed}"
+        repository.add(game_.Game(id=game_id, uncommitted_events=game.events))
+        game_ids.append(game_id)
+
+    def run() -> None:
+        for game_id in game_ids:
+            repository.get(game_id)
+
+    def teardown() -> None:
+        client.close()
+        server.stop()
+
+    return harness.Case(run, len(game_ids), unit="game", teardown=teardown)
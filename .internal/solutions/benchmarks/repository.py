@@ -0,0 +1,175 @@
+"""Benchmarks for the repository and application layers.
+
+Each benchmark uses an in-memory event store of its own, so preparing
+it again in the same process doesn't read or extend the streams of a
+previous run.
+"""
+
+from __future__ import annotations
+
+import itertools
+import shutil
+import tempfile
+from collections.abc import Callable
+
+import attrs
+from benchmarks import corpus, harness
+from connect_four_solutions import helpers
+from connect_four_solutions.exercise_03 import (
+    application,
+    instrumentation,
+    persistence,
+)
+from connect_four_solutions.exercise_03.domain import game as game_
+
+
+@harness.benchmark("repository.add")
+def add(options: harness.Options) -> harness.Case:
+    """Store complete games in an in-memory event store."""
+    repository = persistence.GameRepository(
+        helpers.InMemoryEventStoreClient(isolated=True)
+    )
+    games = corpus.generate_games(options.games, options.seed)
+    runs = itertools.count()
+
+    def run() -> None:
+        # Every run stores the games under new IDs, so the streams
+        # don't grow between runs.
+        run_number = next(runs)
+        for game in games:
+            repository.add(
+                game_.Game(
+                    id=f"{game.id}-{run_number}",
+                    uncommitted_events=game.events,
+                )
+            )
+
+    return harness.Case(run, len(games), unit="game")
+
+
+@harness.benchmark("repository.get")
+def get(options: harness.Options) -> harness.Case:
+    """Load complete games from an in-memory event store."""
+    repository = persistence.GameRepository(
+        helpers.InMemoryEventStoreClient(isolated=True)
+    )
+    games = corpus.generate_games(options.games, options.seed)
+    game_ids = []
+    for game in games:
+        repository.add(game_.Game(id=game.id, uncommitted_events=game.events))
+        game_ids.append(game.id)
+
+    def run() -> None:
+        for game_id in game_ids:
+            repository.get(game_id)
+
+    return harness.Case(run, len(game_ids), unit="game")
+
+
+@harness.benchmark("archive.get")
+def get_archived(options: harness.Options) -> harness.Case:
+    """Load archived games from an in-memory event store.
+
+    Compare with `repository.get` for the games before archival.
+    """
+    client = helpers.InMemoryEventStoreClient(isolated=True)
+    repository = persistence.GameRepository(client)
+    archiver = persistence.GameArchiver(client)
+    games = corpus.generate_games(options.games, options.seed)
+    game_ids = []
+    for game in games:
+        repository.add(game_.Game(id=game.id, uncommitted_events=game.events))
+        archiver.archive(game.id)
+        game_ids.append(game.id)
+
+    def run() -> None:
+        for game_id in game_ids:
+            repository.get(game_id)
+
+    return harness.Case(run, len(game_ids), unit="game")
+
+
+@harness.benchmark("application.make_move")
+def make_move(options: harness.Options) -> harness.Case:
+    """Play complete games through the application service.
+
+    Every move is a full round-trip: get the game from the repository,
+    make the move and add the new events to the repository.
+    """
+    return _play_games_through_app(
+        options,
+        helpers.InMemoryEventStoreClient(isolated=True),
+        instrumentation.DISABLED,
+    )
+
+
+@harness.benchmark("application.make_move[instrumented]")
+def make_move_instrumented(options: harness.Options) -> harness.Case:
+    """Play complete games with every stage recorded in a histogram."""
+    instruments = instrumentation.Instrumentation([instrumentation.HistogramSink()])
+    return _play_games_through_app(
+        options, helpers.InMemoryEventStoreClient(isolated=True), instruments
+    )
+
+
+@harness.benchmark("application.make_move[sqlite]")
+def make_move_sqlite(options: harness.Options) -> harness.Case:
+    """Play complete games with the events stored in a SQLite database."""
+    client, teardown = _create_sqlite_client()
+    case = _play_games_through_app(options, client, instrumentation.DISABLED)
+    return attrs.evolve(case, teardown=teardown)
+
+
+@harness.benchmark("sqlite.get")
+def get_sqlite(options: harness.Options) -> harness.Case:
+    """Load complete games from a SQLite database.
+
+    Compare with `repository.get` for the in-memory event store.
+    """
+    client, teardown = _create_sqlite_client()
+    repository = persistence.GameRepository(client)
+    games = corpus.generate_games(options.games, options.seed)
+    for game in games:
+        repository.add(game_.Game(id=game.id, uncommitted_events=game.events))
+
+    def run() -> None:
+        for game in games:
+            repository.get(game.id)
+
+    return harness.Case(run, len(games), unit="game", teardown=teardown)
+
+
+def _create_sqlite_client() -> (
+    tuple[persistence.SQLiteEventStoreClient, Callable[[], None]]
+):
+    """Create a client for a new database and a function to remove it."""
+    directory = tempfile.mkdtemp(prefix="connect-four-benchmark-")
+    client = persistence.SQLiteEventStoreClient(f"{directory}/events.db")
+
+    def teardown() -> None:
+        client.close()
+        shutil.rmtree(directory)
+
+    return client, teardown
+
+
+def _play_games_through_app(
+    options: harness.Options,
+    client: persistence.IEventStoreClient,
+    instruments: instrumentation.Instrumentation,
+) -> harness.Case:
+    """Prepare a benchmark that plays games through the application."""
+    app = application.ConnectFourApp(
+        persistence.GameRepository(client, instrumentation=instruments),
+        instrumentation=instruments,
+    )
+    sequences = corpus.generate_move_sequences(options.games // 10 or 1, options.seed)
+
+    def run() -> None:
+        for sequence in sequences:
+            game_id = app.create_game(player_one="player-one", player_two="player-two")
+            for index, column in enumerate(sequence):
+                player = "player-one" if index % 2 == 0 else "player-two"
+                app.make_move(game_id, player, column)
+
+    return harness.Case(run, sum(map(len, sequences)), unit="move")
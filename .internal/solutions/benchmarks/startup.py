@@ -0,0 +1,82 @@
+"""Benchmarks and checks for the import time of entry points.
+
+Import times are measured in a fresh interpreter with `python -X
+importtime`, which reports the time spent on each imported module.
+"""
+
+from __future__ import annotations
+
+import os
+import pathlib
+import subprocess
+import sys
+
+import attrs
+from benchmarks import harness
+
+# Modules that are only needed on specific code paths and must not be
+# imported when an entry point is loaded.
+HEAVY_MODULES = ("grpc", "google.protobuf", "kurrentdbclient", "colorama", "numpy")
+ENTRY_POINTS = (
+    "connect_four_solutions.exercise_03.cli",
+    "connect_four.exercise_03.cli",
+)
+
+
+@attrs.define(frozen=True)
+class ImportProfile:
+    """The modules imported by a fresh interpreter, with their timings."""
+
+    module: str
+    cumulative_microseconds: dict[str, int]
+
+    @property
+    def total_microseconds(self) -> int:
+        """The cumulative import time of the profiled module."""
+        return self.cumulative_microseconds[self.module]
+
+    def imported_heavy_modules(self) -> list[str]:
+        """The heavy modules that were imported, if any."""
+        return [
+            name
+            for name in self.cumulative_microseconds
+            if any(name == m or name.startswith(f"{m}.") for m in HEAVY_MODULES)
+        ]
+
+
+def profile_import(module: str) -> ImportProfile:
+    """Import a module in a fresh interpreter and profile the imports.
+
+    :param module: the name of the module to import
+    :return: the import profile
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=_ROOT,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+    cumulative = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_time, name = line.removeprefix("import time:").split("|")
+        cumulative[name.strip()] = int(cumulative_time)
+    return ImportProfile(module=module, cumulative_microseconds=cumulative)
+
+
+def _register(module: str) -> None:
+    """Register an import time benchmark for an entry point."""
+
+    @harness.benchmark(f"startup.import[{module}]")
+    def import_time(options: harness.Options) -> harness.Case:
+        """Import the entry point in a fresh interpreter."""
+        return harness.Case(lambda: profile_import(module), 1, unit="process")
+
+
+_ROOT = pathlib.Path(__file__).parent.parent
+
+for _module in ENTRY_POINTS:
+    _register(_module)
@@ -0,0 +1,31 @@
+"""Bulk analysis of Connect Four games.
+
+The modules in this package work on many games at once and require
+NumPy, which is not needed for playing the game itself. Install it
+with the optional `analytics` dependency group:
+
+    poetry install --with analytics
+"""
+
+from .batch import (
+    decode_results,
+    get_results,
+    get_results_from_bitboards,
+    grids_to_bitboards,
+    pack_board_states,
+)
+from .export import ColumnarExporter, ExportSummary
+from .replay import ReplayedGames, replay_export, verify_against_history
+
+__all__ = [
+    "ColumnarExporter",
+    "ExportSummary",
+    "ReplayedGames",
+    "decode_results",
+    "get_results",
+    "get_results_from_bitboards",
+    "grids_to_bitboards",
+    "pack_board_states",
+    "replay_export",
+    "verify_against_history",
+]
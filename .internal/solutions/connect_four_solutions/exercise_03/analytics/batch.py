@@ -0,0 +1,174 @@
+"""Vectorized evaluation of many boards at once.
+
+Boards are represented in one of two array formats:
+
+- Grids: an `(N, 6, 7)` int8 array, indexed as `grids[n, row, column]`,
+  where row 0 is the bottom row. Cells contain `EMPTY`, `YELLOW` or
+  `RED`.
+- Bitboards: an `(N, 2)` uint64 array with the yellow and red tokens of
+  each board. Bit `column * 7 + row` is set if the cell is occupied; the
+  seventh bit of every column is a sentinel that's always zero, which
+  prevents winning lines from wrapping around to the next column.
+
+Results are returned as int8 codes. Use `decode_results` to translate
+them back to `GameResult` values.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from typing import Final
+
+import numpy as np
+from connect_four_solutions.exercise_03.domain import board, enums
+
+EMPTY: Final = 0
+YELLOW: Final = 1
+RED: Final = 2
+
+NO_RESULT: Final = 0
+PLAYER_ONE_WON: Final = 1
+PLAYER_TWO_WON: Final = 2
+TIED: Final = 3
+
+ROWS: Final = 6
+COLUMNS: Final = 7
+
+
+def pack_board_states(board_states: Iterable[board.BoardState]) -> np.ndarray:
+    """Pack board states into an `(N, 6, 7)` int8 array.
+
+    :param board_states: the board states to pack
+    :return: the boards in the grid format
+    """
+    board_states = (
+        board_states if isinstance(board_states, Sequence) else list(board_states)
+    )
+    grids = np.zeros((len(board_states), ROWS, COLUMNS), dtype=np.int8)
+    for index, board_state in enumerate(board_states):
+        grid = grids[index]
+        for column, tokens in board_state.items():
+            if tokens:
+                column_index = _COLUMN_INDICES[column]
+                grid[: len(tokens), column_index] = [_TOKEN_CODES[t] for t in tokens]
+    return grids
+
+
+def grids_to_bitboards(grids: np.ndarray) -> np.ndarray:
+    """Convert an `(N, 6, 7)` grid array to an `(N, 2)` bitboard array.
+
+    :param grids: the boards in the grid format
+    :return: the boards in the bitboard format
+    """
+    bitboards = np.empty((len(grids), 2), dtype=np.uint64)
+    for index, token in enumerate((YELLOW, RED)):
+        bitboards[:, index] = np.bitwise_or.reduce(
+            np.where(grids == token, _BIT_WEIGHTS, np.uint64(0)), axis=(1, 2)
+        )
+    return bitboards
+
+
+def get_results(grids: np.ndarray) -> np.ndarray:
+    """Get the results of all boards in an `(N, 6, 7)` grid array.
+
+    Each direction is checked with shifted ANDs over the whole batch,
+    so the cost per board is a handful of vector operations.
+
+    :param grids: the boards in the grid format
+    :return: an int8 array with a result code per board
+    """
+    grids = np.asarray(grids)
+    yellow_won = _has_four_in_grid(grids == YELLOW)
+    red_won = _has_four_in_grid(grids == RED)
+    is_filled = (grids != EMPTY).all(axis=(1, 2))
+    return _combine_results(yellow_won, red_won, is_filled)
+
+
+def get_results_from_bitboards(bitboards: np.ndarray) -> np.ndarray:
+    """Get the results of all boards in an `(N, 2)` bitboard array.
+
+    :param bitboards: the boards in the bitboard format
+    :return: an int8 array with a result code per board
+    """
+    bitboards = np.asarray(bitboards, dtype=np.uint64)
+    yellow, red = bitboards[:, 0], bitboards[:, 1]
+    yellow_won = _has_four_in_bitboard(yellow)
+    red_won = _has_four_in_bitboard(red)
+    is_filled = (yellow | red) == _FULL_BOARD
+    return _combine_results(yellow_won, red_won, is_filled)
+
+
+def decode_results(codes: np.ndarray) -> list[enums.GameResult | None]:
+    """Translate result codes to game results.
+
+    :param codes: an array of result codes
+    :return: a list with the equivalent game results
+    """
+    return [_RESULTS[code] for code in codes.tolist()]
+
+
+def _has_four_in_grid(tokens: np.ndarray) -> np.ndarray:
+    """Check an `(N, 6, 7)` boolean array for four connected cells."""
+    vertical = tokens[:, :-3] & tokens[:, 1:-2] & tokens[:, 2:-1] & tokens[:, 3:]
+    horizontal = (
+        tokens[:, :, :-3] & tokens[:, :, 1:-2] & tokens[:, :, 2:-1] & tokens[:, :, 3:]
+    )
+    rising = (
+        tokens[:, :-3, :-3]
+        & tokens[:, 1:-2, 1:-2]
+        & tokens[:, 2:-1, 2:-1]
+        & tokens[:, 3:, 3:]
+    )
+    falling = (
+        tokens[:, 3:, :-3]
+        & tokens[:, 2:-1, 1:-2]
+        & tokens[:, 1:-2, 2:-1]
+        & tokens[:, :-3, 3:]
+    )
+    return (
+        vertical.any(axis=(1, 2))
+        | horizontal.any(axis=(1, 2))
+        | rising.any(axis=(1, 2))
+        | falling.any(axis=(1, 2))
+    )
+
+
+def _has_four_in_bitboard(bitboards: np.ndarray) -> np.ndarray:
+    """Check a uint64 array of bitboards for four connected tokens."""
+    has_four = np.zeros(bitboards.shape, dtype=bool)
+    for shift in _SHIFTS:
+        pairs = bitboards & (bitboards >> shift)
+        has_four |= (pairs & (pairs >> (shift * 2))) != 0
+    return has_four
+
+
+def _combine_results(
+    yellow_won: np.ndarray, red_won: np.ndarray, is_filled: np.ndarray
+) -> np.ndarray:
+    """Combine the per-board checks into result codes.
+
+    Positions that can be reached in a game have at most one winner. If
+    both players have four connected tokens anyway, player one wins.
+    """
+    results = np.full(yellow_won.shape, NO_RESULT, dtype=np.int8)
+    results[is_filled] = TIED
+    results[red_won] = PLAYER_TWO_WON
+    results[yellow_won] = PLAYER_ONE_WON
+    return results
+
+
+_COLUMN_INDICES: Final = {column: index for index, column in enumerate(enums.Column)}
+_TOKEN_CODES: Final = {enums.Token.YELLOW: YELLOW, enums.Token.RED: RED}
+_RESULTS: Final = (
+    None,
+    enums.GameResult.PLAYER_ONE_WON,
+    enums.GameResult.PLAYER_TWO_WON,
+    enums.GameResult.TIED,
+)
+_BIT_WEIGHTS: Final = np.array(
+    [[1 << (column * 7 + row) for column in range(COLUMNS)] for row in range(ROWS)],
+    dtype=np.uint64,
+)
+_FULL_BOARD: Final = np.bitwise_or.reduce(_BIT_WEIGHTS, axis=None)
+# Vertical, horizontal, rising diagonal and falling diagonal neighbours.
+_SHIFTS: Final = tuple(np.uint64(shift) for shift in (1, 7, 8, 6))
@@ -0,0 +1,355 @@
+"""Export the events of all games to a columnar format.
+
+The exporter reads every `game-*` stream in a single pass over the
+event store and writes the events as fixed-width columns, one row per
+event:
+
+- `game_id`: the ID of the game (fixed-width bytes)
+- `position`: the position of the event in its stream (int32)
+- `event_type`: an `EVENT_TYPES` code (int8)
+- `player_id`: the player making a move, or player one for a
+  `GameStarted` event (fixed-width bytes)
+- `opponent_id`: player two for a `GameStarted` event (fixed-width bytes)
+- `column`: the column index of a move, or -1 (int8)
+- `result`: a result code as used by `analytics.batch` (int8)
+
+Events that were stored at an older schema version are upcast before
+they're exported.
+
+The `GameArchiver` replaces the events of a finished game with a
+`GameArchived` event, and the `SchemaMigrator` rewrites the events of a
+game at the current versions. The event store deletes the original
+events when it truncates the stream, or when KurrentDB scavenges. The
+events of an archived game are recreated from its record, and the ones
+that weren't exported yet are exported, like the rewritten events whose
+originals weren't exported. The number of events that was exported of
+each game is kept in the checkpoint for that.
+
+Only games on the standard board are exported, as the columns and the
+replay assume its size. The IDs of the other games are kept in the
+checkpoint, so their later events are skipped too.
+
+Events are written in chunks of bounded size. By default, each chunk is
+a directory with one NumPy `.npy` file per column, which can be memory
+mapped. A checkpoint is written after every chunk, so an interrupted
+export resumes where it left off. For a sharded event store, the
+checkpoint holds the position on each shard.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+from typing import TYPE_CHECKING, Any, Final, Literal
+
+import attrs
+import numpy as np
+from connect_four_solutions.exercise_03.analytics import batch
+from connect_four_solutions.exercise_03.domain import enums
+from connect_four_solutions.exercise_03.domain import events as domain_events
+from connect_four_solutions.exercise_03.persistence import (
+    game_repository,
+    migration,
+    schemas,
+    sharding,
+)
+
+if TYPE_CHECKING:
+    import kurrentdbclient
+
+EVENT_TYPES: Final = ("GameStarted", "MoveMade", "GameFinished")
+COLUMN_NAMES: Final = (
+    "game_id",
+    "position",
+    "event_type",
+    "player_id",
+    "opponent_id",
+    "column",
+    "result",
+)
+CHECKPOINT_FILE: Final = "checkpoint.json"
+
+
+@attrs.define(frozen=True)
+class ExportSummary:
+    """A summary of an export run."""
+
+    events_exported: int
+    chunks_written: int
+
+
+@attrs.define
+class ColumnarExporter:
+    """Export all game events from an event store to columnar files."""
+
+    _client: game_repository.IEventStoreClient
+    _directory: pathlib.Path = attrs.field(converter=pathlib.Path)
+    _chunk_size: int = 100_000
+    _format: Literal["npy", "parquet"] = "npy"
+    _upcasters: schemas.UpcasterRegistry = schemas.UPCASTERS
+
+    def export(self) -> ExportSummary:
+        """Export all events that were committed since the last run.
+
+        :return: a summary of this export run
+        """
+        self._directory.mkdir(parents=True, exist_ok=True)
+        checkpoint = self._read_checkpoint()
+        last_position = _decode_position(checkpoint["commit_position"])
+        chunk_number = checkpoint["chunks"]
+        skipped_games = set(checkpoint.get("skipped_games", ()))
+        game_positions = checkpoint.get("game_positions", {})
+
+        events = self._client.read_all(
+            commit_position=last_position,
+            filter_include=(_GAME_STREAM_PATTERN,),
+            filter_by_stream_name=True,
+        )
+        rows = _ChunkBuffer()
+        exported, chunks_written = 0, 0
+        for event in events:
+            if last_position is not None and event.commit_position <= last_position:
+                continue
+            if event.stream_name in skipped_games:
+                continue
+            exported_events = game_positions.get(event.stream_name, 0)
+            position = migration.get_game_position(event)
+            if event.type == game_repository.ARCHIVE_EVENT_TYPE:
+                game_events = game_repository.map_eventstore_event_to_record(
+                    event, self._upcasters
+                ).to_events()
+                if exported_events >= len(game_events):
+                    continue
+                rows.append_archived(event, game_events, exported_events)
+                game_positions[event.stream_name] = len(game_events)
+            elif event.type not in _EVENT_TYPE_CODES or position < exported_events:
+                continue
+            elif event.type == "GameStarted" and not _is_standard_game(event):
+                skipped_games.add(event.stream_name)
+                continue
+            else:
+                rows.append(event, position, self._upcasters)
+                game_positions[event.stream_name] = position + 1
+            if len(rows) >= self._chunk_size:
+                self._write_chunk(chunk_number, rows, skipped_games, game_positions)
+                exported, chunks_written = exported + len(rows), chunks_written + 1
+                chunk_number += 1
+                rows = _ChunkBuffer()
+
+        if rows:
+            self._write_chunk(chunk_number, rows, skipped_games, game_positions)
+            exported, chunks_written = exported + len(rows), chunks_written + 1
+        return ExportSummary(events_exported=exported, chunks_written=chunks_written)
+
+    def _write_chunk(
+        self,
+        chunk_number: int,
+        rows: _ChunkBuffer,
+        skipped_games: set[str],
+        game_positions: dict[str, int],
+    ) -> None:
+        """Write a chunk of rows and move the checkpoint past it."""
+        columns = rows.to_columns()
+        name = f"chunk-{chunk_number:06d}"
+        if self._format == "parquet":
+            _write_parquet(self._directory / f"{name}.parquet", columns)
+        else:
+            chunk_directory = self._directory / name
+            chunk_directory.mkdir(exist_ok=True)
+            for column_name, values in columns.items():
+                np.save(chunk_directory / f"{column_name}.npy", values)
+        self._write_checkpoint(
+            {
+                "commit_position": _encode_position(rows.last_commit_position),
+                "chunks": chunk_number + 1,
+                "skipped_games": sorted(skipped_games),
+                "game_positions": game_positions,
+            }
+        )
+
+    def _read_checkpoint(self) -> dict[str, Any]:
+        """Read the checkpoint, or start from scratch if there is none."""
+        path = self._directory / CHECKPOINT_FILE
+        if not path.exists():
+            return {"commit_position": None, "chunks": 0}
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def _write_checkpoint(self, checkpoint: dict[str, Any]) -> None:
+        """Atomically replace the checkpoint."""
+        path = self._directory / CHECKPOINT_FILE
+        temporary_path = path.with_name(path.name + ".tmp")
+        temporary_path.write_text(json.dumps(checkpoint), encoding="utf-8")
+        os.replace(temporary_path, path)
+
+
+@attrs.define
+class _ChunkBuffer:
+    """Accumulates the rows of a single chunk."""
+
+    game_id: list[bytes] = attrs.field(factory=list)
+    position: list[int] = attrs.field(factory=list)
+    event_type: list[int] = attrs.field(factory=list)
+    player_id: list[bytes] = attrs.field(factory=list)
+    opponent_id: list[bytes] = attrs.field(factory=list)
+    column: list[int] = attrs.field(factory=list)
+    result: list[int] = attrs.field(factory=list)
+    last_commit_position: int | None = None
+
+    def append(
+        self,
+        event: kurrentdbclient.RecordedEvent,
+        position: int,
+        upcasters: schemas.UpcasterRegistry = schemas.UPCASTERS,
+    ) -> None:
+        """Decode an event, upcasting it if it's old, and add it as a row.
+
+        :param event: the recorded event
+        :param position: the position of the event in its game
+        :param upcasters: the registry with the upcasters of old versions
+        """
+        data = json.loads(event.data)
+        version = game_repository.decode_metadata(event.metadata).get(
+            schemas.SCHEMA_VERSION_KEY, 1
+        )
+        if version != upcasters.current_version(event.type):
+            data = upcasters.upcast(event.type, version, data)
+        player_id, opponent_id, column, result = b"", b"", -1, batch.NO_RESULT
+        match event.type:
+            case "GameStarted":
+                player_id = data["player_one"].encode("utf-8")
+                opponent_id = data["player_two"].encode("utf-8")
+            case "MoveMade":
+                player_id = data["player"].encode("utf-8")
+                column = _COLUMN_CODES[data["column"]]
+            case "GameFinished":
+                result = _RESULT_CODES[data["result"]]
+        self._append_row(
+            event,
+            position,
+            event.type,
+            player_id,
+            opponent_id,
+            column,
+            result,
+        )
+
+    def append_archived(
+        self,
+        event: kurrentdbclient.RecordedEvent,
+        game_events: list[domain_events.GameEvent],
+        first_position: int,
+    ) -> None:
+        """Add the events of an archived game as rows, from a position.
+
+        :param event: the `GameArchived` event of the game
+        :param game_events: the events that were recreated from its record
+        :param first_position: the position of the first event to add
+        """
+        for position in range(first_position, len(game_events)):
+            player_id, opponent_id, column, result = b"", b"", -1, batch.NO_RESULT
+            match game_event := game_events[position]:
+                case domain_events.GameStarted():
+                    player_id = game_event.player_one.encode("utf-8")
+                    opponent_id = game_event.player_two.encode("utf-8")
+                case domain_events.MoveMade():
+                    player_id = game_event.player.encode("utf-8")
+                    column = _COLUMN_CODES[game_event.column]
+                case domain_events.GameFinished():
+                    result = _RESULT_CODES[game_event.result]
+            self._append_row(
+                event,
+                position,
+                type(game_event).__name__,
+                player_id,
+                opponent_id,
+                column,
+                result,
+            )
+
+    def _append_row(
+        self,
+        event: kurrentdbclient.RecordedEvent,
+        position: int,
+        event_type: str,
+        player_id: bytes,
+        opponent_id: bytes,
+        column: int,
+        result: int,
+    ) -> None:
+        """Add a row for an event of the game of a recorded event."""
+        self.game_id.append(event.stream_name.removeprefix("game-").encode("utf-8"))
+        self.position.append(position)
+        self.event_type.append(_EVENT_TYPE_CODES[event_type])
+        self.player_id.append(player_id)
+        self.opponent_id.append(opponent_id)
+        self.column.append(column)
+        self.result.append(result)
+        self.last_commit_position = event.commit_position
+
+    def to_columns(self) -> dict[str, np.ndarray]:
+        """Convert the rows to fixed-width arrays."""
+        return {
+            "game_id": np.array(self.game_id, dtype=np.bytes_),
+            "position": np.array(self.position, dtype=np.int32),
+            "event_type": np.array(self.event_type, dtype=np.int8),
+            "player_id": np.array(self.player_id, dtype=np.bytes_),
+            "opponent_id": np.array(self.opponent_id, dtype=np.bytes_),
+            "column": np.array(self.column, dtype=np.int8),
+            "result": np.array(self.result, dtype=np.int8),
+        }
+
+    def __len__(self) -> int:
+        """The number of rows in the chunk."""
+        return len(self.game_id)
+
+
+def _is_standard_game(event: kurrentdbclient.RecordedEvent) -> bool:
+    """Whether a `GameStarted` event starts a game on the standard board."""
+    # Only the geometry of other boards is stored.
+    return "geometry" not in json.loads(event.data)
+
+
+def _encode_position(commit_position: int | None) -> int | dict[str, Any] | None:
+    """Encode a commit position as JSON for the checkpoint."""
+    if isinstance(commit_position, sharding.ShardedPosition):
+        return {
+            "shard_positions": commit_position.shard_positions,
+            "shard_name": commit_position.shard_name,
+        }
+    return commit_position
+
+
+def _decode_position(commit_position: int | dict[str, Any] | None) -> int | None:
+    """Decode a commit position from the checkpoint."""
+    if isinstance(commit_position, dict):
+        return sharding.ShardedPosition(
+            commit_position["shard_positions"], commit_position["shard_name"]
+        )
+    return commit_position
+
+
+def _write_parquet(path: pathlib.Path, columns: dict[str, np.ndarray]) -> None:
+    """Write the columns of a chunk to a Parquet file."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Exporting to Parquet requires pyarrow.") from None
+
+    table = pyarrow.table(
+        {name: pyarrow.array(values.tolist()) for name, values in columns.items()}
+    )
+    pyarrow.parquet.write_table(table, path)
+
+
+_GAME_STREAM_PATTERN: Final = "game-.*"
+_EVENT_TYPE_CODES: Final = {name: code for code, name in enumerate(EVENT_TYPES)}
+_COLUMN_CODES: Final = {
+    column.value: index for index, column in enumerate(enums.Column)
+}
+_RESULT_CODES: Final = {
+    enums.GameResult.PLAYER_ONE_WON.value: batch.PLAYER_ONE_WON,
+    enums.GameResult.PLAYER_TWO_WON.value: batch.PLAYER_TWO_WON,
+    enums.GameResult.TIED.value: batch.TIED,
+}
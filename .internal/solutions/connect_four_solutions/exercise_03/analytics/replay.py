@@ -0,0 +1,161 @@
+"""Reconstruct final positions from an export without `Game` objects.
+
+The replay engine memory-maps the column files written by the
+`ColumnarExporter` one chunk at a time, so only a single chunk is held
+in memory, and reconstructs the final board of every game with a
+handful of vectorized operations:
+
+1. Collect the game IDs of all chunks; each game gets the index of its
+   ID in the sorted IDs.
+2. Sort the rows of a chunk by game ID and stream position, which turns
+   each game into a contiguous segment.
+3. Number the moves within each segment, counting on from the moves of
+   the game in earlier chunks; even moves belong to player one and odd
+   moves to player two.
+4. Number the moves within each (game, column)-pair on top of the
+   tokens already in that column, which gives the row that each token
+   lands in.
+5. Scatter the tokens into an `(N, 6, 7)` grid array.
+
+The exporter writes events in commit order, so the events of a game in
+a chunk always follow those in earlier chunks.
+
+The results are then recomputed from the grids with `analytics.batch`.
+"""
+
+from __future__ import annotations
+
+import pathlib
+import random
+
+import attrs
+import numpy as np
+from connect_four_solutions.exercise_03.analytics import batch, export
+from connect_four_solutions.exercise_03.application import repository
+
+
+@attrs.define(frozen=True)
+class ReplayedGames:
+    """The final positions of the games in an export.
+
+    All arrays are aligned: index `i` refers to the same game in each of
+    them. Result codes follow the conventions of `analytics.batch`.
+    """
+
+    game_ids: np.ndarray
+    grids: np.ndarray
+    recorded_results: np.ndarray
+    computed_results: np.ndarray
+
+    def __len__(self) -> int:
+        """The number of games."""
+        return len(self.game_ids)
+
+
+def replay_export(directory: pathlib.Path | str) -> ReplayedGames:
+    """Reconstruct the final position of every game in an export.
+
+    :param directory: the directory with the exported `.npy` chunks
+    :return: the reconstructed games, sorted by game ID
+    """
+    chunks = sorted(
+        path for path in pathlib.Path(directory).glob("chunk-*") if path.is_dir()
+    )
+    game_ids = _load_game_ids(chunks)
+    number_of_games = len(game_ids)
+    grids = np.zeros((number_of_games, batch.ROWS, batch.COLUMNS), dtype=np.int8)
+    recorded_results = np.full(number_of_games, batch.NO_RESULT, dtype=np.int8)
+    # The moves and the tokens per column of each game in earlier chunks
+    move_counts = np.zeros(number_of_games, dtype=np.int64)
+    column_heights = np.zeros(number_of_games * batch.COLUMNS, dtype=np.int64)
+
+    for chunk in chunks:
+        columns = _load_chunk(
+            chunk, ("game_id", "position", "event_type", "column", "result")
+        )
+        order = np.lexsort((columns["position"], columns["game_id"]))
+        segments = np.searchsorted(game_ids, columns["game_id"][order])
+        event_types = columns["event_type"][order]
+
+        is_move = event_types == export.EVENT_TYPES.index("MoveMade")
+        move_segments = segments[is_move]
+        move_columns = columns["column"][order][is_move].astype(np.int64)
+        move_numbers = _rank_within_groups(move_segments) + move_counts[move_segments]
+        tokens = np.where(move_numbers % 2 == 0, batch.YELLOW, batch.RED)
+
+        column_keys = move_segments * batch.COLUMNS + move_columns
+        by_column = np.argsort(column_keys, kind="stable")
+        rows = np.empty_like(move_numbers)
+        rows[by_column] = _rank_within_groups(column_keys[by_column])
+        rows += column_heights[column_keys]
+        grids[move_segments, rows, move_columns] = tokens
+
+        move_counts += np.bincount(move_segments, minlength=number_of_games)
+        column_heights += np.bincount(
+            column_keys, minlength=number_of_games * batch.COLUMNS
+        )
+        is_finish = event_types == export.EVENT_TYPES.index("GameFinished")
+        recorded_results[segments[is_finish]] = columns["result"][order][is_finish]
+
+    return ReplayedGames(
+        game_ids=game_ids,
+        grids=grids,
+        recorded_results=recorded_results,
+        computed_results=batch.get_results(grids),
+    )
+
+
+def verify_against_history(
+    replayed: ReplayedGames,
+    game_repository: repository.IGameRepository,
+    sample_size: int = 100,
+    seed: int = 0,
+) -> list[str]:
+    """Compare a sample of replayed games with `Game.load_from_history`.
+
+    :param replayed: the games reconstructed by `replay_export`
+    :param game_repository: the repository to load the games from
+    :param sample_size: the number of games to compare
+    :param seed: the seed for picking the sample
+    :return: the IDs of the games that don't match
+    """
+    rng = random.Random(seed)
+    indices = rng.sample(range(len(replayed)), min(sample_size, len(replayed)))
+    mismatches = []
+    for index in indices:
+        game_id = replayed.game_ids[index].decode("utf-8")
+        game = game_repository.get(game_id)
+        [grid] = batch.pack_board_states([game.board])
+        [result] = batch.decode_results(replayed.recorded_results[index : index + 1])
+        if not np.array_equal(grid, replayed.grids[index]) or result != game.result:
+            mismatches.append(game_id)
+    return mismatches
+
+
+def _load_game_ids(chunks: list[pathlib.Path]) -> np.ndarray:
+    """Collect the sorted, unique game IDs of all chunks."""
+    game_ids = np.empty(0, dtype=np.bytes_)
+    for chunk in chunks:
+        chunk_ids = np.load(chunk / "game_id.npy", mmap_mode="r")
+        game_ids = np.union1d(game_ids, chunk_ids)
+    return game_ids
+
+
+def _load_chunk(chunk: pathlib.Path, names: tuple[str, ...]) -> dict[str, np.ndarray]:
+    """Memory-map the columns of a single chunk."""
+    return {name: np.load(chunk / f"{name}.npy", mmap_mode="r") for name in names}
+
+
+def _rank_within_groups(sorted_groups: np.ndarray) -> np.ndarray:
+    """Number the elements of each run of equal values, starting at 0.
+
+    :param sorted_groups: an array in which equal values are adjacent
+    :return: the rank of each element within its run
+    """
+    if not len(sorted_groups):
+        return np.empty(0, dtype=np.int64)
+    is_start = np.ones(len(sorted_groups), dtype=bool)
+    is_start[1:] = sorted_groups[1:] != sorted_groups[:-1]
+    start_indices = np.flatnonzero(is_start)
+    run_lengths = np.diff(np.append(start_indices, len(sorted_groups)))
+    return np.arange(len(sorted_groups)) - np.repeat(start_indices, run_lengths)
@@ -1,4 +1,4 @@
-from .application import ConnectFourApp
+from .application import ConnectFourApp, GameState
 from .repository import IGameRepository
 
-__all__ = ["ConnectFourApp", "IGameRepository"]
+__all__ = ["ConnectFourApp", "GameState", "IGameRepository"]
@@ -1,8 +1,12 @@
+import collections
+import threading
+
 import attrs
 from connect_four_solutions.exercise_03.application import repository
 from connect_four_solutions.exercise_03.domain import board as board_models
-from connect_four_solutions.exercise_03.domain import enums
+from connect_four_solutions.exercise_03.domain import enums, exceptions
 from connect_four_solutions.exercise_03.domain import game as game_models
+from connect_four_solutions.exercise_03.instrumentation import instrumentation
 
 
 @attrs.define
@@ -24,29 +28,84 @@ class ConnectFourApp:
     """
 
     _game_repository: repository.IGameRepository
-
-    def create_game(self, player_one: str, player_two: str) -> str:
+    _instrumentation: instrumentation.Instrumentation = instrumentation.DISABLED
+    _max_idempotency_keys: int = 10_000
+    # The player and column of the recently processed moves by (game ID,
+    # idempotency key), oldest first
+    _idempotency_keys: collections.OrderedDict[
+        tuple[str, str], tuple[str, enums.Column]
+    ] = attrs.field(init=False, factory=collections.OrderedDict)
+    _lock: threading.Lock = attrs.field(init=False, factory=threading.Lock)
+
+    def create_game(
+        self,
+        player_one: str,
+        player_two: str,
+        geometry: board_models.Geometry = board_models.STANDARD,
+    ) -> str:
         """Create a new game and start it.
 
         :param player_one: the ID of the first player
         :param player_two: the ID of the second player
+        :param geometry: the geometry of the board, which is the standard
+          board of 6 rows by 7 columns by default
         :return: the ID of the game that was created
         """
-        game = game_models.Game()
-        game.start_game(player_one, player_two)
-        self._game_repository.add(game)
-        return game.id
-
-    def make_move(self, game_id: str, player: str, column: enums.Column) -> None:
+        with self._instrumentation.stage("application.create_game") as stage:
+            game = game_models.Game()
+            stage.set_attribute("game_id", game.id)
+            with self._instrumentation.stage("domain.start_game"):
+                game.start_game(player_one, player_two, geometry)
+            self._game_repository.add(game)
+            return game.id
+
+    def make_move(
+        self,
+        game_id: str,
+        player: str,
+        column: enums.Column,
+        idempotency_key: str | None = None,
+    ) -> None:
         """Make a move in the specified game.
 
+        A client that retries a move should send the same idempotency
+        key with each attempt. Recently processed keys are cached, so a
+        retry is usually answered without loading the game. Otherwise,
+        the game ignores a key that's stored with one of its moves.
+
         :param game_id: the ID of the game
         :param player: The player that wants to make the move
         :param column: The column the player drops a token in
+        :param idempotency_key: an optional key that identifies the move
+        :raises IdempotencyKeyReusedError: if the key was sent with
+          another move
         """
-        game = self._game_repository.get(game_id)
-        game.make_move(player, column)
-        self._game_repository.add(game)
+        cache_key = (game_id, idempotency_key)
+        if idempotency_key is not None:
+            with self._lock:
+                move = self._idempotency_keys.get(cache_key)
+                if move is not None:
+                    self._idempotency_keys.move_to_end(cache_key)
+            if move is not None:
+                if move != (player, column):
+                    raise exceptions.IdempotencyKeyReusedError(
+                        "The idempotency key was used for another move."
+                    )
+                return
+
+        with self._instrumentation.stage("application.make_move") as stage:
+            stage.set_attribute("game_id", game_id)
+            game = self._game_repository.get(game_id)
+            with self._instrumentation.stage("domain.make_move"):
+                game.make_move(player, column, idempotency_key)
+            if game.uncommitted_events:
+                self._game_repository.add(game)
+
+        if idempotency_key is not None:
+            with self._lock:
+                self._idempotency_keys[cache_key] = (player, column)
+                if len(self._idempotency_keys) > self._max_idempotency_keys:
+                    self._idempotency_keys.popitem(last=False)
 
     def get_game(self, game_id: str) -> "GameState":
         """Get the current state of a game.
@@ -54,7 +113,9 @@ class ConnectFourApp:
         :param game_id: the ID of the game
         :return: the state of the game aggregate
         """
-        game = self._game_repository.get(game_id)
+        with self._instrumentation.stage("application.get_game") as stage:
+            stage.set_attribute("game_id", game_id)
+            game = self._game_repository.get(game_id)
         return GameState(
             player_one=game.player_one,
             player_two=game.player_two,
@@ -62,6 +123,7 @@ class ConnectFourApp:
             is_finished=game.is_finished,
             result=game.result,
             board=game.board,
+            geometry=game.geometry,
         )
 
 
@@ -75,3 +137,4 @@ class GameState:
     is_finished: bool
     result: enums.GameResult | None
     board: board_models.BoardState
+    geometry: board_models.Geometry = board_models.STANDARD
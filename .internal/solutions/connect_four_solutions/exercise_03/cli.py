@@ -1,29 +1,26 @@
 import argparse
+import contextlib
+import random
+import statistics
+import sys
+import time
 import warnings
-
-with warnings.catch_warnings():
-    import kurrentdbclient
+from collections.abc import Iterator, Sequence
+from typing import TextIO
 
 from connect_four_solutions import helpers
 from connect_four_solutions.exercise_03 import application, persistence, presentation
-from connect_four_solutions.exercise_03.domain import enums
+from connect_four_solutions.exercise_03.domain import board, enums, exceptions
 
 _CONNECTION_STRING = "kdb://localhost:2113?tls=false"
 
 
-def _play(event_store_client: persistence.IEventStoreClient) -> None:
-    repository = persistence.GameRepository(client=event_store_client)
-    app = application.ConnectFourApp(game_repository=repository)
-
+def _play(
+    app: application.ConnectFourApp,
+    event_store_client: persistence.IEventStoreClient,
+) -> None:
     print("Welcome to a new game of Connect Four!")
-    match event_store_client:
-        case kurrentdbclient.KurrentDBClient():
-            store_type = "KurrentDB"
-        case helpers.InMemoryEventStoreClient():
-            store_type = "In-Memory Event Store"
-        case _:
-            raise RuntimeError("Unknown Event Store Client!")
-
+    store_type = _get_store_type(event_store_client)
     print(f"This version of the game uses {store_type} to store the game events.")
     print("========================================")
     print("Please enter the name of the players")
@@ -40,7 +37,7 @@ def _play(event_store_client: persistence.IEventStoreClient) -> None:
 
     game_state = app.get_game(game_id)
     while not game_state.is_finished:
-        print(presentation.generate_board_string(game_state.board))
+        print(presentation.generate_board_string(game_state.board, game_state.geometry))
         print(f"Next player: {game_state.next_player}")
         app.make_move(
             game_id=game_id, player=game_state.next_player, column=_get_move()
@@ -48,7 +45,7 @@ def _play(event_store_client: persistence.IEventStoreClient) -> None:
         game_state = app.get_game(game_id)
         print("\n\n")
 
-    print(presentation.generate_board_string(game_state.board))
+    print(presentation.generate_board_string(game_state.board, game_state.geometry))
 
     print("That move finished the game and...")
     match game_state.result:
@@ -73,7 +70,139 @@ def _get_move() -> enums.Column:
             print("Invalid column. Please try again.")
 
 
-def _get_client() -> persistence.IEventStoreClient:
+def _get_store_type(event_store_client: persistence.IEventStoreClient) -> str:
+    # The CLI only uses a pool for KurrentDB clients.
+    match event_store_client:
+        case helpers.InMemoryEventStoreClient():
+            return "In-Memory Event Store"
+        case persistence.EventStoreClientPool():
+            return "KurrentDB"
+        case persistence.SQLiteEventStoreClient():
+            return "SQLite"
+        case _:
+            raise RuntimeError("Unknown Event Store Client!")
+
+
+def _show(app: application.ConnectFourApp, game_id: str) -> None:
+    with warnings.catch_warnings():
+        from kurrentdbclient import exceptions as kurrentdb_exceptions
+
+    try:
+        game_state = app.get_game(game_id)
+    except kurrentdb_exceptions.NotFound:
+        raise SystemExit(f"There is no game with id {game_id!r}.") from None
+    print(f"{game_state.player_one} vs. {game_state.player_two}")
+    print(presentation.generate_board_string(game_state.board, game_state.geometry))
+    print(_describe_outcome(game_state))
+
+
+def _replay(
+    app: application.ConnectFourApp,
+    script: TextIO,
+    players: Sequence[str],
+    render: bool,
+) -> None:
+    player_one, player_two = players
+    for line_number, moves in _parse_script(script):
+        game_id = app.create_game(player_one=player_one, player_two=player_two)
+        for move_number, column in enumerate(moves, start=1):
+            player = player_one if move_number % 2 else player_two
+            try:
+                app.make_move(game_id=game_id, player=player, column=column)
+            except exceptions.InvalidMoveError as error:
+                raise SystemExit(
+                    f"Line {line_number}, move {move_number} ({column}): {error}"
+                ) from None
+        game_state = app.get_game(game_id)
+        print(f"{game_id}\t{len(moves)} moves\t{_describe_outcome(game_state)}")
+        if render:
+            print(
+                presentation.generate_board_string(
+                    game_state.board, game_state.geometry
+                )
+            )
+
+
+def _parse_script(script: TextIO) -> Iterator[tuple[int, list[enums.Column]]]:
+    """Parse a move script with one game per line.
+
+    Each line lists the columns of the moves of one game, such as
+    `DDCE` or `D D C E`. Empty lines and `#` comments are ignored.
+
+    :param script: the move script
+    :return: an iterator of (line number, moves)-pairs
+    """
+    for line_number, line in enumerate(script, start=1):
+        moves = "".join(line.partition("#")[0].split()).replace(",", "")
+        if not moves:
+            continue
+        try:
+            yield line_number, [enums.Column(move.upper()) for move in moves]
+        except ValueError:
+            raise SystemExit(
+                f"Line {line_number}: moves must be columns A-G, got {moves!r}."
+            ) from None
+
+
+def _benchmark(app: application.ConnectFourApp, games: int, seed: int) -> None:
+    rng = random.Random(seed)
+    latencies = []
+    started_at = time.perf_counter()
+    for _ in range(games):
+        game_id = app.create_game(player_one="Player 1", player_two="Player 2")
+        shadow_board, token = board.Board(), enums.Token.YELLOW
+        while shadow_board.get_result() is None:
+            column = rng.choice(
+                [c for c in enums.Column if shadow_board.has_room_in_column(c)]
+            )
+            player = "Player 1" if token is enums.Token.YELLOW else "Player 2"
+            move_started_at = time.perf_counter()
+            app.make_move(game_id=game_id, player=player, column=column)
+            latencies.append(time.perf_counter() - move_started_at)
+            shadow_board.add_move(column, token)
+            token = (
+                enums.Token.RED if token is enums.Token.YELLOW else enums.Token.YELLOW
+            )
+    elapsed = time.perf_counter() - started_at
+
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    print(f"Played {games:,} games ({len(latencies):,} moves) in {elapsed:.2f} s")
+    print(f"Throughput: {len(latencies) / elapsed:,.0f} moves/s")
+    print(
+        f"Move latency: p50 {percentiles[49] * 1000:.3f} ms,"
+        f" p99 {percentiles[98] * 1000:.3f} ms"
+    )
+
+
+def _spectate(
+    event_store_client: persistence.IEventStoreClient,
+    columns: int,
+    max_frames_per_second: float,
+) -> None:
+    dashboard = presentation.SpectatorDashboard(
+        feed=persistence.GameEventFeed(client=event_store_client),
+        columns=columns,
+        max_frames_per_second=max_frames_per_second,
+    )
+    try:
+        dashboard.run()
+    except KeyboardInterrupt:
+        pass
+
+
+def _describe_outcome(game_state: application.GameState) -> str:
+    match game_state.result:
+        case enums.GameResult.PLAYER_ONE_WON:
+            return f"{game_state.player_one} has won"
+        case enums.GameResult.PLAYER_TWO_WON:
+            return f"{game_state.player_two} has won"
+        case enums.GameResult.TIED:
+            return "it's a tie"
+        case _:
+            return f"in progress, next player: {game_state.next_player}"
+
+
+def _parse_args(argv: Sequence[str] | None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         prog="Connect Four CLI",
         description="Play Connect Four in the Terminal",
@@ -83,14 +212,129 @@ def _get_client() -> persistence.IEventStoreClient:
         action="store_true",
         help="Use KurrentDB instead of an in-memory Event Store",
     )
-    args = parser.parse_args()
-    if args.use_kurrentdb:
-        return kurrentdbclient.KurrentDBClient(uri=_CONNECTION_STRING)
+    parser.add_argument(
+        "--use-kurrentdb-standin",
+        action="store_true",
+        help="Use KurrentDB with a local stand-in server instead of a real one",
+    )
+    parser.add_argument(
+        "--sqlite",
+        metavar="PATH",
+        help="Store the game events in a SQLite database file",
+    )
+    parser.add_argument(
+        "--kurrentdb-uri",
+        default=_CONNECTION_STRING,
+        help=f"The URI of the KurrentDB server (default: {_CONNECTION_STRING})",
+    )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=4,
+        help="The maximum number of KurrentDB clients (default: 4)",
+    )
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("play", help="Play a game interactively (default)")
+    show = commands.add_parser("show", help="Render an existing game")
+    show.add_argument("game_id", help="The ID of the game")
+    replay = commands.add_parser(
+        "replay", help="Play games from a move script without prompts"
+    )
+    replay.add_argument(
+        "script",
+        nargs="?",
+        type=argparse.FileType("r", encoding="utf-8"),
+        default=sys.stdin,
+        help="A file with the moves of one game per line (default: stdin)",
+    )
+    replay.add_argument(
+        "--players",
+        nargs=2,
+        default=("Player 1", "Player 2"),
+        metavar=("PLAYER_ONE", "PLAYER_TWO"),
+        help="The names of the players",
+    )
+    replay.add_argument(
+        "--render", action="store_true", help="Render the board after each game"
+    )
+    bench = commands.add_parser(
+        "bench", help="Play random games and report throughput and latency"
+    )
+    bench.add_argument(
+        "--games", type=_positive_int, default=100, help="Number of games"
+    )
+    bench.add_argument("--seed", type=int, default=0, help="Seed for the moves")
+    spectate = commands.add_parser(
+        "spectate", help="Follow all live games in a grid until interrupted"
+    )
+    spectate.add_argument(
+        "--columns", type=int, default=4, help="Number of boards per row"
+    )
+    spectate.add_argument(
+        "--fps", type=float, default=10.0, help="Maximum number of frames per second"
+    )
+    return parser.parse_args(argv)
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {number}")
+    return number
+
+
+def _get_client(
+    args: argparse.Namespace, resources: contextlib.ExitStack
+) -> persistence.IEventStoreClient:
+    if args.use_kurrentdb or args.use_kurrentdb_standin:
+        # Only import kurrentdbclient (and with it gRPC) when it's used.
+        with warnings.catch_warnings():
+            import kurrentdbclient
+
+        uri = args.kurrentdb_uri
+        if args.use_kurrentdb_standin:
+            from connect_four_solutions.helpers import kurrentdb_standin
+
+            server = resources.enter_context(kurrentdb_standin.KurrentDBStandIn())
+            uri = server.uri
+        pool = persistence.EventStoreClientPool(
+            lambda: kurrentdbclient.KurrentDBClient(uri=uri),
+            size=args.pool_size,
+        )
+        resources.callback(pool.close)
+        return pool
+    elif args.sqlite is not None:
+        client = persistence.SQLiteEventStoreClient(args.sqlite)
+        resources.callback(client.close)
+        return client
     else:
         return helpers.InMemoryEventStoreClient()
 
 
+def main(argv: Sequence[str] | None = None) -> None:
+    """Run the Connect Four CLI.
+
+    :param argv: the command line arguments, defaults to `sys.argv`
+    """
+    args = _parse_args(argv)
+    with contextlib.ExitStack() as resources:
+        client = _get_client(args, resources)
+        app = application.ConnectFourApp(
+            game_repository=persistence.GameRepository(client=client)
+        )
+        match args.command:
+            case "show":
+                _show(app, args.game_id)
+            case "replay":
+                _replay(app, args.script, args.players, args.render)
+            case "bench":
+                _benchmark(app, args.games, args.seed)
+            case "spectate":
+                _spectate(client, args.columns, args.fps)
+            case _:
+                _play(app, client)
+
+
 if __name__ == "__main__":
     warnings.simplefilter("ignore")
-    client = _get_client()
-    _play(client)
+    main()
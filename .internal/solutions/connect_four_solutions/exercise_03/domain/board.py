@@ -1,23 +1,91 @@
-"""A board class that implements some of the game logic."""
+"""A board class that implements some of the game logic.
 
-import itertools
-from collections.abc import Iterator
-from typing import Any, Final, Iterable, TypeAlias
+The board isn't limited to the standard 6 rows by 7 columns of Connect
+Four: its `Geometry` sets the number of rows and columns and the number
+of connected tokens that wins the game. The lookup tables that depend
+on the geometry are generated once per geometry and cached.
+"""
+
+import functools
+import random
+from collections.abc import Callable, Iterable
+from typing import Final, TypeAlias
 
 import attrs
-import more_itertools
 from connect_four_solutions.exercise_03.domain import enums
 
 BoardState: TypeAlias = "dict[enums.Column, list[enums.Token]]"
 
 
+@attrs.define(frozen=True, cache_hash=True)
+class Geometry:
+    """The dimensions of a board and the length of a winning line.
+
+    The columns of a board are the first `columns` members of
+    `enums.Column`, which limits the width of a board to seven columns.
+    """
+
+    rows: int = 6
+    columns: int = 7
+    connect: int = 4
+
+    def __attrs_post_init__(self) -> None:
+        """Check that the geometry describes a playable board.
+
+        :raises ValueError: if the board has too many columns or if a
+          winning line doesn't fit on the board
+        """
+        if not 1 <= self.columns <= len(enums.Column):
+            raise ValueError(
+                f"A board has 1 to {len(enums.Column)} columns, not {self.columns}."
+            )
+        if self.rows < 1 or not 1 <= self.connect <= max(self.rows, self.columns):
+            raise ValueError(f"A line of {self.connect} doesn't fit on the board.")
+
+    @property
+    def column_labels(self) -> tuple[enums.Column, ...]:
+        """The columns of the board, from left to right."""
+        return tuple(enums.Column)[: self.columns]
+
+
+STANDARD: Final = Geometry()
+
+
 @attrs.define
 class Board:
     """A "Connect Four"-board."""
 
+    # The geometry and its tables are initialized first, as the initial
+    # state depends on them, but the geometry is a keyword-only argument.
+    _geometry: Geometry = attrs.field(default=STANDARD, kw_only=True)
+    _tables: "_Tables" = attrs.field(init=False, eq=False, repr=False)
     _state: BoardState = attrs.field(
-        factory=lambda: {c: [] for c in enums.Column},
+        default=attrs.Factory(
+            lambda self: {c: [] for c in self._tables.column_indices},
+            takes_self=True,
+        ),
     )
+    _hash: int = attrs.field(init=False, default=0, eq=False, repr=False)
+    _mirrored_hash: int = attrs.field(init=False, default=0, eq=False, repr=False)
+    # A bitboard per token; see `_Tables` for the layout.
+    _yellow_bits: int = attrs.field(init=False, default=0, eq=False, repr=False)
+    _red_bits: int = attrs.field(init=False, default=0, eq=False, repr=False)
+
+    @_tables.default
+    def _get_tables(self) -> "_Tables":
+        """Look up the tables for the geometry of the board."""
+        return _get_tables(self._geometry)
+
+    def __attrs_post_init__(self) -> None:
+        """Compute the position hashes and bitboards of the initial state."""
+        for column, tokens in self._state.items():
+            for row, token in enumerate(tokens):
+                self._toggle(column, row, token)
+
+    @property
+    def geometry(self) -> Geometry:
+        """The geometry of the board."""
+        return self._geometry
 
     def add_move(self, column: enums.Column, token: enums.Token) -> None:
         """Add a token to the specified column.
@@ -25,7 +93,53 @@ class Board:
         :param column: the receiving column
         :param token: the token to place in the column
         """
-        self._state[column].append(token)
+        tokens = self._state[column]
+        self._toggle(column, len(tokens), token)
+        tokens.append(token)
+
+    def add_moves(self, columns: Iterable[enums.Column]) -> None:
+        """Add the moves of a game, starting with a yellow token.
+
+        This is equivalent to calling `add_move` for each column with
+        alternating tokens, but faster for long sequences of moves.
+
+        :param columns: the receiving columns, in the order of the moves
+        :raises ValueError: if a column is full; the moves before it
+          are added
+        """
+        state, tables, rows = self._state, self._tables, self._geometry.rows
+        column_indices, column_height = tables.column_indices, tables.column_height
+        tokens = (enums.Token.YELLOW, enums.Token.RED)
+        bits = [self._yellow_bits, self._red_bits]
+        zobrist_hash, mirrored_hash = self._hash, self._mirrored_hash
+        try:
+            for move, column in enumerate(columns):
+                turn = move & 1
+                column_tokens = state[column]
+                row = len(column_tokens)
+                if row >= rows:
+                    raise ValueError(f"Move {move + 1}: column {column} is full.")
+                column_index = column_indices[column]
+                column_tokens.append(tokens[turn])
+                zobrist_hash ^= tables.zobrist_pairs[column_index][row][turn]
+                mirrored_hash ^= tables.mirrored_zobrist_pairs[column_index][row][turn]
+                bits[turn] |= 1 << (column_index * column_height + row)
+        finally:
+            self._yellow_bits, self._red_bits = bits
+            self._hash, self._mirrored_hash = zobrist_hash, mirrored_hash
+
+    def remove_move(self, column: enums.Column) -> enums.Token:
+        """Remove the top token from the specified column.
+
+        This is the inverse of `add_move`, which allows a search to try
+        out moves without copying the board.
+
+        :param column: the column to remove the top token from
+        :return: the token that was removed
+        """
+        token = self._state[column].pop()
+        self._toggle(column, len(self._state[column]), token)
+        return token
 
     def has_room_in_column(self, column: enums.Column) -> bool:
         """Return `True` if the column has the capacity for a token.
@@ -34,7 +148,7 @@ class Board:
         :return: True if the column has the capacity to receive a token,
           False otherwise
         """
-        return len(self._state[column]) < _NUMBER_OF_ROWS
+        return len(self._state[column]) < self._geometry.rows
 
     def get_result(self) -> enums.GameResult | None:
         """Get the result of a game.
@@ -57,96 +171,194 @@ class Board:
     @property
     def board_state(self) -> BoardState:
         """A deep copy of the board state."""
-        return attrs.asdict(self)["_state"]
+        return {column: list(tokens) for column, tokens in self._state.items()}
+
+    @property
+    def zobrist_hash(self) -> int:
+        """The 64-bit Zobrist hash of the tokens on the board.
+
+        The hash is updated incrementally for each move that's added to
+        the board, which makes it a cheap key for caching positions.
+        """
+        return self._hash
+
+    @property
+    def position_key(self) -> int:
+        """A 64-bit key for the position, normalized for mirroring.
+
+        A position and its mirror image (column A swapped with G, B
+        with F, and so on) are equivalent in Connect Four, so both get
+        the same key. The key equals `zobrist_hash` if the board is in
+        its canonical orientation.
+        """
+        return min(self._hash, self._mirrored_hash)
 
     # ------------------------------------------------------------------
     # Private methods that you don't have to pay attention to for this
     # workshop.
 
+    def _toggle(self, column: enums.Column, row: int, token: enums.Token) -> None:
+        """Toggle a token in the hashes and in the bitboard of its color."""
+        tables = self._tables
+        column_index = tables.column_indices[column]
+        yellow_key, red_key = tables.zobrist_pairs[column_index][row]
+        mirrored_yellow_key, mirrored_red_key = tables.mirrored_zobrist_pairs[
+            column_index
+        ][row]
+        bit = 1 << (column_index * tables.column_height + row)
+        # Comparing by identity avoids hashing the enum members.
+        if token is enums.Token.YELLOW:
+            self._hash ^= yellow_key
+            self._mirrored_hash ^= mirrored_yellow_key
+            self._yellow_bits ^= bit
+        else:
+            self._hash ^= red_key
+            self._mirrored_hash ^= mirrored_red_key
+            self._red_bits ^= bit
+
     def _get_winner(self) -> enums.Token | None:
         """The winning token color or None if there is no winner."""
-        sequences_to_check = [
-            *self._get_columns(),
-            *self._get_rows(),
-            *self._get_diagonals(),
-        ]
-        for token_sequence in itertools.chain(sequences_to_check):
-            if (winner := _get_winner(token_sequence)) is not None:
-                return winner
+        has_line = self._tables.has_line
+        if has_line(self._yellow_bits):
+            return enums.Token.YELLOW
+        if has_line(self._red_bits):
+            return enums.Token.RED
         return None
 
     def _check_if_board_is_filled(self) -> bool:
         """Whether the game ended in a tie."""
-        return not any(self.has_room_in_column(col) for col in enums.Column)
+        return self._yellow_bits | self._red_bits == self._tables.full_board
 
-    def _get_columns(self) -> Iterator[list[enums.Token | None]]:
-        """An iterator that yields columns.
 
-        To ensure a 6 rows by 7 columns board, the columns are padded
-        with `None`-values if a column isn't completed filed. This makes
-        transposing the board to rows and diagonals easier.
-        """
-        return (
-            list(more_itertools.padded(col, fillvalue=None, n=_NUMBER_OF_ROWS))
-            for col in self._state.values()
-        )
+def get_zobrist_hash(board_state: BoardState, geometry: Geometry = STANDARD) -> int:
+    """Compute the Zobrist hash of a board state.
+
+    This is the hash that `Board.zobrist_hash` keeps up to date, for
+    when only a copy of the board state is available.
+
+    :param board_state: the state of the board
+    :param geometry: the geometry of the board
+    :return: the 64-bit Zobrist hash of the tokens on the board
+    """
+    tables = _get_tables(geometry)
+    zobrist_hash = 0
+    yellow = enums.Token.YELLOW
+    for column, tokens in board_state.items():
+        column_table = tables.zobrist_pairs[tables.column_indices[column]]
+        for (yellow_key, red_key), token in zip(column_table, tokens):
+            # Comparing by identity avoids hashing the enum members.
+            zobrist_hash ^= yellow_key if token is yellow else red_key
+    return zobrist_hash
 
-    def _get_rows(self) -> Iterator[list[enums.Token | None]]:
-        """An iterator that yields columns."""
-        return (list(row) for row in more_itertools.transpose(self._get_columns()))
 
-    def _get_diagonals(self) -> Iterator[list[enums.Token | None]]:
-        """An iterator that yields diagonals."""
-        board = list(self._get_columns())
-        for diagonal in itertools.chain(_FORWARD_DIAGONALS, _BACKWARD_DIAGONALS):
-            yield [board[col][row] for col, row in diagonal]
+@attrs.define(frozen=True)
+class _Tables:
+    """The lookup tables for a geometry.
+
+    The bitboards use `rows + 1` bits per column, starting with the
+    bottom row of the leftmost column. The extra bit on top of each
+    column is always empty, so a line that's shifted over the edge of
+    a column never lines up with tokens in the next column.
+    """
+
+    column_indices: dict[enums.Column, int]
+    column_height: int
+    # The (yellow, red)-keys of each cell, indexed as [column][row]
+    zobrist_pairs: list[list[tuple[int, int]]]
+    mirrored_zobrist_pairs: list[list[tuple[int, int]]]
+    full_board: int
+    # Returns True if a bitboard contains a winning line
+    has_line: Callable[[int], bool]
+
+
+@functools.cache
+def _get_tables(geometry: Geometry) -> _Tables:
+    """Generate the lookup tables for a geometry."""
+    column_height = geometry.rows + 1
+    zobrist_pairs = [
+        [(keys[enums.Token.YELLOW], keys[enums.Token.RED]) for keys in column]
+        for column in _generate_zobrist_table(
+            seed=20250514, rows=geometry.rows, columns=geometry.columns
+        )
+    ]
+    full_column = (1 << geometry.rows) - 1
+    return _Tables(
+        column_indices={c: i for i, c in enumerate(geometry.column_labels)},
+        column_height=column_height,
+        zobrist_pairs=zobrist_pairs,
+        mirrored_zobrist_pairs=zobrist_pairs[::-1],
+        full_board=sum(
+            full_column << (column * column_height)
+            for column in range(geometry.columns)
+        ),
+        has_line=_shift_line_check(geometry),
+    )
 
 
-def _get_winner(tokens: Iterable[enums.Token | None]) -> enums.Token | None:
-    """Check the iterable with tokens for a winning sequence.
+def _shift_line_check(geometry: Geometry) -> Callable[[int], bool]:
+    """Check for a line by shifting the bitboard onto itself.
 
-    :param tokens: the sequence of tokens to check
-    :return: the winning token color if the iterable contains a winning
-      sequence of four connected tokens or None if the iterable does not
-      contain a winning subsequence.
+    For each direction, a bit that survives `connect - 1` shifted ANDs
+    is the first cell of a line of `connect` tokens. This needs a few
+    integer operations per direction, regardless of the size of the
+    board. Python's integers are unbounded, so this works for boards
+    that don't fit in a machine word too.
     """
-    for group in more_itertools.sliding_window(tokens, 4):
-        if group[0] is not None and _all_equal(group):
-            return group[0]
+    directions = (
+        1,  # vertical
+        geometry.rows + 1,  # horizontal
+        geometry.rows + 2,  # diagonal, up to the right
+        geometry.rows,  # diagonal, down to the right
+    )
+    shifts = tuple(
+        tuple(direction * step for step in range(1, geometry.connect))
+        for direction in directions
+    )
+
+    if geometry.connect == 4:
+        # Halving the remaining length with each step needs two shifts
+        # instead of three for the standard game.
+        def has_line(bits: int) -> bool:
+            for direction in directions:
+                pairs = bits & (bits >> direction)
+                if pairs & (pairs >> (2 * direction)):
+                    return True
+            return False
+
+        return has_line
+
+    def has_line(bits: int) -> bool:
+        if not bits:
+            return False
+        for direction_shifts in shifts:
+            line = bits
+            for shift in direction_shifts:
+                line &= bits >> shift
+                if not line:
+                    break
+            else:
+                return True
+        return False
+
+    return has_line
 
-    return None
 
+def _generate_zobrist_table(
+    seed: int, rows: int, columns: int
+) -> list[list[dict[enums.Token, int]]]:
+    """Generate a random 64-bit number for each (column, row, token).
 
-def _all_equal(iterable: Iterable[Any]) -> bool:
-    """Return True if all items in the iterable are equal.
+    The random number generator is seeded, so the table (and with it
+    every position key) is stable across processes. That's what makes
+    it safe to persist position keys.
 
-    :param iterable: the iterable to check
-    :return: True if all elements are equal to each other
+    :param seed: the seed for the random number generator
+    :param rows: the number of rows of the board
+    :param columns: the number of columns of the board
+    :return: the table, indexed as `table[column][row][token]`
     """
-    return all(a == b for a, b in more_itertools.sliding_window(iterable, 2))
-
-
-_NUMBER_OF_ROWS: Final = 6
-# These are hardcoded diagonals of the board to remove the need for an
-# algorithmic approach. Only diagonals that are long enough to contain
-# a winning sequence of tokens are included.
-#
-# As a sidenote, it is a nice puzzle to come up with a general solution
-# for yielding the diagonals of a "list of lists"-style matrix in pure
-# Python, but it's beyond the scope of this workshop :).
-_FORWARD_DIAGONALS = [
-    list(zip(range(0, 4), range(2, 6))),
-    list(zip(range(0, 5), range(1, 6))),
-    list(zip(range(0, 6), range(0, 6))),
-    list(zip(range(1, 7), range(0, 6))),
-    list(zip(range(2, 7), range(0, 5))),
-    list(zip(range(3, 7), range(0, 4))),
-]
-_BACKWARD_DIAGONALS = [
-    list(zip(range(0, 4), range(3, -1, -1))),
-    list(zip(range(0, 5), range(4, -1, -1))),
-    list(zip(range(0, 6), range(5, -1, -1))),
-    list(zip(range(1, 7), range(5, -1, -1))),
-    list(zip(range(2, 7), range(5, 0, -1))),
-    list(zip(range(3, 7), range(5, 1, -1))),
-]
+    rng = random.Random(seed)
+    return [
+        [{token: rng.getrandbits(64) for token in enums.Token} for _ in range(rows)]
+        for _ in range(columns)
+    ]
@@ -5,7 +5,7 @@ from __future__ import annotations
 from typing import TypeAlias
 
 import attrs
-from connect_four_solutions.exercise_03.domain import enums
+from connect_four_solutions.exercise_03.domain import board, enums
 
 # Add event types that you create to this TypeAlias.
 GameEvent: TypeAlias = "GameStarted | MoveMade | GameFinished"
@@ -13,18 +13,24 @@ GameEvent: TypeAlias = "GameStarted | MoveMade | GameFinished"
 
 @attrs.define(frozen=True)
 class GameStarted:
-    """A game has started."""
+    """A game has started on a board with the given geometry."""
 
     player_one: str
     player_two: str
+    geometry: board.Geometry = board.STANDARD
 
 
 @attrs.define(frozen=True)
 class MoveMade:
-    """A move has been made."""
+    """A move has been made.
+
+    The idempotency key of the command that made the move, if any, is
+    stored in the metadata of the event rather than in its data.
+    """
 
     player: str
     column: enums.Column
+    idempotency_key: str | None = None
 
 
 @attrs.define(frozen=True)
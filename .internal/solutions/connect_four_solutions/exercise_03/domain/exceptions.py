@@ -11,3 +11,7 @@ class GameAlreadyStartedError(ConnectFourError):
 
 class InvalidMoveError(ConnectFourError):
     """Raised when trying to make an invalid move."""
+
+
+class IdempotencyKeyReusedError(InvalidMoveError):
+    """Raised when an idempotency key is sent with a different move."""
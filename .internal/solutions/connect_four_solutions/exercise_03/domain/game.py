@@ -3,12 +3,13 @@
 from __future__ import annotations
 
 import uuid
-from typing import Self
+from typing import Final, Self
 
 import attrs
 from connect_four_solutions.exercise_03.domain import board, enums
 from connect_four_solutions.exercise_03.domain import events as events_
 from connect_four_solutions.exercise_03.domain import exceptions
+from connect_four_solutions.exercise_03.domain import record as record_
 
 
 @attrs.define
@@ -23,6 +24,10 @@ class Game:
     historical_events: tuple[events_.GameEvent, ...] = attrs.field(factory=tuple)
     uncommitted_events: list[events_.GameEvent] = attrs.field(factory=list)
     _board: board.Board = attrs.field(init=False, factory=board.Board)
+    # The player and column of the move with each idempotency key
+    _idempotency_keys: dict[str, tuple[str, enums.Column]] = attrs.field(
+        init=False, factory=dict, eq=False
+    )
 
     @classmethod
     def load_from_history(
@@ -43,25 +48,112 @@ class Game:
             game.apply(event)
         return game
 
-    def start_game(self, player_one: str, player_two: str) -> None:
+    @classmethod
+    def from_record(
+        cls, record: record_.GameRecord, game_id: str | None = None
+    ) -> Self:
+        """Restore a game from its compact record.
+
+        This is faster than `load_from_history`: the moves are put on
+        the board directly instead of being applied one event at a time,
+        and the result is only computed for the final position. The
+        historical events are recreated, but `MoveMade` events with the
+        same player and column are a single, immutable object. Records
+        are always played on the standard board.
+
+        Args:
+            record: The record of the game.
+            game_id: The ID of the game, or None for a new ID.
+
+        Raises:
+            InvalidMoveError: If the record contains a move that can't
+              be made.
+        """
+        players = (record.player_one, record.player_two)
+        game = cls(
+            **({} if game_id is None else {"id": game_id}),
+            player_one=players[0],
+            player_two=players[1],
+        )
+        columns = record.columns
+        board = game._board
+        try:
+            board.add_moves(columns)
+        except ValueError as error:
+            raise exceptions.InvalidMoveError(str(error)) from None
+
+        # The moves of each player are taken from every other position.
+        history: list[events_.GameEvent] = [events_.GameStarted(*players)]
+        history += columns
+        for turn, player in enumerate(players):
+            player_columns = columns[turn::2]
+            moves_made = {
+                column: events_.MoveMade(player, column)
+                for column in set(player_columns)
+            }
+            history[turn + 1 :: 2] = [moves_made[c] for c in player_columns]
+
+        if (result := board.get_result()) is not None:
+            # Lines can't be undone, so a game that was already finished
+            # before its last move still has a result without that move.
+            last_move = history[-1]
+            board.remove_move(last_move.column)
+            if board.get_result() is not None:
+                raise exceptions.InvalidMoveError(
+                    "The game must be ongoing to make a move."
+                )
+            board.add_move(last_move.column, _TOKENS[(len(history) - 2) & 1])
+            history.append(events_.GameFinished(result))
+            game.result = result
+        else:
+            game.next_player = players[(len(history) - 1) & 1]
+        game.historical_events = tuple(history)
+        return game
+
+    def start_game(
+        self,
+        player_one: str,
+        player_two: str,
+        geometry: board.Geometry = board.STANDARD,
+    ) -> None:
         """Start a game.
 
         :param player_one:
         :param player_two:
+        :param geometry: the geometry of the board to play on
         """
         if self.has_started:
             raise exceptions.GameAlreadyStartedError("The game has already started.")
 
-        game_started = events_.GameStarted(player_one, player_two)
+        game_started = events_.GameStarted(player_one, player_two, geometry)
         self._process_event(game_started)
 
-    def make_move(self, player: str, column: enums.Column) -> None:
+    def make_move(
+        self,
+        player: str,
+        column: enums.Column,
+        idempotency_key: str | None = None,
+    ) -> None:
         """Make a move in the game.
 
+        A move with the idempotency key of a move that was already made
+        is ignored, which makes it safe to retry a move.
+
         Args:
             player: The player that makes the move.
             column: The column the player drops a token in.
+            idempotency_key: An optional key that identifies the move.
+
+        Raises:
+            IdempotencyKeyReusedError: If the idempotency key belongs to
+              a move with another player or column.
         """
+        if idempotency_key is not None and idempotency_key in self._idempotency_keys:
+            if self._idempotency_keys[idempotency_key] != (player, column):
+                raise exceptions.IdempotencyKeyReusedError(
+                    "The idempotency key was used for another move."
+                )
+            return
         if not self.has_started:
             raise exceptions.InvalidMoveError(
                 "The game must be started before a move can be made."
@@ -77,7 +169,7 @@ class Game:
         if not self._board.has_room_in_column(column):
             raise exceptions.InvalidMoveError(f"Column must have room for a token.")
 
-        move_made = events_.MoveMade(player, column)
+        move_made = events_.MoveMade(player, column, idempotency_key)
         self._process_event(move_made)
         self._check_if_game_is_finished()
 
@@ -96,11 +188,19 @@ class Game:
         :raises ValueError: if the event is unknown
         """
         match event:
-            case events_.GameStarted(player_one=player_one, player_two=player_two):
+            case events_.GameStarted(
+                player_one=player_one, player_two=player_two, geometry=geometry
+            ):
+                if geometry != self._board.geometry:
+                    self._board = board.Board(geometry=geometry)
                 self.player_one = player_one
                 self.player_two = player_two
                 self.next_player = player_one
-            case events_.MoveMade(player=player, column=column):
+            case events_.MoveMade(
+                player=player, column=column, idempotency_key=idempotency_key
+            ):
+                if idempotency_key is not None:
+                    self._idempotency_keys[idempotency_key] = (player, column)
                 token = (
                     enums.Token.YELLOW if player == self.player_one else enums.Token.RED
                 )
@@ -139,6 +239,16 @@ class Game:
         """The current state of the board."""
         return self._board.board_state
 
+    @property
+    def geometry(self) -> board.Geometry:
+        """The geometry of the board."""
+        return self._board.geometry
+
+    @property
+    def position_key(self) -> int:
+        """The mirror-normalized position key of the board."""
+        return self._board.position_key
+
     def _process_event(self, event: events_.GameEvent) -> None:
         """Apply the event and add it to the list of events.
 
@@ -146,3 +256,6 @@ class Game:
         """
         self.apply(event)
         self.uncommitted_events.append(event)
+
+
+_TOKENS: Final = (enums.Token.YELLOW, enums.Token.RED)
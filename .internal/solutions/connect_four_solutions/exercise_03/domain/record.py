@@ -0,0 +1,167 @@
+"""A compact record of a game.
+
+A game is fully described by the names of its players and the columns
+of its moves; the other events can be derived from those. A
+`GameRecord` stores just that, with the moves as a string of column
+letters, like `"DDCEC"`. Records are immutable and hashable, so they
+can be used as cache keys.
+
+For storage and transmission, `to_bytes` packs a record into a binary
+format with one nibble per move:
+
+- the length of the UTF-8 encoded name of player one (1 byte) and the
+  name itself, followed by the same for player two;
+- the number of moves (1 byte);
+- the moves, two per byte, as the index of their column plus one. The
+  last byte is padded with a zero nibble if the number of moves is odd.
+
+Idempotency keys aren't part of a record, so they're lost in a round
+trip through a record. Records only describe games on the standard
+board of 6 rows by 7 columns.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from typing import Final, Self
+
+import attrs
+from connect_four_solutions.exercise_03.domain import board as board_
+from connect_four_solutions.exercise_03.domain import enums
+from connect_four_solutions.exercise_03.domain import events as events_
+
+
+class InvalidRecordError(ValueError):
+    """Raised when a record or its encoding is invalid."""
+
+
+@attrs.define(frozen=True)
+class GameRecord:
+    """The players and moves of a game."""
+
+    player_one: str
+    player_two: str
+    # The column letters of the moves, in the order they were made
+    moves: str = attrs.field(default="")
+
+    @moves.validator
+    def _check_moves(self, attribute: attrs.Attribute, moves: str) -> None:
+        """Check that every move is a column letter."""
+        if not _COLUMN_LETTERS.issuperset(moves):
+            raise InvalidRecordError(f"Moves must be columns A-G, got {moves!r}.")
+
+    @classmethod
+    def from_events(cls, game_events: Iterable[events_.GameEvent]) -> Self:
+        """Create the record of a game from its events.
+
+        :param game_events: the events of the game, starting with a
+          `GameStarted` event
+        :return: the record of the game
+        :raises InvalidRecordError: if the events don't start with a
+          `GameStarted` event, or if the game isn't played on the
+          standard board
+        """
+        game_events = iter(game_events)
+        match next(game_events, None):
+            case events_.GameStarted(
+                player_one=player_one, player_two=player_two, geometry=geometry
+            ):
+                if geometry != board_.STANDARD:
+                    raise InvalidRecordError(
+                        "Only games on the standard board have a record."
+                    )
+            case _:
+                raise InvalidRecordError("A game must start with a GameStarted event.")
+        moves = "".join(
+            event.column for event in game_events if isinstance(event, events_.MoveMade)
+        )
+        return cls(player_one=player_one, player_two=player_two, moves=moves)
+
+    @property
+    def columns(self) -> list[enums.Column]:
+        """The columns of the moves."""
+        return [_COLUMNS[move] for move in self.moves]
+
+    def to_events(self) -> list[events_.GameEvent]:
+        """Recreate the events of the game.
+
+        A `GameFinished` event is added if the moves finish the game.
+
+        :return: the events of the game
+        """
+        game_events: list[events_.GameEvent] = [
+            events_.GameStarted(self.player_one, self.player_two)
+        ]
+        board = board_.Board()
+        players = (self.player_one, self.player_two)
+        for index, column in enumerate(self.columns):
+            board.add_move(column, _TOKENS[index % 2])
+            game_events.append(events_.MoveMade(players[index % 2], column))
+        if (result := board.get_result()) is not None:
+            game_events.append(events_.GameFinished(result))
+        return game_events
+
+    def to_bytes(self) -> bytes:
+        """Pack the record into its binary format.
+
+        :return: the packed record
+        :raises InvalidRecordError: if a name is longer than 255 bytes
+          or the game has more than 255 moves
+        """
+        packed = bytearray()
+        for name in (self.player_one, self.player_two):
+            encoded = name.encode("utf-8")
+            if len(encoded) > 255:
+                raise InvalidRecordError(f"The name {name!r} is too long to pack.")
+            packed.append(len(encoded))
+            packed += encoded
+        if len(self.moves) > 255:
+            raise InvalidRecordError("A record can't pack more than 255 moves.")
+        packed.append(len(self.moves))
+        nibbles = [_NIBBLES[move] for move in self.moves]
+        if len(nibbles) % 2:
+            nibbles.append(0)
+        packed += bytes(high << 4 | low for high, low in zip(*[iter(nibbles)] * 2))
+        return bytes(packed)
+
+    @classmethod
+    def from_bytes(cls, packed: bytes) -> Self:
+        """Unpack a record from its binary format.
+
+        :param packed: the packed record
+        :return: the record
+        :raises InvalidRecordError: if the data isn't a packed record
+        """
+        try:
+            names = []
+            offset = 0
+            for _ in range(2):
+                length = packed[offset]
+                names.append(packed[offset + 1 : offset + 1 + length].decode("utf-8"))
+                offset += 1 + length
+            number_of_moves = packed[offset]
+            move_bytes = packed[offset + 1 :]
+        except (IndexError, UnicodeDecodeError) as error:
+            raise InvalidRecordError(f"Invalid packed record: {error}") from None
+        try:
+            moves = "".join(_PAIRS[byte] for byte in move_bytes)
+        except KeyError:
+            raise InvalidRecordError("The moves contain an invalid column.") from None
+        # Only the last byte may be padded, so each game has one packing.
+        if len(moves) != number_of_moves or not all(
+            byte & 0x0F for byte in move_bytes[:-1]
+        ):
+            raise InvalidRecordError("The number of moves doesn't match the data.")
+        return cls(player_one=names[0], player_two=names[1], moves=moves)
+
+
+_COLUMNS: Final = {column.value: column for column in enums.Column}
+_COLUMN_LETTERS: Final = frozenset(_COLUMNS)
+_TOKENS: Final = (enums.Token.YELLOW, enums.Token.RED)
+_NIBBLES: Final = {column.value: index for index, column in enumerate(enums.Column, 1)}
+# The column letters of each valid byte; a zero nibble is padding.
+_PAIRS: Final = {
+    high << 4 | low: high_letter + low_letter
+    for high_letter, high in _NIBBLES.items()
+    for low_letter, low in [*_NIBBLES.items(), ("", 0)]
+}
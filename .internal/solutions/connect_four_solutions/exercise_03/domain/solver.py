@@ -0,0 +1,183 @@
+"""A small, depth-limited solver for Connect Four positions.
+
+This solver isn't strong enough to solve Connect Four from the opening
+position, but it finds forced wins and losses within its search depth.
+Evaluations are shared across games through a position cache, such as
+an opening book.
+"""
+
+from __future__ import annotations
+
+import functools
+from typing import Final, Protocol
+
+import attrs
+from connect_four_solutions.exercise_03.domain import board as board_
+from connect_four_solutions.exercise_03.domain import enums
+
+
+@attrs.define(frozen=True)
+class PositionEvaluation:
+    """The evaluation of a position.
+
+    The `result` is the result of the game if a player can force a win
+    within `depth` moves, and None otherwise. The `best_move` is stored
+    relative to the canonical orientation of the position; see
+    `Board.position_key`.
+    """
+
+    result: enums.GameResult | None
+    best_move: enums.Column | None
+    depth: int
+
+
+class IPositionCache(Protocol):
+    """Interface for a cache of position evaluations."""
+
+    def get(self, position_key: int) -> PositionEvaluation | None:
+        """Get the evaluation of a position, if it's known.
+
+        :param position_key: the mirror-normalized key of the position
+        :return: the evaluation or None if the position is unknown
+        """
+
+    def put(self, position_key: int, evaluation: PositionEvaluation) -> None:
+        """Store the evaluation of a position.
+
+        :param position_key: the mirror-normalized key of the position
+        :param evaluation: the evaluation to store
+        """
+
+
+@attrs.define
+class Solver:
+    """A negamax solver that consults a position cache before searching."""
+
+    depth: int = 4
+    _cache: IPositionCache | None = None
+
+    def solve(self, board: board_.Board) -> PositionEvaluation:
+        """Evaluate the position on the board.
+
+        The board is used as a scratchpad during the search, but it's
+        restored to its original position before this method returns.
+
+        :param board: the board with the position to evaluate
+        :return: the evaluation of the position, with the best move in
+          the orientation of the board that was passed in
+        """
+        if (result := board.get_result()) is not None:
+            return PositionEvaluation(result=result, best_move=None, depth=0)
+
+        is_mirrored = board.zobrist_hash != board.position_key
+        if self._cache is not None:
+            cached = self._cache.get(board.position_key)
+            if cached is not None and (
+                cached.result is not None or cached.depth >= self.depth
+            ):
+                return _orient(cached, is_mirrored, board.geometry)
+
+        token = _get_next_token(board)
+        score, best_move = _negamax(
+            board, token, self.depth, _get_move_order(board.geometry)
+        )
+        evaluation = PositionEvaluation(
+            result=_score_to_result(score, token),
+            best_move=best_move,
+            depth=self.depth,
+        )
+        if self._cache is not None:
+            self._cache.put(
+                board.position_key,
+                _orient(evaluation, is_mirrored, board.geometry),
+            )
+        return evaluation
+
+
+def _negamax(
+    board: board_.Board,
+    token: enums.Token,
+    depth: int,
+    move_order: tuple[enums.Column, ...],
+) -> tuple[int, enums.Column | None]:
+    """Search the position from the perspective of `token`.
+
+    :return: a tuple of the score (1 for a win, -1 for a loss and 0 for
+      a draw or an unknown outcome) and the best move
+    """
+    best_score, best_move = -2, None
+    for column in move_order:
+        if not board.has_room_in_column(column):
+            continue
+        board.add_move(column, token)
+        try:
+            result = board.get_result()
+            if result is not None:
+                score = 0 if result is enums.GameResult.TIED else 1
+            elif depth <= 1:
+                score = 0
+            else:
+                score = -_negamax(board, _OPPONENT[token], depth - 1, move_order)[0]
+        finally:
+            board.remove_move(column)
+        if score > best_score:
+            best_score, best_move = score, column
+        if best_score == 1:
+            break
+    return best_score, best_move
+
+
+def _get_next_token(board: board_.Board) -> enums.Token:
+    """The token of the player who is to move next."""
+    number_of_tokens = sum(len(tokens) for tokens in board.board_state.values())
+    return enums.Token.YELLOW if number_of_tokens % 2 == 0 else enums.Token.RED
+
+
+def _score_to_result(score: int, token: enums.Token) -> enums.GameResult | None:
+    """Translate a negamax score into an absolute game result."""
+    if score == 0:
+        return None
+    winner = token if score == 1 else _OPPONENT[token]
+    return (
+        enums.GameResult.PLAYER_ONE_WON
+        if winner == enums.Token.YELLOW
+        else enums.GameResult.PLAYER_TWO_WON
+    )
+
+
+def _orient(
+    evaluation: PositionEvaluation, mirror: bool, geometry: board_.Geometry
+) -> PositionEvaluation:
+    """Mirror the best move of an evaluation if necessary."""
+    if not mirror or evaluation.best_move is None:
+        return evaluation
+    mirrored_columns = _get_mirrored_columns(geometry)
+    return attrs.evolve(evaluation, best_move=mirrored_columns[evaluation.best_move])
+
+
+@functools.cache
+def _get_move_order(geometry: board_.Geometry) -> tuple[enums.Column, ...]:
+    """Order the columns of a geometry from the center outwards.
+
+    Center columns take part in more winning lines, so searching them
+    first finds wins sooner.
+    """
+    labels = geometry.column_labels
+    return tuple(
+        sorted(labels, key=lambda c: abs(2 * labels.index(c) - (len(labels) - 1)))
+    )
+
+
+@functools.cache
+def _get_mirrored_columns(
+    geometry: board_.Geometry,
+) -> dict[enums.Column, enums.Column]:
+    """Map each column of a geometry to its mirror image."""
+    labels = geometry.column_labels
+    return dict(zip(labels, reversed(labels)))
+
+
+_OPPONENT: Final = {
+    enums.Token.YELLOW: enums.Token.RED,
+    enums.Token.RED: enums.Token.YELLOW,
+}
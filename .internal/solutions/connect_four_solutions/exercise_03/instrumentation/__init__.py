@@ -0,0 +1,29 @@
+from .instrumentation import (
+    DISABLED,
+    IInstrumentationSink,
+    Instrumentation,
+    Stage,
+)
+from .sinks import HistogramSink, LoggingSink, PrometheusExporter
+from .tracing import (
+    CollectedSpan,
+    InMemorySpanCollector,
+    ISpan,
+    ITracer,
+    TracingSink,
+)
+
+__all__ = [
+    "DISABLED",
+    "CollectedSpan",
+    "HistogramSink",
+    "IInstrumentationSink",
+    "ISpan",
+    "ITracer",
+    "InMemorySpanCollector",
+    "Instrumentation",
+    "LoggingSink",
+    "PrometheusExporter",
+    "Stage",
+    "TracingSink",
+]
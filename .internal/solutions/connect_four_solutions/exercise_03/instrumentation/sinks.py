@@ -0,0 +1,194 @@
+"""Sinks that consume the stages measured by `Instrumentation`."""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import os
+import pathlib
+import threading
+from typing import TYPE_CHECKING, Final
+
+import attrs
+from connect_four_solutions.exercise_03.instrumentation import instrumentation
+
+if TYPE_CHECKING:
+    import http.server
+
+# The default buckets of the Prometheus client libraries, extended with
+# a few smaller ones because most stages take well under a millisecond.
+DEFAULT_BUCKETS: Final = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)  # fmt: skip
+
+
+@attrs.define
+class Histogram:
+    """A histogram of durations with fixed bucket boundaries."""
+
+    buckets: tuple[float, ...]
+    bucket_counts: list[int] = attrs.field()
+    count: int = 0
+    sum: float = 0.0
+
+    @bucket_counts.default
+    def _bucket_counts_default(self) -> list[int]:
+        # One extra bucket for values above the largest boundary.
+        return [0] * (len(self.buckets) + 1)
+
+    def observe(self, value: float) -> None:
+        """Add a value to the histogram.
+
+        :param value: the value to add
+        """
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+
+@attrs.define
+class HistogramSink:
+    """Collect stage durations in histograms and total the counts.
+
+    This sink is safe to share between threads.
+    """
+
+    buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    histograms: dict[str, Histogram] = attrs.field(init=False, factory=dict)
+    counters: dict[tuple[str, str], int] = attrs.field(init=False, factory=dict)
+    _lock: threading.Lock = attrs.field(init=False, factory=threading.Lock)
+
+    def stage_started(self, stage: instrumentation.Stage) -> None:
+        """Nothing to do until the stage has finished."""
+
+    def stage_finished(self, stage: instrumentation.Stage) -> None:
+        """Record the duration and counts of the stage."""
+        with self._lock:
+            histogram = self.histograms.get(stage.name)
+            if histogram is None:
+                histogram = self.histograms[stage.name] = Histogram(self.buckets)
+            histogram.observe(stage.duration)
+            for name, value in stage.counts.items():
+                key = (stage.name, name)
+                self.counters[key] = self.counters.get(key, 0) + value
+
+    def snapshot(
+        self,
+    ) -> tuple[dict[str, Histogram], dict[tuple[str, str], int]]:
+        """Get a consistent copy of the histograms and counters."""
+        with self._lock:
+            histograms = {
+                name: attrs.evolve(histogram, bucket_counts=[*histogram.bucket_counts])
+                for name, histogram in self.histograms.items()
+            }
+            return histograms, dict(self.counters)
+
+
+@attrs.define
+class LoggingSink:
+    """Log every finished stage."""
+
+    _logger: logging.Logger = attrs.field(
+        factory=lambda: logging.getLogger("connect_four.instrumentation")
+    )
+    _level: int = logging.DEBUG
+
+    def stage_started(self, stage: instrumentation.Stage) -> None:
+        """Nothing to do until the stage has finished."""
+
+    def stage_finished(self, stage: instrumentation.Stage) -> None:
+        """Log the duration, counts and attributes of the stage."""
+        if not self._logger.isEnabledFor(self._level):
+            return
+        self._logger.log(
+            self._level,
+            "%s took %.3f ms %s %s",
+            stage.name,
+            stage.duration * 1000,
+            stage.counts,
+            stage.attributes,
+        )
+
+
+@attrs.define
+class PrometheusExporter:
+    """Expose the data of a `HistogramSink` in the Prometheus text format.
+
+    The metrics can be written to a file, for instance for the textfile
+    collector of the node exporter, or served over HTTP.
+    """
+
+    _sink: HistogramSink
+    _prefix: str = "connect_four"
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        histograms, counters = self._sink.snapshot()
+
+        metric = f"{self._prefix}_stage_duration_seconds"
+        lines = [
+            f"# HELP {metric} Duration of instrumented stages.",
+            f"# TYPE {metric} histogram",
+        ]
+        for stage_name, histogram in sorted(histograms.items()):
+            cumulative = 0
+            boundaries = [*map(_format_float, histogram.buckets), "+Inf"]
+            for boundary, bucket_count in zip(boundaries, histogram.bucket_counts):
+                cumulative += bucket_count
+                labels = f'stage="{stage_name}",le="{boundary}"'
+                lines.append(f"{metric}_bucket{{{labels}}} {cumulative}")
+            lines.append(f'{metric}_sum{{stage="{stage_name}"}} {histogram.sum!r}')
+            lines.append(f'{metric}_count{{stage="{stage_name}"}} {histogram.count}')
+
+        for counter_name in sorted({name for _, name in counters}):
+            metric = f"{self._prefix}_{counter_name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for (stage_name, name), value in sorted(counters.items()):
+                if name == counter_name:
+                    lines.append(f'{metric}{{stage="{stage_name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: pathlib.Path | str) -> None:
+        """Atomically write the metrics to a file.
+
+        :param path: the path of the file
+        """
+        path = pathlib.Path(path)
+        temporary_path = path.with_name(path.name + ".tmp")
+        temporary_path.write_text(self.render(), encoding="utf-8")
+        os.replace(temporary_path, path)
+
+    def serve(self, host: str = "127.0.0.1", port: int = 0) -> http.server.HTTPServer:
+        """Serve the metrics over HTTP from a background thread.
+
+        :param host: the host to bind to
+        :param port: the port to bind to; 0 picks a free port
+        :return: the running server; call `shutdown` to stop it
+        """
+        # Imported here, because the HTTP server pulls in a lot of modules
+        # that most users of the instrumentation don't need.
+        import http.server
+
+        exporter = self
+
+        class _Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                body = exporter.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: object) -> None:
+                """Don't log every scrape to stderr."""
+
+        server = http.server.ThreadingHTTPServer((host, port), _Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def _format_float(value: float) -> str:
+    """Format a bucket boundary like the Prometheus client libraries."""
+    return repr(float(value))
@@ -0,0 +1,137 @@
+"""Emit the measured stages as tracing spans.
+
+`TracingSink` turns every stage into a span of a tracer with the same
+API as an OpenTelemetry tracer, so the stages of a command show up as
+nested spans: application command → repository get → client read →
+replay → repository add → client append.
+
+A stage that exits with an exception ends its span with that exception,
+so an OpenTelemetry span records it and gets an error status.
+
+OpenTelemetry itself is optional. Pass in a tracer from
+`opentelemetry.trace.get_tracer(...)` to export the spans, or use the
+`InMemorySpanCollector` to inspect them in-process.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import threading
+import time
+from collections.abc import Iterator
+from typing import Any, ContextManager, Protocol
+
+import attrs
+from connect_four_solutions.exercise_03.instrumentation import instrumentation
+
+
+class ISpan(Protocol):
+    """The part of the OpenTelemetry `Span` API used by the sink."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Set an attribute on the span."""
+
+
+class ITracer(Protocol):
+    """The part of the OpenTelemetry `Tracer` API used by the sink."""
+
+    def start_as_current_span(self, name: str) -> ContextManager[ISpan]:
+        """Start a span as a child of the current span.
+
+        :param name: the name of the span
+        :return: a context manager that makes the span current
+        """
+
+
+@attrs.define
+class TracingSink:
+    """Emit every measured stage as a span."""
+
+    _tracer: ITracer
+    _attribute_prefix: str = "connect_four."
+    _open_spans: dict[int, ContextManager[ISpan]] = attrs.field(
+        init=False, factory=dict
+    )
+    _spans: dict[int, ISpan] = attrs.field(init=False, factory=dict)
+
+    def stage_started(self, stage: instrumentation.Stage) -> None:
+        """Start a span for the stage as a child of the current span."""
+        span_context = self._tracer.start_as_current_span(stage.name)
+        self._spans[id(stage)] = span_context.__enter__()
+        self._open_spans[id(stage)] = span_context
+
+    def stage_finished(self, stage: instrumentation.Stage) -> None:
+        """Describe the span with the stage details and end it."""
+        span = self._spans.pop(id(stage))
+        span_context = self._open_spans.pop(id(stage))
+        for name, value in {**stage.attributes, **stage.counts}.items():
+            span.set_attribute(self._attribute_prefix + name, value)
+        if (error := stage.error) is None:
+            span_context.__exit__(None, None, None)
+        else:
+            span_context.__exit__(type(error), error, error.__traceback__)
+
+
+@attrs.define
+class CollectedSpan:
+    """A span that was recorded by the `InMemorySpanCollector`."""
+
+    name: str
+    parent: CollectedSpan | None
+    started_at: float
+    ended_at: float | None = None
+    attributes: dict[str, Any] = attrs.field(factory=dict)
+    # "ERROR" if the span ended with an exception, like OpenTelemetry
+    status: str = "UNSET"
+    exception: BaseException | None = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Set an attribute on the span."""
+        self.attributes[key] = value
+
+
+@attrs.define
+class InMemorySpanCollector:
+    """A tracer that keeps its spans in memory, for tests and debugging.
+
+    Spans are nested per thread (and per asyncio task), just like the
+    spans of an OpenTelemetry tracer.
+    """
+
+    spans: list[CollectedSpan] = attrs.field(init=False, factory=list)
+    _current: contextvars.ContextVar[CollectedSpan | None] = attrs.field(
+        init=False,
+        factory=lambda: contextvars.ContextVar("current_span", default=None),
+    )
+    _lock: threading.Lock = attrs.field(init=False, factory=threading.Lock)
+
+    @contextlib.contextmanager
+    def start_as_current_span(self, name: str) -> Iterator[CollectedSpan]:
+        """Start a span as a child of the current span.
+
+        :param name: the name of the span
+        :return: a context manager that makes the span current
+        """
+        span = CollectedSpan(
+            name=name, parent=self._current.get(), started_at=time.perf_counter()
+        )
+        token = self._current.set(span)
+        try:
+            yield span
+        except BaseException as error:
+            span.status, span.exception = "ERROR", error
+            raise
+        finally:
+            span.ended_at = time.perf_counter()
+            self._current.reset(token)
+            with self._lock:
+                self.spans.append(span)
+
+    def children(self, span: CollectedSpan) -> list[CollectedSpan]:
+        """Get the direct children of a span, in the order they ended.
+
+        :param span: the parent span
+        :return: the child spans
+        """
+        return [child for child in self.spans if child.parent is span]
@@ -1,3 +1,43 @@
-from .game_repository import GameRepository, IEventStoreClient
+from .archive import ArchiveSummary, GameArchiver
+from .client_pool import DeadlineExceededError, EventStoreClientPool, PoolTimeoutError
+from .feed import GameEventFeed
+from .game_repository import GameRepository, IEventStoreClient, LazyGameEvent
+from .migration import (
+    MigrationSummary,
+    SchemaMigrator,
+    get_game_position,
+    is_migrated,
+)
+from .opening_book import InvalidOpeningBookError, OpeningBook
+from .schemas import UPCASTERS, UnknownSchemaVersionError, UpcasterRegistry
+from .sharding import RebalanceSummary, ShardedEventStoreClient, ShardedPosition
+from .sqlite_client import SQLiteEventStoreClient
+from .unit_of_work import StreamCommit, UnitOfWork, UnitOfWorkError
 
-__all__ = ["GameRepository", "IEventStoreClient"]
+__all__ = [
+    "ArchiveSummary",
+    "DeadlineExceededError",
+    "EventStoreClientPool",
+    "GameArchiver",
+    "GameEventFeed",
+    "GameRepository",
+    "IEventStoreClient",
+    "InvalidOpeningBookError",
+    "LazyGameEvent",
+    "MigrationSummary",
+    "OpeningBook",
+    "PoolTimeoutError",
+    "RebalanceSummary",
+    "SQLiteEventStoreClient",
+    "SchemaMigrator",
+    "ShardedEventStoreClient",
+    "ShardedPosition",
+    "StreamCommit",
+    "UPCASTERS",
+    "UnitOfWork",
+    "UnitOfWorkError",
+    "UnknownSchemaVersionError",
+    "UpcasterRegistry",
+    "get_game_position",
+    "is_migrated",
+]
@@ -0,0 +1,155 @@
+"""Compact the streams of finished games.
+
+Once a `GameFinished` event is written, the stream of a game never
+changes again, but every read of the game still decodes all of its
+events. The `GameArchiver` compacts the stream of each finished game:
+
+1. A single `GameArchived` event with the record of the game and its
+   result is appended to the stream. The append expects the stream to
+   end with the `GameFinished` event, so a stream is archived once.
+2. The stream is truncated before the `GameArchived` event by setting
+   the `$tb` ("truncate before") stream metadata, like KurrentDB's
+   `set_stream_metadata` does: a `$metadata` event is appended to the
+   `$$game-<id>` metadata stream.
+
+After that, reading the stream returns the `GameArchived` event only,
+and the `GameRepository` restores the game with `Game.from_record`. If
+the archiver stops between the two steps, the repository still only
+decodes the `GameArchived` event; archiving the game again finishes the
+truncation.
+
+KurrentDB keeps truncated events until the next scavenge, so reading
+all events still returns them until then. Consumers of all events, like
+the `GameEventFeed` and the `ColumnarExporter`, recreate the events
+that they didn't read from the `GameArchived` event.
+
+The idempotency keys of the moves aren't part of a record, so they're
+lost once a game is archived. Games on other boards than the standard
+board don't have a record and aren't archived.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, Final
+
+import attrs
+from connect_four_solutions.exercise_03.domain import board, events, record
+from connect_four_solutions.exercise_03.persistence import game_repository, schemas
+from connect_four_solutions.helpers.lazy_import import lazy_import
+
+if TYPE_CHECKING:
+    import kurrentdbclient
+else:
+    kurrentdbclient = lazy_import("kurrentdbclient")
+
+
+@attrs.frozen
+class ArchiveSummary:
+    """The result of an archival run."""
+
+    games_archived: int
+    events_compacted: int
+
+
+@attrs.define
+class GameArchiver:
+    """An archival job for the streams of finished games.
+
+    Each call to `run` archives the games that finished since the
+    previous call, by following the `GameFinished` events in commit
+    order, like the `GameEventFeed` follows all game events.
+    """
+
+    _client: game_repository.IEventStoreClient
+    _commit_position: int | None = None
+    _batch_size: int = 1000
+    _upcasters: schemas.UpcasterRegistry = schemas.UPCASTERS
+
+    def run(self) -> ArchiveSummary:
+        """Archive the games that finished since the previous run.
+
+        :return: a summary of this run
+        """
+        games_archived, events_compacted = 0, 0
+        while True:
+            last_position = self._commit_position
+            finished_events = list(
+                self._client.read_all(
+                    commit_position=last_position,
+                    filter_include=("GameFinished",),
+                    limit=self._batch_size + (last_position is not None),
+                )
+            )
+            new_events = [
+                event
+                for event in finished_events
+                if last_position is None or event.commit_position > last_position
+            ]
+            if not new_events:
+                return ArchiveSummary(games_archived, events_compacted)
+            for event in new_events:
+                if event.stream_name.startswith(_GAME_STREAM_PREFIX):
+                    game_id = event.stream_name.removeprefix(_GAME_STREAM_PREFIX)
+                    compacted = self.archive(game_id)
+                    games_archived += compacted > 0
+                    events_compacted += compacted
+                self._commit_position = event.commit_position
+
+    def archive(self, game_id: str) -> int:
+        """Archive a single game, if it's finished.
+
+        :param game_id: the ID of the game
+        :return: the number of events that were compacted, which is 0
+          if the game isn't finished, was archived before or isn't
+          played on the standard board
+        :raises kurrentdbclient.exceptions.WrongCurrentVersion: if an
+          event was appended to the stream while it was being archived
+        """
+        stream_name = f"{_GAME_STREAM_PREFIX}{game_id}"
+        recorded_events = self._client.get_stream(stream_name)
+        last_event = recorded_events[-1]
+        if last_event.type == game_repository.ARCHIVE_EVENT_TYPE:
+            if len(recorded_events) > 1:
+                truncate_before(self._client, stream_name, last_event.stream_position)
+            return 0
+        if last_event.type != "GameFinished":
+            return 0
+
+        game_events = [
+            game_repository.map_eventstore_event_to_domain_event(event, self._upcasters)
+            for event in recorded_events
+        ]
+        match game_events[0]:
+            case events.GameStarted(geometry=geometry) if geometry != board.STANDARD:
+                # Only games on the standard board have a record.
+                return 0
+        archive_event = game_repository.map_record_to_eventstore_event(
+            record.GameRecord.from_events(game_events),
+            game_events[-1].result,
+            self._upcasters,
+        )
+        self._client.append_to_stream(
+            stream_name,
+            current_version=last_event.stream_position,
+            events=archive_event,
+        )
+        truncate_before(self._client, stream_name, last_event.stream_position + 1)
+        return len(recorded_events)
+
+
+def truncate_before(
+    client: game_repository.IEventStoreClient, stream_name: str, stream_position: int
+) -> None:
+    """Hide the events of a stream before a position from reads."""
+    client.append_to_stream(
+        f"$${stream_name}",
+        current_version=kurrentdbclient.StreamState.ANY,
+        events=kurrentdbclient.NewEvent(
+            type="$metadata",
+            data=json.dumps({"$tb": stream_position}).encode("utf-8"),
+        ),
+    )
+
+
+_GAME_STREAM_PREFIX: Final = "game-"
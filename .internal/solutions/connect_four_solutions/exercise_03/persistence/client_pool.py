@@ -0,0 +1,280 @@
+"""A pool of event store clients for multi-threaded services.
+
+The pool implements the `IEventStoreClient` interface itself, so a
+`GameRepository` can use a pool without knowing it. Each call borrows
+a client from the pool for the duration of the call, which means that
+up to `size` calls are made concurrently.
+
+Clients are created on demand by a factory and checked before they're
+borrowed if they've been idle for a while or if their previous call
+failed. Clients that fail the check are replaced.
+
+Calls can be bounded in time in two ways:
+
+- A per-call timeout, which is passed on to the methods of clients that
+  accept a `timeout` argument, like those of the KurrentDBClient.
+- A deadline that applies to all calls made within a `with
+  pool.deadline(...)` block, including the time spent waiting for a
+  client. Each call gets the time that's left as its timeout.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import inspect
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from typing import TYPE_CHECKING, Any, Final
+
+import attrs
+from connect_four_solutions.exercise_03.persistence import game_repository
+
+if TYPE_CHECKING:
+    import kurrentdbclient
+
+
+class PoolTimeoutError(TimeoutError):
+    """Raised when no client became available in time."""
+
+
+class DeadlineExceededError(TimeoutError):
+    """Raised when a call is made after its deadline has passed."""
+
+
+def ping(client: game_repository.IEventStoreClient) -> bool:
+    """Check that a client can read from the event store.
+
+    :param client: the client to check
+    :return: True if the client is healthy, False otherwise
+    """
+    try:
+        next(iter(client.read_all(limit=1)), None)
+    except Exception:
+        return False
+    return True
+
+
+@attrs.define
+class _PooledClient:
+    """A client in the pool with its bookkeeping."""
+
+    client: game_repository.IEventStoreClient
+    # The names of the methods of the client with a `timeout` argument
+    methods_with_timeout: frozenset[str]
+    checked_at: float
+    needs_check: bool = False
+
+
+@attrs.define
+class EventStoreClientPool:
+    """A thread-safe pool of event store clients."""
+
+    _client_factory: Callable[[], game_repository.IEventStoreClient]
+    _size: int = 4
+    _acquire_timeout: float | None = 5.0
+    _call_timeout: float | None = None
+    _health_check: Callable[[game_repository.IEventStoreClient], bool] = ping
+    _health_check_interval: float = 30.0
+    _clock: Callable[[], float] = time.monotonic
+    _idle: queue.LifoQueue[_PooledClient] = attrs.field(
+        init=False, factory=queue.LifoQueue
+    )
+    _created: int = attrs.field(init=False, default=0)
+    _lock: threading.Lock = attrs.field(init=False, factory=threading.Lock)
+    _deadline: contextvars.ContextVar[float | None] = attrs.field(
+        init=False, factory=lambda: contextvars.ContextVar("deadline", default=None)
+    )
+
+    def append_to_stream(
+        self,
+        /,
+        stream_name: str,
+        *,
+        current_version: int | kurrentdbclient.StreamState,
+        events: kurrentdbclient.NewEvent | Iterable[kurrentdbclient.NewEvent],
+    ) -> int:
+        """Append new events to a stream with a client from the pool.
+
+        See `IEventStoreClient.append_to_stream`.
+        """
+        with self._borrow("append_to_stream") as (client, timeout):
+            return client.append_to_stream(
+                stream_name, current_version=current_version, events=events, **timeout
+            )
+
+    def get_stream(self, stream_name: str) -> Sequence[kurrentdbclient.RecordedEvent]:
+        """Get events from a stream with a client from the pool.
+
+        See `IEventStoreClient.get_stream`.
+        """
+        with self._borrow("get_stream") as (client, timeout):
+            return client.get_stream(stream_name, **timeout)
+
+    def read_all(
+        self,
+        *,
+        commit_position: int | None = None,
+        filter_include: Sequence[str] = (),
+        filter_by_stream_name: bool = False,
+        limit: int = 2**63 - 1,
+    ) -> Iterator[kurrentdbclient.RecordedEvent]:
+        """Read events from all streams with a client from the pool.
+
+        The client is only returned to the pool once the iterator is
+        exhausted or closed, so don't keep partially consumed iterators
+        around. See `IEventStoreClient.read_all`.
+        """
+        with self._borrow("read_all") as (client, timeout):
+            yield from client.read_all(
+                commit_position=commit_position,
+                filter_include=filter_include,
+                filter_by_stream_name=filter_by_stream_name,
+                limit=limit,
+                **timeout,
+            )
+
+    @contextlib.contextmanager
+    def deadline(self, seconds: float) -> Iterator[None]:
+        """Bound the calls made within the block by a deadline.
+
+        A nested deadline can only shorten the deadline of an outer
+        block, never extend it.
+
+        :param seconds: the number of seconds from now
+        """
+        deadline = self._clock() + seconds
+        if (outer := self._deadline.get()) is not None:
+            deadline = min(deadline, outer)
+        token = self._deadline.set(deadline)
+        try:
+            yield
+        finally:
+            self._deadline.reset(token)
+
+    def close(self) -> None:
+        """Close the idle clients in the pool, if they can be closed."""
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(pooled)
+            with self._lock:
+                self._created -= 1
+
+    @contextlib.contextmanager
+    def _borrow(
+        self, method: str
+    ) -> Iterator[tuple[game_repository.IEventStoreClient, dict[str, Any]]]:
+        """Borrow a client and get the keyword arguments for its timeout.
+
+        :param method: the name of the method that will be called
+        """
+        pooled = self._acquire()
+        try:
+            timeout = self._get_timeout()
+        except DeadlineExceededError:
+            self._idle.put(pooled)
+            raise
+
+        try:
+            yield pooled.client, (
+                {"timeout": timeout}
+                if method in pooled.methods_with_timeout and timeout is not None
+                else {}
+            )
+        except Exception:
+            # The failure may be unrelated to the client, but checking
+            # it before its next use is cheap.
+            pooled.needs_check = True
+            raise
+        finally:
+            self._idle.put(pooled)
+
+    def _acquire(self) -> _PooledClient:
+        """Take an idle client, create a new one or wait for one."""
+        try:
+            pooled = self._idle.get_nowait()
+        except queue.Empty:
+            pooled = self._create() or self._wait_for_client()
+
+        if pooled.needs_check or (
+            self._clock() - pooled.checked_at >= self._health_check_interval
+        ):
+            try:
+                healthy = self._health_check(pooled.client)
+            except Exception:
+                # A check that raises counts as failed, so the client is
+                # replaced instead of taking up its place in the pool.
+                healthy = False
+            if not healthy:
+                self._discard(pooled)
+                with self._lock:
+                    self._created -= 1
+                pooled = self._create() or self._wait_for_client()
+            pooled.needs_check, pooled.checked_at = False, self._clock()
+        return pooled
+
+    def _create(self) -> _PooledClient | None:
+        """Create a new client, unless the pool is at its size."""
+        with self._lock:
+            if self._created >= self._size:
+                return None
+            self._created += 1
+        try:
+            client = self._client_factory()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+        return _PooledClient(
+            client=client,
+            methods_with_timeout=frozenset(
+                method
+                for method in _CLIENT_METHODS
+                if "timeout" in inspect.signature(getattr(client, method)).parameters
+            ),
+            checked_at=self._clock(),
+        )
+
+    def _wait_for_client(self) -> _PooledClient:
+        """Wait until another thread returns a client to the pool."""
+        timeout = self._acquire_timeout
+        if (remaining := self._get_remaining_time()) is not None:
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise PoolTimeoutError(
+                f"No client became available within {timeout:.3f}s."
+            ) from None
+
+    def _get_timeout(self) -> float | None:
+        """The timeout for a call, which is at most the remaining time."""
+        remaining = self._get_remaining_time()
+        if remaining is None:
+            return self._call_timeout
+        if self._call_timeout is None:
+            return remaining
+        return min(self._call_timeout, remaining)
+
+    def _get_remaining_time(self) -> float | None:
+        """The time left until the deadline, if there is one."""
+        if (deadline := self._deadline.get()) is None:
+            return None
+        remaining = deadline - self._clock()
+        if remaining <= 0:
+            raise DeadlineExceededError("The deadline has passed.")
+        return remaining
+
+    @staticmethod
+    def _discard(pooled: _PooledClient) -> None:
+        """Close a client that's removed from the pool."""
+        if (close := getattr(pooled.client, "close", None)) is not None:
+            close()
+
+
+_CLIENT_METHODS: Final = ("append_to_stream", "get_stream", "read_all")
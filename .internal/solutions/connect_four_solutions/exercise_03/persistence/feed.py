@@ -0,0 +1,96 @@
+"""Follow the events of all games as they are appended."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Final
+
+import attrs
+from connect_four_solutions.exercise_03.domain import events as domain_events
+from connect_four_solutions.exercise_03.persistence import (
+    game_repository,
+    migration,
+    schemas,
+)
+
+if TYPE_CHECKING:
+    import kurrentdbclient
+
+
+@attrs.define
+class GameEventFeed:
+    """A tail-follow over the game streams in an event store.
+
+    Each call to `poll` reads the events that were committed to any
+    `game-*` stream since the previous call, in commit order. This
+    replaces polling the state of every game individually: a spectator
+    only needs to read the events that were appended.
+
+    The events of an archived game are recreated from its record if the
+    feed didn't read them before they were deleted, so a feed that
+    starts after a game was archived still reads the whole game. In the
+    same way, the events that the `SchemaMigrator` rewrote are only read
+    if the originals weren't.
+    """
+
+    _client: game_repository.IEventStoreClient
+    _commit_position: int | None = None
+    _batch_size: int = 1000
+    _upcasters: schemas.UpcasterRegistry = schemas.UPCASTERS
+    # The number of events that were read of each game, by stream name
+    _game_positions: dict[str, int] = attrs.field(init=False, factory=dict)
+
+    def poll(self) -> list[tuple[str, domain_events.GameEvent]]:
+        """Read the next batch of game events.
+
+        :return: a list of (game ID, domain event)-pairs, which is empty
+          if no events were appended since the previous call
+        """
+        # Reading from a commit position is inclusive, so the last event
+        # of the previous batch is read again and skipped.
+        last_position = self._commit_position
+        recorded_events = self._client.read_all(
+            commit_position=last_position,
+            filter_include=(_GAME_STREAM_PATTERN,),
+            filter_by_stream_name=True,
+            limit=self._batch_size + (last_position is not None),
+        )
+        game_events = []
+        for event in recorded_events:
+            if last_position is not None and event.commit_position <= last_position:
+                continue
+            self._commit_position = event.commit_position
+            game_id = event.stream_name.removeprefix(_GAME_STREAM_PREFIX)
+            game_events.extend((game_id, e) for e in self._read_new_events(event))
+        return game_events
+
+    def _read_new_events(
+        self, event: kurrentdbclient.RecordedEvent
+    ) -> list[domain_events.GameEvent]:
+        """Get the events of a game in a recorded event that weren't read.
+
+        An archived game holds all events of the game and a migrated
+        event is a rewrite of an event of the game, so only the events
+        after the events that were read of the game are new.
+        """
+        read_events = self._game_positions.get(event.stream_name, 0)
+        position = migration.get_game_position(event)
+        if event.type == game_repository.ARCHIVE_EVENT_TYPE:
+            game_events = game_repository.map_eventstore_event_to_record(
+                event, self._upcasters
+            ).to_events()
+        elif position < read_events:
+            return []
+        else:
+            game_events = [
+                game_repository.map_eventstore_event_to_domain_event(
+                    event, self._upcasters
+                )
+            ]
+        self._game_positions[event.stream_name] = max(
+            read_events, position + len(game_events)
+        )
+        return game_events[max(read_events - position, 0) :]
+
+
+_GAME_STREAM_PREFIX: Final = "game-"
+_GAME_STREAM_PATTERN: Final = f"{_GAME_STREAM_PREFIX}.*"
@@ -2,14 +2,27 @@
 
 from __future__ import annotations
 
+import concurrent.futures
+import functools
 import json
-from typing import Iterable, Protocol, Sequence
+from typing import TYPE_CHECKING, Any, Final, Iterable, Protocol, Self, Sequence
 
 import attrs
-import kurrentdbclient
-from connect_four_solutions.exercise_03.domain import enums
+from connect_four_solutions.exercise_03.domain import board, enums
 from connect_four_solutions.exercise_03.domain import events as domain_events
+from connect_four_solutions.exercise_03.domain import exceptions
 from connect_four_solutions.exercise_03.domain import game as game_
+from connect_four_solutions.exercise_03.domain import record
+from connect_four_solutions.exercise_03.instrumentation import instrumentation
+from connect_four_solutions.exercise_03.persistence import schemas
+from connect_four_solutions.helpers.lazy_import import lazy_import
+
+if TYPE_CHECKING:
+    import kurrentdbclient
+else:
+    # kurrentdbclient pulls in gRPC, which is only loaded when the first
+    # event is mapped to or from the event store format.
+    kurrentdbclient = lazy_import("kurrentdbclient")
 
 
 class IEventStoreClient(Protocol):
@@ -20,7 +33,7 @@ class IEventStoreClient(Protocol):
     GameRepository doesn't have to know if it's talking to a "real"
     client or an in-memory client.
 
-    Note that the actual KurrentDBClient has more methods and the two
+    Note that the actual KurrentDBClient has more methods and the
     methods that we're going to use also have additional kwarg-only
     parameters with default values that we've omitted for simplicity.
 
@@ -65,6 +78,31 @@ class IEventStoreClient(Protocol):
             committed to the stream.
         """
 
+    def read_all(
+        self,
+        *,
+        commit_position: int | None = None,
+        filter_include: Sequence[str] = (),
+        filter_by_stream_name: bool = False,
+        limit: int = 2**63 - 1,
+    ) -> Iterable[kurrentdbclient.RecordedEvent]:
+        """Read events from all streams in the order they were committed.
+
+        The GameRepository doesn't use this method, but bulk tools like
+        the analytics exporter do.
+
+        Args:
+            commit_position: The commit position to start reading from,
+              inclusive.
+            filter_include: Regular expressions to filter the events by.
+            filter_by_stream_name: Match the filter against the stream
+              name instead of the event type.
+            limit: The maximum number of events to read.
+
+        Returns:
+            An iterable of recorded events in commit order.
+        """
+
 
 @attrs.define
 class GameRepository:
@@ -75,93 +113,419 @@ class GameRepository:
 
     See `connect_four.exercise_03.application.repository.IGameRepository` for the
     Protocol defining the required interface.
+
+    `get_many` reads up to `max_concurrency` streams at the same time.
+    Events are written at the current schema versions of `upcasters`,
+    which also upcasts events that were stored at older versions.
     """
 
     _client: IEventStoreClient
+    _instrumentation: instrumentation.Instrumentation = instrumentation.DISABLED
+    _max_concurrency: int = 8
+    _upcasters: schemas.UpcasterRegistry = schemas.UPCASTERS
 
     def add(self, game: game_.Game) -> None:
         """Add a game to the repository.
 
+        The new events are appended after the historical events of the
+        game, so the append fails if another process changed the game
+        since it was read. If that change is a retry of the same moves,
+        with the same idempotency keys, the game is already stored and
+        nothing is appended.
+
         :param game: The game to save
         :return: The ID of the game that was saved
+        :raises kurrentdbclient.exceptions.WrongCurrentVersion: if the
+            game was changed since it was read
+        :raises IdempotencyKeyReusedError: if a stored move has the
+            idempotency key of a new move with another column
         """
-        events_to_append = [
-            _map_domain_event_to_eventstore_event(event)
-            for event in game.uncommitted_events
-        ]
-        self._client.append_to_stream(
-            stream_name=f"game-{game.id}",
-            current_version=kurrentdbclient.StreamState.ANY,
-            events=events_to_append,
-        )
+        with self._instrumentation.stage("repository.add") as stage:
+            stage.set_attribute("game_id", game.id)
+            with self._instrumentation.stage("repository.encode"):
+                events_to_append = [
+                    map_domain_event_to_eventstore_event(event, self._upcasters)
+                    for event in game.uncommitted_events
+                ]
+            expected_version = len(game.historical_events) - 1
+            with self._instrumentation.stage("client.append") as append_stage:
+                try:
+                    self._client.append_to_stream(
+                        stream_name=f"game-{game.id}",
+                        current_version=(
+                            expected_version
+                            if expected_version >= 0
+                            else kurrentdbclient.StreamState.NO_STREAM
+                        ),
+                        events=events_to_append,
+                    )
+                except kurrentdbclient.exceptions.WrongCurrentVersion:
+                    if not self._is_stored_retry(game):
+                        raise
+                    return
+                append_stage.count("events_written", len(events_to_append))
+                if self._instrumentation.enabled:
+                    append_stage.count(
+                        "bytes_written", sum(len(e.data) for e in events_to_append)
+                    )
 
     def get(self, game_id: str) -> game_.Game:
         """Get a game from the repository.
 
+        A game that was archived by the `GameArchiver` is restored from
+        its `GameArchived` event alone, even if the events before it
+        haven't been truncated yet.
+
         :param game_id: The ID of the game
         :return: An instance of game after applying the stored events to
             ensure the game is in the correct state
         """
-        historical_events = [
-            _map_eventstore_event_to_domain_event(event)
-            for event in self._client.get_stream(f"game-{game_id}")
+        with self._instrumentation.stage("repository.get") as stage:
+            stage.set_attribute("game_id", game_id)
+            with self._instrumentation.stage("client.read") as read_stage:
+                recorded_events = self._client.get_stream(f"game-{game_id}")
+                read_stage.count("events_read", len(recorded_events))
+            stage.set_attribute("stream_length", len(recorded_events))
+            return self._load(game_id, recorded_events)
+
+    def get_many(self, game_ids: Iterable[str]) -> dict[str, game_.Game | Exception]:
+        """Get many games from the repository at once.
+
+        The streams of the games are read concurrently, after which the
+        games are restored one after the other. A game that can't be
+        read or restored doesn't fail the others; its exception is
+        returned in its place instead.
+
+        :param game_ids: The IDs of the games
+        :return: The game or the exception for each ID, in the order of
+            the IDs
+        """
+        game_ids = list(dict.fromkeys(game_ids))
+        with self._instrumentation.stage("repository.get_many") as stage:
+            stage.count("games", len(game_ids))
+            with self._instrumentation.stage("client.read") as read_stage:
+                streams = self._read_streams(game_ids)
+                read_stage.count(
+                    "events_read",
+                    sum(len(s) for s in streams if not isinstance(s, Exception)),
+                )
+            games: dict[str, game_.Game | Exception] = {}
+            for game_id, recorded_events in zip(game_ids, streams):
+                if isinstance(recorded_events, Exception):
+                    games[game_id] = recorded_events
+                    continue
+                try:
+                    games[game_id] = self._load(game_id, recorded_events)
+                except Exception as error:
+                    games[game_id] = error
+            return games
+
+    def get_events(self, game_id: str) -> list[LazyGameEvent]:
+        """Get the events of a game without decoding them.
+
+        This is meant for tools that only look at the types of the
+        events, like counting the moves of a game or checking whether
+        it's finished: an event is only decoded when one of its other
+        attributes is used. The events of an archived game are
+        recreated from its `GameArchived` event.
+
+        :param game_id: The ID of the game
+        :return: the events of the game, in the order they were stored
+        """
+        with self._instrumentation.stage("repository.get_events") as stage:
+            stage.set_attribute("game_id", game_id)
+            with self._instrumentation.stage("client.read") as read_stage:
+                recorded_events = self._client.get_stream(f"game-{game_id}")
+                read_stage.count("events_read", len(recorded_events))
+            if recorded_events and recorded_events[-1].type == ARCHIVE_EVENT_TYPE:
+                game_record = map_eventstore_event_to_record(
+                    recorded_events[-1], self._upcasters
+                )
+                return [
+                    LazyGameEvent.from_domain_event(event)
+                    for event in game_record.to_events()
+                ]
+            return [
+                LazyGameEvent(event, upcasters=self._upcasters)
+                for event in recorded_events
+            ]
+
+    def _is_stored_retry(self, game: game_.Game) -> bool:
+        """Check if the new moves of a game were stored by a retry."""
+        moves = [
+            event
+            for event in game.uncommitted_events
+            if isinstance(event, domain_events.MoveMade)
         ]
-        return game_.Game.load_from_history(
-            game_id=game_id, historical_events=historical_events
-        )
+        if not moves or any(move.idempotency_key is None for move in moves):
+            return False
+        stored_game = self.get(game.id)
+        try:
+            for move in moves:
+                stored_game.make_move(move.player, move.column, move.idempotency_key)
+        except exceptions.IdempotencyKeyReusedError:
+            raise
+        except exceptions.InvalidMoveError:
+            return False
+        # Moves with stored keys are ignored, so nothing new was made.
+        return not stored_game.uncommitted_events
+
+    def _read_streams(
+        self, game_ids: list[str]
+    ) -> list[Sequence[kurrentdbclient.RecordedEvent] | Exception]:
+        """Read the streams of games, concurrently if there are many."""
+        if len(game_ids) <= 1 or self._max_concurrency <= 1:
+            return [self._try_read_stream(game_id) for game_id in game_ids]
+        with concurrent.futures.ThreadPoolExecutor(self._max_concurrency) as executor:
+            return list(executor.map(self._try_read_stream, game_ids))
+
+    def _try_read_stream(
+        self, game_id: str
+    ) -> Sequence[kurrentdbclient.RecordedEvent] | Exception:
+        """Read the stream of a game, returning the exception on failure."""
+        try:
+            return self._client.get_stream(f"game-{game_id}")
+        except Exception as error:
+            return error
+
+    def _load(
+        self, game_id: str, recorded_events: Sequence[kurrentdbclient.RecordedEvent]
+    ) -> game_.Game:
+        """Restore a game from the events of its stream."""
+        if recorded_events and recorded_events[-1].type == ARCHIVE_EVENT_TYPE:
+            with self._instrumentation.stage("repository.decode"):
+                game_record = map_eventstore_event_to_record(
+                    recorded_events[-1], self._upcasters
+                )
+            with self._instrumentation.stage("repository.replay"):
+                return game_.Game.from_record(game_record, game_id=game_id)
+        with self._instrumentation.stage("repository.decode"):
+            historical_events = [
+                map_eventstore_event_to_domain_event(event, self._upcasters)
+                for event in recorded_events
+            ]
+        with self._instrumentation.stage("repository.replay"):
+            return game_.Game.load_from_history(
+                game_id=game_id, historical_events=historical_events
+            )
+
+
+@attrs.define(eq=False)
+class LazyGameEvent:
+    """A stored game event that's decoded on first use.
+
+    The `type` of the event is known without decoding it. Any other
+    attribute, like the `column` of a `MoveMade` event, is looked up on
+    the domain event, which is decoded the first time it's needed.
+    """
+
+    _recorded_event: kurrentdbclient.RecordedEvent | None
+    _domain_event: domain_events.GameEvent | None = None
+    _upcasters: schemas.UpcasterRegistry = attrs.field(
+        default=schemas.UPCASTERS, kw_only=True
+    )
 
+    @classmethod
+    def from_domain_event(cls, event: domain_events.GameEvent) -> Self:
+        """Wrap a domain event that's already decoded.
 
-def _map_domain_event_to_eventstore_event(
+        :param event: the domain event
+        :return: the wrapped event
+        """
+        return cls(None, event)
+
+    @property
+    def type(self) -> str:
+        """The type of the event, like "MoveMade"."""
+        if self._recorded_event is not None:
+            return self._recorded_event.type
+        return type(self._domain_event).__name__
+
+    @property
+    def domain_event(self) -> domain_events.GameEvent:
+        """The decoded domain event."""
+        if self._domain_event is None:
+            self._domain_event = map_eventstore_event_to_domain_event(
+                self._recorded_event, self._upcasters
+            )
+        return self._domain_event
+
+    def __getattr__(self, name: str) -> Any:
+        """Look up an attribute of the decoded domain event."""
+        # Private attributes are never delegated, which also prevents
+        # infinite recursion before the slots are initialized.
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.domain_event, name)
+
+
+def map_domain_event_to_eventstore_event(
     event: domain_events.GameEvent,
+    upcasters: schemas.UpcasterRegistry = schemas.UPCASTERS,
 ) -> kurrentdbclient.NewEvent:
     """Map a domain event to an eventstore event.
 
     :param event: the domain event to map
+    :param upcasters: the registry with the current schema versions
     :return: an eventstore event that can be persisted in EventStoreDB
     """
+    metadata: dict[str, Any] = {}
     match event:
-        case domain_events.GameStarted(player_one=player_one, player_two=player_two):
-            data = {"player_one": player_one, "player_two": player_two}
-            return kurrentdbclient.NewEvent(
-                type="GameStarted", data=json.dumps(data).encode("utf-8")
-            )
-        case domain_events.MoveMade(player=player, column=column):
+        case domain_events.GameStarted(
+            player_one=player_one, player_two=player_two, geometry=geometry
+        ):
+            event_type = "GameStarted"
+            data: dict[str, Any] = {"player_one": player_one, "player_two": player_two}
+            # Games on the standard board are stored as they were before
+            # boards had a geometry.
+            if geometry != board.STANDARD:
+                data["geometry"] = attrs.asdict(geometry)
+        case domain_events.MoveMade(
+            player=player, column=column, idempotency_key=idempotency_key
+        ):
+            event_type = "MoveMade"
             data = {"player": player, "column": column}
-            return kurrentdbclient.NewEvent(
-                type="MoveMade", data=json.dumps(data).encode("utf-8")
-            )
+            if idempotency_key is not None:
+                metadata["idempotency_key"] = idempotency_key
         case domain_events.GameFinished(result=result):
+            event_type = "GameFinished"
             data = {"result": result}
-            return kurrentdbclient.NewEvent(
-                type="GameFinished", data=json.dumps(data).encode("utf-8")
-            )
         case _:
             raise ValueError("Domain event not recognized.")
+    version = upcasters.current_version(event_type)
+    if metadata:
+        metadata[schemas.SCHEMA_VERSION_KEY] = version
+        encoded_metadata = json.dumps(metadata).encode("utf-8")
+    else:
+        encoded_metadata = _encode_version_metadata(version)
+    return kurrentdbclient.NewEvent(
+        type=event_type,
+        data=json.dumps(data).encode("utf-8"),
+        metadata=encoded_metadata,
+    )
 
 
-def _map_eventstore_event_to_domain_event(
+def map_eventstore_event_to_domain_event(
     event: kurrentdbclient.RecordedEvent,
+    upcasters: schemas.UpcasterRegistry = schemas.UPCASTERS,
 ) -> domain_events.GameEvent:
     """Map an eventstore event to a domain event.
 
+    Data that was stored with an older schema version is upcast to
+    the current version first.
+
     :param event: the eventstore event to map
+    :param upcasters: the registry with the upcasters of old versions
     :return: the equivalent domain event
     """
-    match event:
-        case kurrentdbclient.RecordedEvent(type="GameStarted", data=data):
-            data_dict = json.loads(data.decode("utf-8"))
+    metadata = decode_metadata(event.metadata)
+    data = json.loads(event.data.decode("utf-8"))
+    version = metadata.get(schemas.SCHEMA_VERSION_KEY, 1)
+    # Checking the version here saves a call for current events.
+    if version != upcasters.current_version(event.type):
+        data = upcasters.upcast(event.type, version, data)
+    match event.type:
+        case "GameStarted":
             return domain_events.GameStarted(
-                player_one=data_dict["player_one"], player_two=data_dict["player_two"]
+                player_one=data["player_one"],
+                player_two=data["player_two"],
+                geometry=(
+                    board.Geometry(**data["geometry"])
+                    if "geometry" in data
+                    else board.STANDARD
+                ),
             )
-        case kurrentdbclient.RecordedEvent(type="MoveMade", data=data):
-            data_dict = json.loads(data.decode("utf-8"))
+        case "MoveMade":
             return domain_events.MoveMade(
-                player=data_dict["player"], column=enums.Column(data_dict["column"])
-            )
-        case kurrentdbclient.RecordedEvent(type="GameFinished", data=data):
-            data_dict = json.loads(data.decode("utf-8"))
-            return domain_events.GameFinished(
-                result=enums.GameResult(data_dict["result"])
+                player=data["player"],
+                column=enums.Column(data["column"]),
+                idempotency_key=metadata.get("idempotency_key"),
             )
+        case "GameFinished":
+            return domain_events.GameFinished(result=enums.GameResult(data["result"]))
         case _:
             raise ValueError("Recorded Event not recognized.")
+
+
+def map_record_to_eventstore_event(
+    game_record: record.GameRecord,
+    result: enums.GameResult,
+    upcasters: schemas.UpcasterRegistry = schemas.UPCASTERS,
+) -> kurrentdbclient.NewEvent:
+    """Map the record of a finished game to a `GameArchived` event.
+
+    :param game_record: the record of the game
+    :param result: the result of the game
+    :param upcasters: the registry with the current schema versions
+    :return: an eventstore event that summarizes the game
+    """
+    data = {
+        "player_one": game_record.player_one,
+        "player_two": game_record.player_two,
+        "moves": game_record.moves,
+        "result": result,
+    }
+    return kurrentdbclient.NewEvent(
+        type=ARCHIVE_EVENT_TYPE,
+        data=json.dumps(data).encode("utf-8"),
+        metadata=_encode_version_metadata(
+            upcasters.current_version(ARCHIVE_EVENT_TYPE)
+        ),
+    )
+
+
+def map_eventstore_event_to_record(
+    event: kurrentdbclient.RecordedEvent,
+    upcasters: schemas.UpcasterRegistry = schemas.UPCASTERS,
+) -> record.GameRecord:
+    """Map a `GameArchived` event to the record of the game.
+
+    The result isn't part of the record, as it follows from the moves.
+
+    :param event: the eventstore event to map
+    :param upcasters: the registry with the upcasters of old versions
+    :return: the record of the game
+    """
+    metadata = decode_metadata(event.metadata)
+    data = upcasters.upcast(
+        ARCHIVE_EVENT_TYPE,
+        metadata.get(schemas.SCHEMA_VERSION_KEY, 1),
+        json.loads(event.data.decode("utf-8")),
+    )
+    return record.GameRecord(
+        player_one=data["player_one"],
+        player_two=data["player_two"],
+        moves=data["moves"],
+    )
+
+
+@functools.cache
+def _encode_version_metadata(version: int) -> bytes:
+    """Encode metadata that only holds a schema version."""
+    return json.dumps({schemas.SCHEMA_VERSION_KEY: version}).encode("utf-8")
+
+
+def decode_metadata(metadata: bytes) -> dict[str, Any]:
+    """Decode the metadata of an event.
+
+    Most events only have a schema version in their metadata, so there
+    are only a few distinct values of it. Those are decoded once and
+    cached; the decoded metadata must not be changed.
+
+    :param metadata: the encoded metadata, which may be empty
+    :return: the decoded metadata
+    """
+    if not metadata:
+        return {}
+    if (decoded := _VERSION_METADATA.get(metadata)) is not None:
+        return decoded
+    decoded = json.loads(metadata.decode("utf-8"))
+    if decoded.keys() == {schemas.SCHEMA_VERSION_KEY}:
+        _VERSION_METADATA[metadata] = decoded
+    return decoded
+
+
+# Metadata that only holds a schema version, by its encoding
+_VERSION_METADATA: dict[bytes, dict[str, Any]] = {}
+# The type of the event that replaces the events of a finished game.
+ARCHIVE_EVENT_TYPE: Final = "GameArchived"
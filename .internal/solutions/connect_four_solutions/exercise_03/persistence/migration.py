@@ -0,0 +1,247 @@
+"""Rewrite the streams of games at the current schema versions.
+
+Events that were stored at an older schema version are upcast each
+time they're read. The `SchemaMigrator` is a background job that
+rewrites those streams, so reads only see current versions:
+
+1. The events of the stream are decoded, which upcasts them, and
+   encoded again at the current versions.
+2. The rewritten events are appended to the stream. The append expects
+   the stream to end with the last event that was read, so an event
+   that's appended concurrently makes the migration of the stream fail
+   instead of getting lost.
+3. The stream is truncated before the rewritten events, like the
+   `GameArchiver` does.
+
+Reading all events still returns the original events, until the event
+store deletes them, like KurrentDB does when it scavenges. So the
+metadata of each rewritten event holds the position in the game of the
+event it rewrites, which `get_game_position` returns. Consumers of all
+events, like the `GameEventFeed` and the `ColumnarExporter`, skip the
+rewritten events whose originals they've read, but a consumer that
+starts after the originals were deleted reads the rewritten events.
+
+Only the streams of finished games are rewritten. The `UnitOfWork` uses
+the number of events of a game as the expected version of its stream,
+which no longer holds for a truncated stream, so an ongoing game is
+deferred until a later run finds it finished.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Final
+
+import attrs
+from connect_four_solutions.exercise_03.persistence import (
+    archive,
+    game_repository,
+    schemas,
+)
+from connect_four_solutions.helpers.lazy_import import lazy_import
+
+if TYPE_CHECKING:
+    import kurrentdbclient
+else:
+    kurrentdbclient = lazy_import("kurrentdbclient")
+
+
+@attrs.frozen
+class MigrationSummary:
+    """The result of a migration run."""
+
+    streams_migrated: int
+    events_rewritten: int
+    # The number of outdated games that are still going on
+    streams_deferred: int
+
+
+@attrs.define
+class SchemaMigrator:
+    """A background job that migrates game streams to current versions.
+
+    Each call to `run` checks the events that were committed since the
+    previous call, and the games that were deferred by it.
+    """
+
+    _client: game_repository.IEventStoreClient
+    _upcasters: schemas.UpcasterRegistry = schemas.UPCASTERS
+    _commit_position: int | None = None
+    _batch_size: int = 1000
+    _deferred: dict[str, None] = attrs.field(init=False, factory=dict)
+
+    def run(self) -> MigrationSummary:
+        """Migrate the outdated games that were found since the last run.
+
+        :return: a summary of this run
+        """
+        outdated = dict(self._deferred)
+        outdated.update(dict.fromkeys(self._find_outdated_games()))
+        self._deferred.clear()
+        streams_migrated, events_rewritten = 0, 0
+        for game_id in outdated:
+            rewritten = self.migrate(game_id)
+            if rewritten is None:
+                self._deferred[game_id] = None
+            elif rewritten:
+                streams_migrated += 1
+                events_rewritten += rewritten
+        return MigrationSummary(
+            streams_migrated=streams_migrated,
+            events_rewritten=events_rewritten,
+            streams_deferred=len(self._deferred),
+        )
+
+    def migrate(self, game_id: str) -> int | None:
+        """Rewrite the stream of a game at the current versions.
+
+        :param game_id: the ID of the game
+        :return: the number of events that were rewritten, which is 0 if
+          the stream is up to date, or None if the game is still going
+          on and can't be migrated yet
+        :raises kurrentdbclient.exceptions.WrongCurrentVersion: if an
+          event was appended to the stream while it was being migrated
+        """
+        stream_name = f"game-{game_id}"
+        recorded_events = self._client.get_stream(stream_name)
+        last_event = recorded_events[-1]
+        if last_event.type == game_repository.ARCHIVE_EVENT_TYPE:
+            # The events before the summary aren't read anymore.
+            if not self._is_outdated(last_event):
+                return 0
+            game_record = game_repository.map_eventstore_event_to_record(
+                last_event, self._upcasters
+            )
+            game_events = game_record.to_events()
+            new_events = [
+                _mark_as_migrated(
+                    game_repository.map_record_to_eventstore_event(
+                        game_record, game_events[-1].result, self._upcasters
+                    ),
+                    0,
+                )
+            ]
+        elif not any(self._is_outdated(event) for event in recorded_events):
+            return 0
+        elif last_event.type != "GameFinished":
+            return None
+        else:
+            new_events = self._rewrite(recorded_events)
+
+        self._client.append_to_stream(
+            stream_name,
+            current_version=last_event.stream_position,
+            events=new_events,
+        )
+        archive.truncate_before(
+            self._client, stream_name, last_event.stream_position + 1
+        )
+        return len(new_events)
+
+    def _find_outdated_games(self) -> list[str]:
+        """Find the games with outdated events since the last run."""
+        game_ids: dict[str, None] = {}
+        while True:
+            last_position = self._commit_position
+            recorded_events = list(
+                self._client.read_all(
+                    commit_position=last_position,
+                    filter_include=(_GAME_STREAM_PATTERN,),
+                    filter_by_stream_name=True,
+                    limit=self._batch_size + (last_position is not None),
+                )
+            )
+            new_events = [
+                event
+                for event in recorded_events
+                if last_position is None or event.commit_position > last_position
+            ]
+            if not new_events:
+                return list(game_ids)
+            for event in new_events:
+                if self._is_outdated(event):
+                    game_id = event.stream_name.removeprefix(_GAME_STREAM_PREFIX)
+                    game_ids[game_id] = None
+                self._commit_position = event.commit_position
+
+    def _is_outdated(self, event: kurrentdbclient.RecordedEvent) -> bool:
+        """Check if an event was stored at an older schema version."""
+        metadata = game_repository.decode_metadata(event.metadata)
+        version = metadata.get(schemas.SCHEMA_VERSION_KEY, 1)
+        return version != self._upcasters.current_version(event.type)
+
+    def _rewrite(
+        self, recorded_events: Sequence[kurrentdbclient.RecordedEvent]
+    ) -> list[kurrentdbclient.NewEvent]:
+        """Encode the events of a stream again at the current versions."""
+        # The events of a stream are the events of the game from its
+        # start, also if the stream was migrated before.
+        return [
+            _mark_as_migrated(
+                game_repository.map_domain_event_to_eventstore_event(
+                    game_repository.map_eventstore_event_to_domain_event(
+                        event, self._upcasters
+                    ),
+                    self._upcasters,
+                ),
+                position,
+            )
+            for position, event in enumerate(recorded_events)
+        ]
+
+
+def is_migrated(event: kurrentdbclient.RecordedEvent) -> bool:
+    """Check if an event is a rewrite of an event by the `SchemaMigrator`.
+
+    :param event: the recorded event
+    :return: True if the event was written by a migration
+    """
+    return _get_migrated_position(event) is not None
+
+
+def get_game_position(event: kurrentdbclient.RecordedEvent) -> int:
+    """Get the position of an event among the events of its game.
+
+    That's the stream position of the event, unless it's a rewrite by
+    the `SchemaMigrator`, which has the position of the event that it
+    rewrites. A `GameArchived` event holds all events of its game, so
+    its position is that of the first event.
+
+    :param event: the recorded event of a game
+    :return: the position of the (first) event in the game
+    """
+    if event.type == game_repository.ARCHIVE_EVENT_TYPE:
+        return 0
+    position = _get_migrated_position(event)
+    return event.stream_position if position is None else position
+
+
+def _get_migrated_position(event: kurrentdbclient.RecordedEvent) -> int | None:
+    """Get the position in the game of the event that an event rewrites."""
+    # Checking the encoded metadata first saves decoding it.
+    if _MIGRATED_MARKER not in event.metadata:
+        return None
+    return game_repository.decode_metadata(event.metadata).get(MIGRATED_KEY)
+
+
+def _mark_as_migrated(
+    event: kurrentdbclient.NewEvent, position: int
+) -> kurrentdbclient.NewEvent:
+    """Add the position in the game to the metadata of a rewritten event."""
+    metadata = {
+        **game_repository.decode_metadata(event.metadata),
+        MIGRATED_KEY: position,
+    }
+    return kurrentdbclient.NewEvent(
+        type=event.type,
+        data=event.data,
+        metadata=json.dumps(metadata).encode("utf-8"),
+    )
+
+
+# The metadata key with the position in the game of a rewritten event
+MIGRATED_KEY: Final = "migrated"
+_MIGRATED_MARKER: Final = f'"{MIGRATED_KEY}"'.encode("utf-8")
+_GAME_STREAM_PREFIX: Final = "game-"
+_GAME_STREAM_PATTERN: Final = f"{_GAME_STREAM_PREFIX}.*"
@@ -0,0 +1,182 @@
+"""An opening book that shares position evaluations across games.
+
+The book is stored as a compact binary file: a short header followed by
+fixed-size records, sorted by position key. Each record consists of the
+64-bit position key, the result, the best move and the search depth.
+
+The file is memory-mapped on the first lookup and searched with a
+binary search, so opening a large book doesn't require reading it.
+"""
+
+from __future__ import annotations
+
+import collections
+import mmap
+import os
+import pathlib
+import struct
+from collections.abc import Iterator
+from typing import Final
+
+import attrs
+from connect_four_solutions.exercise_03.domain import enums, solver
+
+
+class InvalidOpeningBookError(Exception):
+    """Raised when a file is not a valid opening book."""
+
+
+@attrs.define
+class OpeningBook:
+    """A persistent opening book with an in-memory LRU cache on top.
+
+    This class implements the `IPositionCache` interface, as expected by
+    the `Solver`. New evaluations are kept in memory until `save` is
+    called, which merges them into the file on disk.
+    """
+
+    _path: pathlib.Path = attrs.field(converter=pathlib.Path)
+    _max_cached: int = 4096
+    _cache: collections.OrderedDict[int, solver.PositionEvaluation] = attrs.field(
+        init=False, factory=collections.OrderedDict
+    )
+    _unsaved: dict[int, solver.PositionEvaluation] = attrs.field(
+        init=False, factory=dict
+    )
+    _mapped: mmap.mmap | bytes | None = attrs.field(init=False, default=None)
+
+    def get(self, position_key: int) -> solver.PositionEvaluation | None:
+        """Get the evaluation of a position, if it's in the book.
+
+        :param position_key: the mirror-normalized key of the position
+        :return: the evaluation or None if the position is unknown
+        """
+        if (evaluation := self._cache.get(position_key)) is not None:
+            self._cache.move_to_end(position_key)
+            return evaluation
+        evaluation = self._unsaved.get(position_key) or self._lookup(position_key)
+        if evaluation is not None:
+            self._remember(position_key, evaluation)
+        return evaluation
+
+    def put(self, position_key: int, evaluation: solver.PositionEvaluation) -> None:
+        """Add the evaluation of a position to the book.
+
+        :param position_key: the mirror-normalized key of the position
+        :param evaluation: the evaluation to store
+        """
+        self._unsaved[position_key] = evaluation
+        self._remember(position_key, evaluation)
+
+    def save(self) -> None:
+        """Merge the unsaved evaluations into the file on disk.
+
+        The book is written to a temporary file first, which then
+        replaces the original file, so readers never see a partially
+        written book.
+        """
+        if not self._unsaved:
+            return
+        records = dict(self._iter_records())
+        records.update(self._unsaved)
+        self.close()
+
+        temporary_path = self._path.with_name(self._path.name + ".tmp")
+        with temporary_path.open("wb") as file:
+            file.write(_HEADER)
+            for position_key in sorted(records):
+                file.write(_encode_record(position_key, records[position_key]))
+        os.replace(temporary_path, self._path)
+        self._unsaved.clear()
+
+    def close(self) -> None:
+        """Release the memory-mapped file, if it's mapped."""
+        if isinstance(self._mapped, mmap.mmap):
+            self._mapped.close()
+        self._mapped = None
+
+    def __len__(self) -> int:
+        """The number of positions in the book, including unsaved ones."""
+        stored = sum(1 for key, _ in self._iter_records() if key not in self._unsaved)
+        return stored + len(self._unsaved)
+
+    def _remember(
+        self, position_key: int, evaluation: solver.PositionEvaluation
+    ) -> None:
+        """Add an evaluation to the LRU cache, evicting the oldest entry."""
+        self._cache[position_key] = evaluation
+        self._cache.move_to_end(position_key)
+        if len(self._cache) > self._max_cached:
+            self._cache.popitem(last=False)
+
+    def _lookup(self, position_key: int) -> solver.PositionEvaluation | None:
+        """Binary search the file on disk for the position key."""
+        data = self._get_mapped()
+        low, high = 0, (len(data) - _HEADER_SIZE) // _RECORD.size
+        while low < high:
+            middle = (low + high) // 2
+            offset = _HEADER_SIZE + middle * _RECORD.size
+            (key,) = _KEY.unpack_from(data, offset)
+            if key == position_key:
+                return _decode_record(data, offset)[1]
+            if key < position_key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def _iter_records(self) -> Iterator[tuple[int, solver.PositionEvaluation]]:
+        """Iterate over all (position key, evaluation)-pairs on disk."""
+        data = self._get_mapped()
+        for offset in range(_HEADER_SIZE, len(data), _RECORD.size):
+            yield _decode_record(data, offset)
+
+    def _get_mapped(self) -> mmap.mmap | bytes:
+        """Lazily map the book file into memory."""
+        if self._mapped is not None:
+            return self._mapped
+        if not self._path.exists() or self._path.stat().st_size == 0:
+            self._mapped = _HEADER
+            return self._mapped
+
+        with self._path.open("rb") as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapped[:_HEADER_SIZE] != _HEADER:
+            mapped.close()
+            raise InvalidOpeningBookError(f"{self._path} is not an opening book.")
+        if (len(mapped) - _HEADER_SIZE) % _RECORD.size:
+            mapped.close()
+            raise InvalidOpeningBookError(f"{self._path} is truncated.")
+        self._mapped = mapped
+        return self._mapped
+
+
+def _encode_record(position_key: int, evaluation: solver.PositionEvaluation) -> bytes:
+    """Encode a single record of the opening book."""
+    return _RECORD.pack(
+        position_key,
+        _RESULT_CODES[evaluation.result],
+        _MOVE_CODES[evaluation.best_move],
+        evaluation.depth,
+    )
+
+
+def _decode_record(
+    data: mmap.mmap | bytes, offset: int
+) -> tuple[int, solver.PositionEvaluation]:
+    """Decode the record at the given offset."""
+    position_key, result, best_move, depth = _RECORD.unpack_from(data, offset)
+    evaluation = solver.PositionEvaluation(
+        result=_RESULTS[result], best_move=_MOVES[best_move], depth=depth
+    )
+    return position_key, evaluation
+
+
+_HEADER: Final = b"C4BOOK\x00\x01"
+_HEADER_SIZE: Final = len(_HEADER)
+_RECORD: Final = struct.Struct("<QBBB")
+_KEY: Final = struct.Struct("<Q")
+_RESULTS: Final = (None, *enums.GameResult)
+_RESULT_CODES: Final = {result: code for code, result in enumerate(_RESULTS)}
+_MOVES: Final = (None, *enums.Column)
+_MOVE_CODES: Final = {move: code for code, move in enumerate(_MOVES)}
@@ -0,0 +1,147 @@
+"""Versions of the schemas of stored events and upcasting between them.
+
+Each stored event has the version of the schema of its data in its
+metadata, under `schema_version`. Events that were stored before the
+versions were introduced don't have one and are version 1.
+
+When the schema of an event type changes, its current version is
+increased and an upcaster is registered that converts the data of the
+previous version to the new one:
+
+    @UPCASTERS.register("MoveMade", from_version=1)
+    def _add_move_number(data: dict[str, Any]) -> dict[str, Any]:
+        return {**data, "move_number": None}
+
+Reading an event at the current version doesn't call any upcasters.
+For an older version, the upcasters from that version to the current
+one are composed into a single function the first time that version is
+read, so a replay doesn't look up the chain of upcasters for each event.
+The `SchemaMigrator` rewrites old streams at the current versions, so
+even that is only needed until the migration has run.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any, Final, TypeAlias
+
+import attrs
+
+Upcaster: TypeAlias = Callable[[dict[str, Any]], dict[str, Any]]
+
+SCHEMA_VERSION_KEY: Final = "schema_version"
+
+
+class UnknownSchemaVersionError(ValueError):
+    """Raised when the data of an event can't be upcast."""
+
+
+@attrs.define
+class UpcasterRegistry:
+    """The current schema versions and the upcasters of event types.
+
+    :param current_versions: the current schema version of each event
+      type; event types that aren't listed are at version 1
+    """
+
+    _current_versions: dict[str, int] = attrs.field(converter=dict)
+    _upcasters: dict[tuple[str, int], Upcaster] = attrs.field(init=False, factory=dict)
+    # The composed upcasters by (event type, version)
+    _pipelines: dict[tuple[str, int], Upcaster] = attrs.field(init=False, factory=dict)
+
+    def current_version(self, event_type: str) -> int:
+        """Get the current schema version of an event type.
+
+        :param event_type: the type of the event, like "MoveMade"
+        :return: the current version
+        """
+        return self._current_versions.get(event_type, 1)
+
+    def register(
+        self, event_type: str, from_version: int
+    ) -> Callable[[Upcaster], Upcaster]:
+        """Register an upcaster from a version to the next one.
+
+        This is a decorator that returns the upcaster unchanged.
+
+        :param event_type: the type of the event, like "MoveMade"
+        :param from_version: the version of the data that the upcaster
+          accepts; it returns the data at the next version
+        :return: a decorator that registers the upcaster
+        :raises ValueError: if the version isn't older than the current
+          version or if it already has an upcaster
+        """
+        if not 1 <= from_version < self.current_version(event_type):
+            raise ValueError(
+                f"Version {from_version} of {event_type} isn't an old version."
+            )
+        if (event_type, from_version) in self._upcasters:
+            raise ValueError(
+                f"Version {from_version} of {event_type} already has an upcaster."
+            )
+
+        def decorator(upcaster: Upcaster) -> Upcaster:
+            self._upcasters[event_type, from_version] = upcaster
+            self._pipelines.clear()
+            return upcaster
+
+        return decorator
+
+    def upcast(
+        self, event_type: str, version: int, data: dict[str, Any]
+    ) -> dict[str, Any]:
+        """Convert the data of an event to the current version.
+
+        :param event_type: the type of the event, like "MoveMade"
+        :param version: the version of the data
+        :param data: the decoded data of the event
+        :return: the data at the current version, which is `data` itself
+          if it's at the current version already
+        :raises UnknownSchemaVersionError: if there's no upcaster for
+          one of the versions, or if the version is newer than the
+          current version
+        """
+        if version == self.current_version(event_type):
+            return data
+        try:
+            pipeline = self._pipelines[event_type, version]
+        except KeyError:
+            pipeline = self._pipelines[event_type, version] = self._compose(
+                event_type, version
+            )
+        return pipeline(data)
+
+    def _compose(self, event_type: str, version: int) -> Upcaster:
+        """Compose the upcasters from a version to the current version."""
+        current_version = self.current_version(event_type)
+        if not 1 <= version < current_version:
+            raise UnknownSchemaVersionError(
+                f"Version {version} of {event_type} is unknown; the current"
+                f" version is {current_version}."
+            )
+        try:
+            steps = tuple(
+                self._upcasters[event_type, step_version]
+                for step_version in range(version, current_version)
+            )
+        except KeyError as error:
+            raise UnknownSchemaVersionError(
+                f"There's no upcaster from version {error.args[0][1]} of"
+                f" {event_type}."
+            ) from None
+        if len(steps) == 1:
+            return steps[0]
+
+        def pipeline(data: dict[str, Any]) -> dict[str, Any]:
+            for step in steps:
+                data = step(data)
+            return data
+
+        return pipeline
+
+
+# The registry of the event types of a game; register upcasters here
+# when the schema of an event type changes.
+UPCASTERS: Final = UpcasterRegistry(
+    {"GameStarted": 1, "MoveMade": 1, "GameFinished": 1, "GameArchived": 1}
+)
@@ -0,0 +1,468 @@
+"""Partition the streams of an event store over multiple stores.
+
+The `ShardedEventStoreClient` implements the `IEventStoreClient`
+interface on top of a number of clients, the shards, so a
+`GameRepository` can use it without knowing it. Each stream lives on a
+single shard, which is chosen by consistent hashing:
+
+- Each shard is placed on a hash ring at a number of pseudo-random
+  points, its virtual nodes.
+- A stream belongs to the shard of the first point at or after the hash
+  of its name. The metadata stream of a stream (`$$<stream name>`)
+  belongs to the same shard as the stream itself.
+
+When shards are added, only the streams that hash to the points of the
+new shards move, and they only move to the new shards. `add_shards`
+copies those streams before the new shards are used for reads. Each
+copied event refers to the shard and commit position of the event it
+was copied from in its metadata.
+
+Reading all events merges the events of the shards. The commit
+positions of the shards are independent of each other, so a merged
+event gets a `ShardedPosition`: the commit position of the last event
+that was read on each shard, by the name of the shard. A read that
+resumes from a `ShardedPosition` continues on every shard from the
+commit position it holds for it, so readers that follow the tail of the
+store, like the `GameEventFeed`, don't miss the events of a shard that
+lags behind the others, and shards that were added since are read from
+the start. A `ShardedPosition` is also an integer, which increases with
+each merged event, so readers can compare it with the position they
+read up to, but that integer isn't related to the positions on the
+shards.
+
+Every event is read once, from the shard it was appended to: the copies
+of moved streams are left out. A copy marks the point from which the
+events on its new shard follow the events on its old shard, so the
+events of a shard aren't merged past a copy before the event that it
+was copied from. That keeps the events of each stream in order.
+"""
+
+from __future__ import annotations
+
+import bisect
+import dataclasses
+import hashlib
+import json
+import uuid
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from typing import TYPE_CHECKING, Final
+
+import attrs
+from connect_four_solutions.exercise_03.persistence import game_repository
+from connect_four_solutions.helpers.lazy_import import lazy_import
+
+if TYPE_CHECKING:
+    import kurrentdbclient
+else:
+    kurrentdbclient = lazy_import("kurrentdbclient")
+
+
+class ShardedPosition(int):
+    """The position of an event that was read from a sharded store.
+
+    As an integer, the position is the sum of the commit positions plus
+    one in `shard_positions`. It increases with each event that's read,
+    as each event moves the position on one shard.
+
+    :param shard_positions: the commit position of the last event that
+      was read on each shard, by the name of the shard
+    :param shard_name: the name of the shard of the event
+    """
+
+    shard_positions: Mapping[str, int]
+    shard_name: str
+
+    def __new__(
+        cls, shard_positions: Mapping[str, int], shard_name: str
+    ) -> ShardedPosition:
+        position = super().__new__(
+            cls,
+            sum(commit_position + 1 for commit_position in shard_positions.values()),
+        )
+        position.shard_positions = dict(shard_positions)
+        position.shard_name = shard_name
+        return position
+
+    def __repr__(self) -> str:
+        """Show the positions on the shards rather than their sum."""
+        return (
+            f"{type(self).__name__}("
+            f"shard_positions={self.shard_positions!r}, shard_name={self.shard_name!r})"
+        )
+
+
+@attrs.frozen
+class RebalanceSummary:
+    """The streams that were moved to new shards."""
+
+    streams_moved: int
+    events_moved: int
+
+
+@attrs.frozen
+class _HashRing:
+    """The points of the shards on a hash ring, in ascending order."""
+
+    points: list[int]
+    shard_names: list[str]
+
+    @classmethod
+    def build(cls, shard_names: Iterable[str], virtual_nodes: int) -> _HashRing:
+        """Place each shard on the ring at its virtual nodes."""
+        ring = sorted(
+            (_hash(f"{shard_name}#{node}"), shard_name)
+            for shard_name in shard_names
+            for node in range(virtual_nodes)
+        )
+        return cls(
+            points=[point for point, _ in ring],
+            shard_names=[shard_name for _, shard_name in ring],
+        )
+
+    def get_shard_name(self, stream_name: str) -> str:
+        """Get the name of the shard that a stream belongs to."""
+        index = bisect.bisect_left(self.points, _hash(stream_name.removeprefix("$$")))
+        return self.shard_names[index % len(self.points)]
+
+
+@attrs.define
+class ShardedEventStoreClient:
+    """An event store client that partitions streams over shards.
+
+    :param shards: the clients of the shards by the name of the shard;
+      the names determine the positions of the shards on the hash ring,
+      so they must be the same each time the store is used
+    :param virtual_nodes: the number of points per shard on the hash
+      ring; more points spread the streams more evenly
+    """
+
+    _shards: dict[str, game_repository.IEventStoreClient] = attrs.field(converter=dict)
+    _virtual_nodes: int = 64
+    _ring: _HashRing = attrs.field(init=False)
+
+    @_shards.validator
+    def _check_shards(
+        self,
+        attribute: attrs.Attribute,
+        shards: dict[str, game_repository.IEventStoreClient],
+    ) -> None:
+        """Check that there is at least one shard."""
+        if not shards:
+            raise ValueError("A store has at least one shard.")
+
+    @_ring.default
+    def _build_ring(self) -> _HashRing:
+        """Place the shards on the hash ring."""
+        return _HashRing.build(self._shards, self._virtual_nodes)
+
+    @property
+    def shards(self) -> Mapping[str, game_repository.IEventStoreClient]:
+        """The clients of the shards by the name of the shard."""
+        return dict(self._shards)
+
+    def get_shard_name(self, stream_name: str) -> str:
+        """Get the name of the shard that a stream belongs to.
+
+        :param stream_name: the name of the stream
+        :return: the name of the shard
+        """
+        return self._ring.get_shard_name(stream_name)
+
+    def append_to_stream(
+        self,
+        /,
+        stream_name: str,
+        *,
+        current_version: int | kurrentdbclient.StreamState,
+        events: kurrentdbclient.NewEvent | Iterable[kurrentdbclient.NewEvent],
+    ) -> int:
+        """Append new events to a stream on its shard.
+
+        See `IEventStoreClient.append_to_stream`. The commit position is
+        the commit position on the shard.
+        """
+        shard = self._shards[self._ring.get_shard_name(stream_name)]
+        return shard.append_to_stream(
+            stream_name, current_version=current_version, events=events
+        )
+
+    def get_stream(self, stream_name: str) -> Sequence[kurrentdbclient.RecordedEvent]:
+        """Get the events of a stream from its shard.
+
+        See `IEventStoreClient.get_stream`.
+        """
+        return self._shards[self._ring.get_shard_name(stream_name)].get_stream(
+            stream_name
+        )
+
+    def read_all(
+        self,
+        *,
+        commit_position: int | None = None,
+        filter_include: Sequence[str] = (),
+        filter_by_stream_name: bool = False,
+        limit: int = 2**63 - 1,
+    ) -> Iterator[kurrentdbclient.RecordedEvent]:
+        """Read the events of all shards, merged by commit position.
+
+        See `IEventStoreClient.read_all` and the module docstring for
+        the commit positions of the merged events. The copies of moved
+        streams are left out.
+
+        :raises ValueError: if the commit position isn't a
+          `ShardedPosition`
+        """
+        if commit_position is None:
+            shard_positions, last_shard_name = {}, None
+        elif isinstance(commit_position, ShardedPosition):
+            shard_positions = commit_position.shard_positions
+            last_shard_name = commit_position.shard_name
+        else:
+            raise ValueError(
+                "A sharded store resumes from the position of an event that "
+                "was read from it."
+            )
+        readers = [
+            _ShardReader.start(
+                shard,
+                index,
+                shard_name,
+                shard_positions.get(shard_name),
+                inclusive=shard_name == last_shard_name,
+                filter_include=filter_include,
+                filter_by_stream_name=filter_by_stream_name,
+            )
+            for index, (shard_name, shard) in enumerate(self._shards.items())
+        ]
+        readers_by_name = {reader.shard_name: reader for reader in readers}
+
+        yielded = 0
+        # The event at the requested position comes first, before the
+        # position moves on any shard.
+        if (reader := readers_by_name.get(last_shard_name)) is not None and limit > 0:
+            if (event := reader.get_last_read()) is not None:
+                reader.advance(event)
+                if _get_copy_of(event) is None:
+                    yielded += 1
+                    yield dataclasses.replace(event, commit_position=commit_position)
+        while yielded < limit:
+            heads = [(r.head, r) for r in readers if r.head is not None]
+            if not heads:
+                return
+            # A copy waits for the event it was copied from, unless all
+            # shards are waiting.
+            ready = [
+                (head, reader)
+                for head, reader in heads
+                if not _is_waiting(head, readers_by_name)
+            ]
+            event, reader = min(
+                ready or heads,
+                key=lambda pair: (pair[0].commit_position, pair[1].index),
+            )
+            reader.advance(event)
+            if _get_copy_of(event) is None:
+                yielded += 1
+                yield dataclasses.replace(
+                    event,
+                    commit_position=ShardedPosition(
+                        {
+                            r.shard_name: r.position
+                            for r in readers
+                            if r.position is not None
+                        },
+                        reader.shard_name,
+                    ),
+                )
+
+    def add_shards(
+        self, shards: Mapping[str, game_repository.IEventStoreClient]
+    ) -> RebalanceSummary:
+        """Add shards and move the streams that belong to them.
+
+        The streams are copied to their new shards before the new
+        shards are used, so appends to the streams that are moved must
+        be paused until this method returns. The original streams are
+        left on their old shards. `get_stream` reads the copies, but
+        `read_all` reads the original events, so readers that resume
+        from a position don't read the moved events again.
+
+        Streams are copied as they're read, so the events before the
+        truncation point of a truncated stream, like an archived game,
+        aren't copied and the stream positions of the remaining events
+        start from 0 on the new shard.
+
+        :param shards: the clients of the new shards by name
+        :return: a summary of the streams that were moved
+        :raises ValueError: if a shard with the same name already exists
+        """
+        if duplicates := self._shards.keys() & shards.keys():
+            raise ValueError(f"The shards {sorted(duplicates)} already exist.")
+        new_shards = {**self._shards, **shards}
+        new_ring = _HashRing.build(new_shards, self._virtual_nodes)
+
+        streams_moved, events_moved = 0, 0
+        for shard_name, shard in self._shards.items():
+            commit_positions = _get_commit_positions(shard)
+            for stream_name in commit_positions:
+                if self._ring.get_shard_name(stream_name) != shard_name:
+                    continue  # a copy that was left behind by a previous move
+                new_shard_name = new_ring.get_shard_name(stream_name)
+                if new_shard_name == shard_name:
+                    continue
+                recorded_events = shard.get_stream(stream_name)
+                new_shards[new_shard_name].append_to_stream(
+                    stream_name,
+                    current_version=kurrentdbclient.StreamState.NO_STREAM,
+                    events=[
+                        _to_copy(
+                            event,
+                            shard_name,
+                            commit_positions[stream_name][event.id],
+                        )
+                        for event in recorded_events
+                    ],
+                )
+                streams_moved += 1
+                events_moved += len(recorded_events)
+
+        self._shards, self._ring = new_shards, new_ring
+        return RebalanceSummary(streams_moved, events_moved)
+
+
+@attrs.define
+class _ShardReader:
+    """Reads the events of a shard one at a time, for merging."""
+
+    index: int
+    shard_name: str
+    _events: Iterator[kurrentdbclient.RecordedEvent]
+    # The commit position of the last event that was read, or None if
+    # no event was read yet
+    position: int | None
+    head: kurrentdbclient.RecordedEvent | None = attrs.field(init=False, default=None)
+
+    @classmethod
+    def start(
+        cls,
+        shard: game_repository.IEventStoreClient,
+        index: int,
+        shard_name: str,
+        position: int | None,
+        *,
+        inclusive: bool,
+        filter_include: Sequence[str],
+        filter_by_stream_name: bool,
+    ) -> _ShardReader:
+        """Start reading a shard after the last event that was read.
+
+        :param position: the commit position of the last event that was
+          read, or None to read from the start
+        :param inclusive: read the last event that was read again, which
+          doesn't move the position
+        """
+        events: Iterator[kurrentdbclient.RecordedEvent] = iter(
+            shard.read_all(
+                commit_position=position,
+                filter_include=filter_include,
+                filter_by_stream_name=filter_by_stream_name,
+            )
+        )
+        if position is not None:
+            events = (
+                e
+                for e in events
+                if e.commit_position > position
+                or (inclusive and e.commit_position == position)
+            )
+        reader = cls(index, shard_name, events, position)
+        reader.head = next(events, None)
+        return reader
+
+    def has_read(self, commit_position: int) -> bool:
+        """Whether the event at a commit position was read, if it exists."""
+        return self.head is None or (
+            self.position is not None and self.position >= commit_position
+        )
+
+    def get_last_read(self) -> kurrentdbclient.RecordedEvent | None:
+        """Get the next event if it's the last event that was read."""
+        if self.head is None or self.head.commit_position != self.position:
+            return None
+        return self.head
+
+    def advance(self, event: kurrentdbclient.RecordedEvent) -> None:
+        """Move past the next event of the shard.
+
+        :param event: the next event, `head`
+        """
+        self.position = event.commit_position
+        self.head = next(self._events, None)
+
+
+def _is_waiting(
+    event: kurrentdbclient.RecordedEvent, readers: Mapping[str, _ShardReader]
+) -> bool:
+    """Whether an event is a copy of an event that wasn't read yet."""
+    if (copy_of := _get_copy_of(event)) is None:
+        return False
+    shard_name, commit_position = copy_of
+    if (reader := readers.get(shard_name)) is None:
+        return False
+    return not reader.has_read(commit_position)
+
+
+def _get_commit_positions(
+    client: game_repository.IEventStoreClient,
+) -> dict[str, dict[uuid.UUID, int]]:
+    """Get the commit positions of the events of each stream in a store.
+
+    Metadata streams are left out.
+    """
+    commit_positions: dict[str, dict[uuid.UUID, int]] = {}
+    for event in client.read_all():
+        if not event.stream_name.startswith("$$"):
+            stream_positions = commit_positions.setdefault(event.stream_name, {})
+            stream_positions[event.id] = event.commit_position
+    return commit_positions
+
+
+def _to_copy(
+    event: kurrentdbclient.RecordedEvent, shard_name: str, commit_position: int
+) -> kurrentdbclient.NewEvent:
+    """Copy a recorded event to a new event with the same ID.
+
+    The metadata of the copy refers to the shard and commit position of
+    the event.
+    """
+    metadata = {
+        **game_repository.decode_metadata(event.metadata),
+        _COPY_OF_KEY: [shard_name, commit_position],
+    }
+    return kurrentdbclient.NewEvent(
+        type=event.type,
+        data=event.data,
+        metadata=json.dumps(metadata).encode("utf-8"),
+        content_type=event.content_type,
+        id=event.id,
+    )
+
+
+def _get_copy_of(event: kurrentdbclient.RecordedEvent) -> tuple[str, int] | None:
+    """Get the shard and commit position that an event was copied from."""
+    # Checking the encoded metadata first saves decoding it.
+    if _COPY_OF_MARKER not in event.metadata:
+        return None
+    copy_of = game_repository.decode_metadata(event.metadata).get(_COPY_OF_KEY)
+    return None if copy_of is None else (copy_of[0], copy_of[1])
+
+
+def _hash(key: str) -> int:
+    """A 64-bit hash of a key that's the same in every process."""
+    return int.from_bytes(
+        hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big"
+    )
+
+
+_COPY_OF_KEY: Final = "copy_of"
+_COPY_OF_MARKER: Final = f'"{_COPY_OF_KEY}"'.encode("utf-8")
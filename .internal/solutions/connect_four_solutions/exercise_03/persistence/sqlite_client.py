@@ -0,0 +1,266 @@
+"""A durable event store in a single SQLite database file.
+
+The `SQLiteEventStoreClient` implements the `IEventStoreClient`
+interface for single-node deployments that don't want to run an event
+store service. The events of all streams are stored in one table:
+
+- The primary key is `(stream_name, stream_position)`. The table is a
+  `WITHOUT ROWID` table, so the events of a stream are stored together
+  and reading a stream is a single range scan.
+- A unique `global_position` column records the order in which events
+  were committed and is used as their commit position by `read_all`.
+
+The database is used in WAL mode, which lets readers continue while an
+append is being committed. SQLite connections can't be shared between
+threads, so each thread gets its own connection, which is created when
+the thread first uses the client. The sqlite3 module keeps a cache of
+prepared statements per connection, so the statements are only
+compiled once per thread.
+
+Streams can be truncated like in KurrentDB, by appending a `$metadata`
+event with a `$tb` ("truncate before") position to the `$$<stream>`
+metadata stream. Unlike KurrentDB, which keeps truncated events until
+the next scavenge, the truncated events are deleted right away, in the
+same transaction. The last event of a stream is never deleted, as the
+version of the stream is derived from it.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import uuid
+from collections.abc import Iterable, Iterator, Sequence
+from typing import TYPE_CHECKING, Final
+
+import attrs
+from connect_four_solutions.helpers import in_memory_client
+from connect_four_solutions.helpers.lazy_import import lazy_import
+
+if TYPE_CHECKING:
+    import kurrentdbclient
+else:
+    kurrentdbclient = lazy_import("kurrentdbclient")
+
+
+@attrs.define
+class SQLiteEventStoreClient:
+    """An event store client that stores events in a SQLite database.
+
+    :param path: the path of the database file, which is created if it
+      doesn't exist yet
+    :param busy_timeout: the number of seconds to wait for a concurrent
+      append in another process before giving up
+    """
+
+    _path: str | os.PathLike[str]
+    _busy_timeout: float = 5.0
+    _local: threading.local = attrs.field(init=False, factory=threading.local)
+    _connections: list[sqlite3.Connection] = attrs.field(init=False, factory=list)
+    _lock: threading.Lock = attrs.field(init=False, factory=threading.Lock)
+
+    def __attrs_post_init__(self) -> None:
+        """Create the schema, if it doesn't exist yet."""
+        self._get_connection().executescript(_SCHEMA)
+
+    def append_to_stream(
+        self,
+        /,
+        stream_name: str,
+        *,
+        current_version: int | kurrentdbclient.StreamState,
+        events: kurrentdbclient.NewEvent | Iterable[kurrentdbclient.NewEvent],
+    ) -> int:
+        """Append new events to a stream in a single transaction.
+
+        See `IEventStoreClient.append_to_stream`.
+
+        :raises kurrentdbclient.exceptions.WrongCurrentVersion: if the
+          current version of the stream doesn't match
+        """
+        if isinstance(events, kurrentdbclient.NewEvent):
+            events = (events,)
+        events = list(events)
+        if not events:
+            raise ValueError("No events to append")
+
+        connection = self._get_connection()
+        # An immediate transaction takes the write lock before reading
+        # the positions, so no other append can interleave.
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            [(stream_version, global_position)] = connection.execute(
+                _SELECT_POSITIONS, (stream_name,)
+            )
+            in_memory_client.check_current_version(
+                stream_name, stream_version, current_version
+            )
+            connection.executemany(
+                _INSERT_EVENT,
+                (
+                    (
+                        stream_name,
+                        stream_version + offset,
+                        global_position + offset,
+                        str(event.id),
+                        event.type,
+                        event.data,
+                        event.metadata,
+                        event.content_type,
+                    )
+                    for offset, event in enumerate(events, start=1)
+                ),
+            )
+            if stream_name.startswith("$$") and events[-1].type == "$metadata":
+                truncate_before = json.loads(events[-1].data).get("$tb", 0)
+                connection.execute(
+                    _DELETE_BEFORE, (stream_name[2:], truncate_before, stream_name[2:])
+                )
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return global_position + len(events)
+
+    def get_stream(self, stream_name: str) -> Sequence[kurrentdbclient.RecordedEvent]:
+        """Get the events of a stream.
+
+        See `IEventStoreClient.get_stream`.
+
+        :raises kurrentdbclient.exceptions.NotFound: if the stream
+          doesn't exist
+        """
+        rows = self._get_connection().execute(_SELECT_STREAM, (stream_name,))
+        recorded_events = tuple(_to_recorded_event(row) for row in rows)
+        if not recorded_events:
+            raise kurrentdbclient.exceptions.NotFound(
+                f"Stream {stream_name!r} not found"
+            )
+        return recorded_events
+
+    def read_all(
+        self,
+        *,
+        commit_position: int | None = None,
+        filter_include: Sequence[str] = (),
+        filter_by_stream_name: bool = False,
+        limit: int = 2**63 - 1,
+    ) -> Iterator[kurrentdbclient.RecordedEvent]:
+        """Read events from all streams in the order they were committed.
+
+        See `IEventStoreClient.read_all`. The global position of an
+        event is its commit position.
+        """
+        patterns = [re.compile(pattern) for pattern in filter_include]
+        rows = self._get_connection().execute(_SELECT_ALL, (commit_position or 0,))
+        yielded = 0
+        for row in rows:
+            if yielded >= limit:
+                return
+            subject = row[0] if filter_by_stream_name else row[4]
+            if patterns and not any(p.fullmatch(subject) for p in patterns):
+                continue
+            yielded += 1
+            yield _to_recorded_event(row)
+
+    def close(self) -> None:
+        """Close the connections of all threads."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+            self._local = threading.local()
+        for connection in connections:
+            connection.close()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """Get the connection of the current thread, creating it if needed."""
+        if (connection := getattr(self._local, "connection", None)) is not None:
+            return connection
+        # Transactions are managed explicitly, so the connection is put
+        # in autocommit mode. The connection is only used by this thread,
+        # but `close` may be called from another one.
+        connection = sqlite3.connect(
+            self._path,
+            timeout=self._busy_timeout,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        connection.execute("PRAGMA journal_mode = WAL")
+        # In WAL mode, this can't corrupt the database, but the last
+        # commits before a power failure may be lost.
+        connection.execute("PRAGMA synchronous = NORMAL")
+        with self._lock:
+            self._connections.append(connection)
+            self._local.connection = connection
+        return connection
+
+
+def _to_recorded_event(row: tuple) -> kurrentdbclient.RecordedEvent:
+    """Convert a row of the events table to a recorded event."""
+    (
+        stream_name,
+        stream_position,
+        global_position,
+        event_id,
+        event_type,
+        data,
+        metadata,
+        content_type,
+    ) = row
+    return kurrentdbclient.RecordedEvent(
+        type=event_type,
+        data=data,
+        metadata=metadata,
+        content_type=content_type,
+        id=uuid.UUID(event_id),
+        stream_name=stream_name,
+        stream_position=stream_position,
+        commit_position=global_position,
+        prepare_position=global_position,
+        recorded_at=None,
+        link=None,
+        retry_count=None,
+    )
+
+
+_SCHEMA: Final = """
+CREATE TABLE IF NOT EXISTS events (
+    stream_name TEXT NOT NULL,
+    stream_position INTEGER NOT NULL,
+    global_position INTEGER NOT NULL UNIQUE,
+    id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    data BLOB NOT NULL,
+    metadata BLOB NOT NULL,
+    content_type TEXT NOT NULL,
+    PRIMARY KEY (stream_name, stream_position)
+) WITHOUT ROWID;
+"""
+_COLUMNS: Final = (
+    "stream_name, stream_position, global_position,"
+    " id, type, data, metadata, content_type"
+)
+# Both maxima are answered from an index, without scanning the table.
+_SELECT_POSITIONS: Final = """
+SELECT
+    (SELECT coalesce(max(stream_position), -1) FROM events WHERE stream_name = ?),
+    (SELECT coalesce(max(global_position), -1) FROM events)
+"""
+_INSERT_EVENT: Final = (
+    f"INSERT INTO events ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+# The last event of the stream is kept, even if it's before the position.
+_DELETE_BEFORE: Final = """
+DELETE FROM events WHERE stream_name = ? AND stream_position < min(
+    ?, (SELECT max(stream_position) FROM events WHERE stream_name = ?)
+)
+"""
+_SELECT_STREAM: Final = (
+    f"SELECT {_COLUMNS} FROM events WHERE stream_name = ? ORDER BY stream_position"
+)
+_SELECT_ALL: Final = (
+    f"SELECT {_COLUMNS} FROM events"
+    " WHERE global_position >= ? ORDER BY global_position"
+)
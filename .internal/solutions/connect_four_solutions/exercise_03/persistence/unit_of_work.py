@@ -0,0 +1,190 @@
+"""Commit the changes of many games in one pass.
+
+A `UnitOfWork` collects games with uncommitted events and appends the
+events of all games concurrently when it's committed. Each append uses
+the version that the game was loaded at as the expected version of its
+stream, so a concurrent change to the same game is detected instead of
+silently interleaved.
+
+The appends to different streams are not atomic as a whole: an event
+store can't roll back the events of one stream when the append to
+another stream fails. Instead, the unit of work keeps track of which
+games were committed. If any append fails, `commit` raises a
+`UnitOfWorkError` that lists both the committed and the failed games,
+and the failed games stay in the unit of work, so calling `commit`
+again only retries those.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+from types import TracebackType
+from typing import TYPE_CHECKING
+
+import attrs
+from connect_four_solutions.exercise_03.domain import game as game_
+from connect_four_solutions.exercise_03.instrumentation import instrumentation
+from connect_four_solutions.exercise_03.persistence import game_repository, schemas
+from connect_four_solutions.helpers.lazy_import import lazy_import
+
+if TYPE_CHECKING:
+    import kurrentdbclient
+else:
+    kurrentdbclient = lazy_import("kurrentdbclient")
+
+
+@attrs.define(frozen=True)
+class StreamCommit:
+    """The events of a game that were committed to its stream."""
+
+    game_id: str
+    events_written: int
+    # The position of the last event in the stream after the commit
+    version: int
+
+
+class UnitOfWorkError(Exception):
+    """Raised when the events of one or more games weren't committed."""
+
+    def __init__(
+        self, committed: list[StreamCommit], failed: dict[str, Exception]
+    ) -> None:
+        """Initialize the exception.
+
+        :param committed: the commits that succeeded in this attempt
+        :param failed: the exception for each game that wasn't committed
+        """
+        super().__init__(
+            f"Failed to commit {len(failed)} of {len(committed) + len(failed)}"
+            f" games: {', '.join(failed)}"
+        )
+        self.committed = committed
+        self.failed = failed
+
+
+@attrs.define
+class UnitOfWork:
+    """Collect changed games and commit them together.
+
+    The unit of work implements the IGameRepository interface, so an
+    application service can use it in place of a repository. Games are
+    loaded from the wrapped repository, while added games are kept
+    until `commit` is called. As a context manager, the unit of work
+    commits on a successful exit and discards the changes otherwise.
+    """
+
+    _client: game_repository.IEventStoreClient
+    _max_concurrency: int = 8
+    _instrumentation: instrumentation.Instrumentation = instrumentation.DISABLED
+    _upcasters: schemas.UpcasterRegistry = schemas.UPCASTERS
+    _repository: game_repository.GameRepository = attrs.field(
+        init=False,
+        default=attrs.Factory(
+            lambda self: game_repository.GameRepository(
+                self._client, self._instrumentation, upcasters=self._upcasters
+            ),
+            takes_self=True,
+        ),
+    )
+    _games: dict[str, game_.Game] = attrs.field(init=False, factory=dict)
+
+    def add(self, game: game_.Game) -> None:
+        """Add a game with uncommitted events to the unit of work.
+
+        :param game: the game to commit later
+        """
+        self._games[game.id] = game
+
+    def get(self, game_id: str) -> game_.Game:
+        """Get a game, preferring a version with uncommitted changes.
+
+        :param game_id: the ID of the game
+        :return: the game
+        """
+        if (game := self._games.get(game_id)) is not None:
+            return game
+        return self._repository.get(game_id)
+
+    def commit(self) -> list[StreamCommit]:
+        """Append the uncommitted events of all games.
+
+        The events of a game are moved to its historical events once
+        they're committed, and the game is removed from the unit of
+        work.
+
+        :return: a commit for each game that had uncommitted events
+        :raises UnitOfWorkError: if any of the appends failed
+        """
+        games = [game for game in self._games.values() if game.uncommitted_events]
+        with self._instrumentation.stage("unit_of_work.commit") as stage:
+            stage.count("streams_written", len(games))
+            committed, failed = [], {}
+            for game, outcome in zip(games, self._append_all(games)):
+                if isinstance(outcome, Exception):
+                    failed[game.id] = outcome
+                    continue
+                committed.append(outcome)
+                game.historical_events += tuple(game.uncommitted_events)
+                game.uncommitted_events.clear()
+                del self._games[game.id]
+            stage.count("events_written", sum(c.events_written for c in committed))
+
+        if failed:
+            raise UnitOfWorkError(committed, failed)
+        self._games.clear()
+        return committed
+
+    def rollback(self) -> None:
+        """Discard all games that weren't committed yet."""
+        self._games.clear()
+
+    def __enter__(self) -> UnitOfWork:
+        """Start collecting games."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Commit the games, unless the block raised an exception."""
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+    def _append_all(self, games: list[game_.Game]) -> list[StreamCommit | Exception]:
+        """Append the events of the games, concurrently if there are many."""
+        if len(games) <= 1 or self._max_concurrency <= 1:
+            return [self._try_append(game) for game in games]
+        with concurrent.futures.ThreadPoolExecutor(self._max_concurrency) as executor:
+            return list(executor.map(self._try_append, games))
+
+    def _try_append(self, game: game_.Game) -> StreamCommit | Exception:
+        """Append the events of a game, returning the exception on failure."""
+        expected_version = len(game.historical_events) - 1
+        try:
+            # An event that can't be encoded fails its own game only.
+            events = [
+                game_repository.map_domain_event_to_eventstore_event(
+                    event, self._upcasters
+                )
+                for event in game.uncommitted_events
+            ]
+            self._client.append_to_stream(
+                f"game-{game.id}",
+                current_version=(
+                    expected_version
+                    if expected_version >= 0
+                    else kurrentdbclient.StreamState.NO_STREAM
+                ),
+                events=events,
+            )
+        except Exception as error:
+            return error
+        return StreamCommit(
+            game_id=game.id,
+            events_written=len(events),
+            version=expected_version + len(events),
+        )
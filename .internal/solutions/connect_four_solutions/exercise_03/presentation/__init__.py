@@ -1,3 +1,18 @@
-from .board import generate_board_string
+from .board import (
+    BOARD_HEIGHT,
+    BOARD_WIDTH,
+    IncrementalBoardRenderer,
+    generate_board_string,
+    get_board_size,
+)
+from .spectator import IGameEventFeed, SpectatorDashboard
 
-__all__ = ["generate_board_string"]
+__all__ = [
+    "BOARD_HEIGHT",
+    "BOARD_WIDTH",
+    "IGameEventFeed",
+    "IncrementalBoardRenderer",
+    "SpectatorDashboard",
+    "generate_board_string",
+    "get_board_size",
+]
@@ -3,11 +3,60 @@
 This visualization contains color codes for pretty printing in a
 terminal that supports it. It may look a bit funky in a terminal that
 does not.
+
+Boards of any `Geometry` can be rendered; the standard board of 6 rows
+by 7 columns is the default. The borders and colorized tokens are only
+built once per number of columns and rendered boards are cached by
+their geometry and Zobrist hash, as screens that show many games tend
+to render the same positions over and over again. The
+`IncrementalBoardRenderer` goes one step further and only redraws the
+cells that changed since its previous frame.
 """
 
-import colorama
+from __future__ import annotations
+
+import functools
+from typing import TYPE_CHECKING, Final
+
+import attrs
+from connect_four_solutions.exercise_03.domain import board as board_
 from connect_four_solutions.exercise_03.domain import enums
 from connect_four_solutions.exercise_03.domain.board import BoardState
+from connect_four_solutions.helpers.lazy_import import lazy_import
+
+if TYPE_CHECKING:
+    import colorama
+else:
+    # Headless processes import this module without ever rendering.
+    colorama = lazy_import("colorama")
+
+_COLUMN_INDICES: Final = {column: index for index, column in enumerate(enums.Column)}
+
+
+def get_board_size(geometry: board_.Geometry = board_.STANDARD) -> tuple[int, int]:
+    """Get the size of a rendered board, excluding the color codes.
+
+    :param geometry: the geometry of the board
+    :return: the number of lines and the number of characters per line
+    """
+    return 2 * geometry.rows + 2, 4 * geometry.columns + 1
+
+
+# The size of a rendered standard board
+BOARD_HEIGHT: Final = get_board_size()[0]
+BOARD_WIDTH: Final = get_board_size()[1]
+
+
+@attrs.define(frozen=True)
+class _Palette:
+    """The colorized building blocks of a rendered board."""
+
+    top_border: str
+    horizontal_border: str
+    row_separator: str
+    bottom_border: str
+    separator: str
+    cells: dict[enums.Token | None, str]
 
 
 def _colorize_string(string: str, color: str) -> str:
@@ -34,46 +83,143 @@ def _colorize_token(token: enums.Token) -> str:
     return _colorize_string("●", color)
 
 
-def generate_board_string(board_state: BoardState) -> str:
+@functools.cache
+def _get_palette(columns: int) -> _Palette:
+    """Build the palette on first use, which imports colorama."""
+    labels = "   ".join(column.value for column in tuple(enums.Column)[:columns])
+    cells = ["═══"] * columns
+    return _Palette(
+        top_border=_colorize_string(f"  {labels}", colorama.Fore.LIGHTWHITE_EX),
+        horizontal_border=_colorize_string(f"╔{'╦'.join(cells)}╗", colorama.Fore.BLUE),
+        row_separator=_colorize_string(f"╠{'╬'.join(cells)}╣", colorama.Fore.BLUE),
+        bottom_border=_colorize_string(f"╚{'╩'.join(cells)}╝", colorama.Fore.BLUE),
+        separator=_colorize_string("║", colorama.Fore.BLUE),
+        cells={None: " ", **{token: _colorize_token(token) for token in enums.Token}},
+    )
+
+
+def generate_board_string(
+    board_state: BoardState, geometry: board_.Geometry = board_.STANDARD
+) -> str:
     """Generate a string representation of the board.
 
     :param board_state: the state of the board
+    :param geometry: the geometry of the board
     :return: a string representation of the board
+    :raises ValueError: if the board state doesn't fit the geometry
     """
-    board = [[" " for _ in range(7)] for _ in range(6)]
+    if any(len(tokens) > geometry.rows for tokens in board_state.values()):
+        raise ValueError(f"A column of the board has more than {geometry.rows} rows.")
+    return _render(_Position(board_state, geometry))
 
-    # Fill the board based on the moves
-    for col, player_moves in board_state.items():
-        for row, player in enumerate(player_moves):
-            board[5 - row][ord(col) - ord("A")] = _colorize_token(player)
 
-    # Define the top border with column numbers
-    # Define the top border with column numbers
-    top_border = _colorize_string(
-        "  A   B   C   D   E   F   G", colorama.Fore.LIGHTWHITE_EX
-    )
-    horizontal_border = _colorize_string(
-        "╔═══╦═══╦═══╦═══╦═══╦═══╦═══╗", colorama.Fore.BLUE
-    )
-    row_separator = _colorize_string(
-        "╠═══╬═══╬═══╬═══╬═══╬═══╬═══╣", colorama.Fore.BLUE
-    )
-    bottom_border = _colorize_string(
-        "╚═══╩═══╩═══╩═══╩═══╩═══╩═══╝", colorama.Fore.BLUE
-    )
-    separator = _colorize_string("║", colorama.Fore.BLUE)
+def _build_board_lines(board_state: BoardState, geometry: board_.Geometry) -> list[str]:
+    """Build the lines of a rendered board, from top to bottom."""
+    palette = _get_palette(geometry.columns)
+    cells = palette.cells
+    rows = geometry.rows
+    board = [[" "] * geometry.columns for _ in range(rows)]
+    for column, tokens in board_state.items():
+        for row, token in enumerate(tokens):
+            board[rows - 1 - row][_COLUMN_INDICES[column]] = cells[token]
 
-    # Generate the board string
-    board_string = [top_border, horizontal_border]
-    for row in board[:-1]:
-        board_string.append(
-            f"{separator} " + f" {separator} ".join(row) + f" {separator}"
+    separator = f" {palette.separator} "
+    lines = [palette.top_border, palette.horizontal_border]
+    for row in board:
+        lines.append(f"{palette.separator} {separator.join(row)}{separator[:-1]}")
+        lines.append(palette.row_separator)
+    lines[-1] = palette.bottom_border
+    return lines
+
+
+@attrs.define(frozen=True)
+class _Position:
+    """A board state that's hashed and compared by its Zobrist hash."""
+
+    board_state: BoardState = attrs.field(eq=False)
+    geometry: board_.Geometry
+    key: int = attrs.field(
+        default=attrs.Factory(
+            lambda self: board_.get_zobrist_hash(self.board_state, self.geometry),
+            takes_self=True,
         )
-        board_string.append(row_separator)
-    # Add the last row without a row separator afterward
-    board_string.append(
-        f"{separator} " + f" {separator} ".join(board[-1]) + f" {separator}"
     )
-    board_string.append(bottom_border)
 
-    return "\n".join(board_string)
+
+@functools.lru_cache(maxsize=4096)
+def _render(position: _Position) -> str:
+    """Render a board, caching the result by the position's hash."""
+    return "\n".join(_build_board_lines(position.board_state, position.geometry))
+
+
+@attrs.define
+class IncrementalBoardRenderer:
+    """Render a board at a fixed place on the screen, one frame at a time.
+
+    The first frame draws the full board. After that, each frame only
+    contains ANSI escape codes that move the cursor to the cells that
+    changed since the previous frame and redraw them. Writing the frames
+    to a terminal in order keeps the board on the screen up to date.
+
+    The renderer doesn't restore the cursor position after a frame.
+    """
+
+    top: int = 1
+    left: int = 1
+    geometry: board_.Geometry = board_.STANDARD
+    _cells: dict[tuple[int, int], enums.Token] | None = attrs.field(
+        init=False, default=None
+    )
+
+    def render(self, board_state: BoardState) -> str:
+        """Render the next frame for a board state.
+
+        :param board_state: the current state of the board
+        :return: the escape codes and characters to write to the screen
+          or an empty string if nothing changed
+        """
+        cells = {
+            (_COLUMN_INDICES[column], row): token
+            for column, tokens in board_state.items()
+            for row, token in enumerate(tokens)
+        }
+        if self._cells is None:
+            self._cells = cells
+            return "".join(
+                f"{self._move_cursor(line_number, 0)}{line}"
+                for line_number, line in enumerate(
+                    _render_lines(board_state, self.geometry)
+                )
+            )
+
+        palette = _get_palette(self.geometry.columns)
+        frame = []
+        for cell in sorted(self._cells.keys() | cells.keys()):
+            if (token := cells.get(cell)) != self._cells.get(cell):
+                column_index, row = cell
+                frame.append(
+                    self._move_cursor(
+                        *_get_cell_offset(column_index, row, self.geometry.rows)
+                    )
+                )
+                frame.append(palette.cells[token])
+        self._cells = cells
+        return "".join(frame)
+
+    def reset(self) -> None:
+        """Draw the full board again on the next frame."""
+        self._cells = None
+
+    def _move_cursor(self, line: int, offset: int) -> str:
+        """Move the cursor relative to the top-left corner of the board."""
+        return f"\x1b[{self.top + line};{self.left + offset}H"
+
+
+def _render_lines(board_state: BoardState, geometry: board_.Geometry) -> list[str]:
+    """The lines of a rendered board, which uses the render cache."""
+    return generate_board_string(board_state, geometry).split("\n")
+
+
+def _get_cell_offset(column_index: int, row: int, rows: int) -> tuple[int, int]:
+    """The line and character offset of a cell in a rendered board."""
+    return 2 * (rows - row), 4 * column_index + 2
@@ -0,0 +1,160 @@
+"""A dashboard that shows many live games at once.
+
+The dashboard doesn't ask the application for the state of each game.
+Instead, it consumes the events of all games from a feed, rebuilds the
+games from those events and lays them out in a grid on the terminal.
+
+Frames are drawn at a capped rate. Events that arrive between two frames
+are applied immediately, but a board is only redrawn in the next frame,
+and then only the cells that changed.
+
+The slots of the grid have room for a board of a single geometry, the
+standard board by default. Games on boards that don't fit in a slot
+aren't shown.
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from collections.abc import Callable
+from typing import Protocol, TextIO
+
+import attrs
+from connect_four_solutions.exercise_03.domain import board as board_
+from connect_four_solutions.exercise_03.domain import enums
+from connect_four_solutions.exercise_03.domain import events as domain_events
+from connect_four_solutions.exercise_03.domain import game as game_
+from connect_four_solutions.exercise_03.presentation import board
+
+
+class IGameEventFeed(Protocol):
+    """Interface for a feed of the events of all games."""
+
+    def poll(self) -> list[tuple[str, domain_events.GameEvent]]:
+        """Read the events that were appended since the previous call.
+
+        :return: a list of (game ID, domain event)-pairs
+        """
+
+
+@attrs.define
+class SpectatorDashboard:
+    """Show the games from a feed in a grid on a terminal."""
+
+    _feed: IGameEventFeed
+    _output: TextIO = attrs.field(factory=lambda: sys.stdout)
+    _columns: int = 4
+    _max_frames_per_second: float = 10.0
+    _clock: Callable[[], float] = time.monotonic
+    # The largest board that fits in a slot of the grid
+    _geometry: board_.Geometry = board_.STANDARD
+    _games: dict[str, game_.Game] = attrs.field(init=False, factory=dict)
+    _renderers: dict[str, board.IncrementalBoardRenderer] = attrs.field(
+        init=False, factory=dict
+    )
+    # A dict instead of a set, to redraw the games in a stable order.
+    _changed: dict[str, None] = attrs.field(init=False, factory=dict)
+    _last_frame_at: float | None = attrs.field(init=False, default=None)
+
+    def update(self) -> int:
+        """Apply the events that were appended to the feed.
+
+        :return: the number of events that were applied
+        """
+        game_events = self._feed.poll()
+        for game_id, event in game_events:
+            if (game := self._games.get(game_id)) is None:
+                game = self._games[game_id] = game_.Game(id=game_id)
+            game.apply(event)
+            self._changed[game_id] = None
+        return len(game_events)
+
+    def draw(self) -> bool:
+        """Redraw the changed games, unless a frame was drawn too recently.
+
+        :return: True if a frame was drawn, False otherwise
+        """
+        now = self._clock()
+        if (
+            self._last_frame_at is not None
+            and now - self._last_frame_at < 1 / self._max_frames_per_second
+        ):
+            return False
+
+        _, board_width = board.get_board_size(self._geometry)
+        frame = ["\x1b[2J"] if self._last_frame_at is None else []
+        for game_id in self._changed:
+            game = self._games[game_id]
+            if not self._fits_in_slot(game.geometry):
+                continue
+            renderer = self._get_renderer(game_id, game.geometry)
+            frame.append(f"\x1b[{renderer.top - 1};{renderer.left}H")
+            frame.append(_describe_game(game, board_width).ljust(board_width))
+            frame.append(renderer.render(game.board))
+        self._changed.clear()
+        self._last_frame_at = now
+
+        if frame:
+            frame.append(f"\x1b[{self._get_bottom_line()};1H")
+            self._output.write("".join(frame))
+            self._output.flush()
+        return True
+
+    def run(self, poll_interval: float = 0.01) -> None:
+        """Keep the dashboard up to date until interrupted.
+
+        :param poll_interval: the number of seconds to wait after a poll
+          that didn't return any events
+        """
+        while True:
+            if not self.update():
+                time.sleep(poll_interval)
+            self.draw()
+
+    def _get_renderer(
+        self, game_id: str, geometry: board_.Geometry
+    ) -> board.IncrementalBoardRenderer:
+        """Get the renderer of a game, assigning it the next slot if new."""
+        if (renderer := self._renderers.get(game_id)) is None:
+            slot_height, slot_width = self._get_slot_size()
+            row, column = divmod(len(self._renderers), self._columns)
+            renderer = self._renderers[game_id] = board.IncrementalBoardRenderer(
+                top=row * slot_height + 2,
+                left=column * slot_width + 1,
+                geometry=geometry,
+            )
+        return renderer
+
+    def _fits_in_slot(self, geometry: board_.Geometry) -> bool:
+        """Whether a board of a geometry fits in a slot of the grid."""
+        return (
+            geometry.rows <= self._geometry.rows
+            and geometry.columns <= self._geometry.columns
+        )
+
+    def _get_slot_size(self) -> tuple[int, int]:
+        """The number of lines and characters per line of a slot."""
+        board_height, board_width = board.get_board_size(self._geometry)
+        # Each slot has a title line above the board and a blank line
+        # below it.
+        return board_height + 2, board_width + 2
+
+    def _get_bottom_line(self) -> int:
+        """The first line below the grid, where the cursor is parked."""
+        rows = -(-len(self._renderers) // self._columns)
+        return rows * self._get_slot_size()[0] + 1
+
+
+def _describe_game(game: game_.Game, width: int) -> str:
+    """A one-line description of a game that fits above its board."""
+    match game.result:
+        case enums.GameResult.PLAYER_ONE_WON:
+            status = f"{game.player_one} won"
+        case enums.GameResult.PLAYER_TWO_WON:
+            status = f"{game.player_two} won"
+        case enums.GameResult.TIED:
+            status = "tied"
+        case _:
+            status = f"{game.player_one} vs {game.player_two}"
+    return status[:width]
@@ -1,3 +1,19 @@
+from .fault_injecting_client import (
+    ConstantLatency,
+    FaultInjectingClient,
+    LogNormalLatency,
+    NetworkProfile,
+    UniformLatency,
+)
 from .in_memory_client import InMemoryEventStoreClient
+from .lazy_import import lazy_import
 
-__all__ = ["InMemoryEventStoreClient"]
+__all__ = [
+    "ConstantLatency",
+    "FaultInjectingClient",
+    "InMemoryEventStoreClient",
+    "LogNormalLatency",
+    "NetworkProfile",
+    "UniformLatency",
+    "lazy_import",
+]
@@ -0,0 +1,239 @@
+"""An event store client that simulates a remote event store.
+
+The `FaultInjectingClient` wraps another client, such as the in-memory
+client, and adds the costs and failures of a remote event store to
+`append_to_stream` and `get_stream`:
+
+- A round-trip latency that's sampled from a distribution.
+- A transfer time for the event data, based on a bandwidth limit.
+- Failures at a configurable rate. A failure happens either before the
+  request reaches the event store, or after an append was committed,
+  when the response is lost. The latter is what makes retries unsafe
+  without idempotency.
+
+All random choices are made by a seeded random number generator, so a
+benchmark run can be reproduced exactly.
+"""
+
+from __future__ import annotations
+
+import inspect
+import math
+import random
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from typing import TYPE_CHECKING, Protocol
+
+import attrs
+from connect_four_solutions.helpers.lazy_import import lazy_import
+
+if TYPE_CHECKING:
+    import kurrentdbclient
+    from connect_four_solutions.exercise_03.persistence import game_repository
+else:
+    kurrentdbclient = lazy_import("kurrentdbclient")
+
+
+class ILatencyDistribution(Protocol):
+    """Interface for a distribution of round-trip latencies."""
+
+    def sample(self, rng: random.Random) -> float:
+        """Sample a latency.
+
+        :param rng: the random number generator to use
+        :return: the latency in seconds
+        """
+
+
+@attrs.define(frozen=True)
+class ConstantLatency:
+    """The same latency for every call."""
+
+    seconds: float
+
+    def sample(self, rng: random.Random) -> float:
+        """Return the constant latency."""
+        return self.seconds
+
+
+@attrs.define(frozen=True)
+class UniformLatency:
+    """A latency between a lower and an upper bound."""
+
+    low: float
+    high: float
+
+    def sample(self, rng: random.Random) -> float:
+        """Sample a latency from the uniform distribution."""
+        return rng.uniform(self.low, self.high)
+
+
+@attrs.define(frozen=True)
+class LogNormalLatency:
+    """A latency with a long tail, as is typical for network calls.
+
+    The distribution is described by its median and the spread `sigma`
+    of the underlying normal distribution. A sigma of 0.5 puts the 99th
+    percentile at about three times the median.
+    """
+
+    median: float
+    sigma: float = 0.5
+
+    def sample(self, rng: random.Random) -> float:
+        """Sample a latency from the log-normal distribution."""
+        return rng.lognormvariate(math.log(self.median), self.sigma)
+
+
+@attrs.define(frozen=True)
+class NetworkProfile:
+    """The simulated network conditions for a kind of call.
+
+    :param latency: the distribution of the round-trip latency
+    :param bytes_per_second: the bandwidth for the event data and
+      metadata, or None for an unlimited bandwidth
+    :param error_rate: the fraction of calls that fail before they
+      reach the event store
+    :param lost_response_rate: the fraction of calls that fail after
+      the event store handled them
+    """
+
+    latency: ILatencyDistribution = ConstantLatency(0.0)
+    bytes_per_second: float | None = None
+    error_rate: float = 0.0
+    lost_response_rate: float = 0.0
+
+
+@attrs.define
+class FaultInjectingClient:
+    """Wrap an event store client with simulated latency and failures.
+
+    `read_all` is passed through without any simulated costs, as it's
+    only used by bulk tools that read the store in a single pass. Its
+    timeout is passed on to the wrapped client, if that accepts one.
+    """
+
+    _client: game_repository.IEventStoreClient
+    _append_profile: NetworkProfile = NetworkProfile()
+    _read_profile: NetworkProfile = NetworkProfile()
+    _seed: int = 0
+    _sleep: Callable[[float], object] = time.sleep
+    _rng: random.Random = attrs.field(init=False)
+    _rng_lock: threading.Lock = attrs.field(init=False, factory=threading.Lock)
+    _forwards_read_all_timeout: bool = attrs.field(init=False)
+
+    @_rng.default
+    def _create_rng(self) -> random.Random:
+        """Seed the random number generator."""
+        return random.Random(self._seed)
+
+    @_forwards_read_all_timeout.default
+    def _check_read_all_timeout(self) -> bool:
+        """Check if `read_all` of the wrapped client accepts a timeout."""
+        return "timeout" in inspect.signature(self._client.read_all).parameters
+
+    def append_to_stream(
+        self,
+        /,
+        stream_name: str,
+        *,
+        current_version: int | kurrentdbclient.StreamState,
+        events: kurrentdbclient.NewEvent | Iterable[kurrentdbclient.NewEvent],
+        timeout: float | None = None,
+    ) -> int:
+        """Append events after a simulated round-trip.
+
+        :raises kurrentdbclient.exceptions.ServiceUnavailable: for an
+          injected failure
+        :raises kurrentdbclient.exceptions.DeadlineExceeded: if the
+          simulated round-trip takes longer than the timeout
+        """
+        if isinstance(events, kurrentdbclient.NewEvent):
+            events = (events,)
+        events = list(events)
+        size = sum(len(event.data) + len(event.metadata) for event in events)
+        loses_response = self._simulate(self._append_profile, size, timeout)
+        commit_position = self._client.append_to_stream(
+            stream_name, current_version=current_version, events=events
+        )
+        if loses_response:
+            raise kurrentdbclient.exceptions.ServiceUnavailable(
+                "Injected failure after the events were appended."
+            )
+        return commit_position
+
+    def get_stream(
+        self, stream_name: str, timeout: float | None = None
+    ) -> Sequence[kurrentdbclient.RecordedEvent]:
+        """Get the events of a stream after a simulated round-trip.
+
+        :raises kurrentdbclient.exceptions.ServiceUnavailable: for an
+          injected failure
+        :raises kurrentdbclient.exceptions.DeadlineExceeded: if the
+          simulated round-trip takes longer than the timeout
+        """
+        # The transfer time depends on the size of the response, so the
+        # stream is read before the round-trip is simulated. Reading has
+        # no side effects, so that's not observable.
+        try:
+            recorded_events = self._client.get_stream(stream_name)
+        except Exception:
+            self._simulate(self._read_profile, 0, timeout)
+            raise
+        size = sum(len(e.data) + len(e.metadata) for e in recorded_events)
+        if self._simulate(self._read_profile, size, timeout):
+            raise kurrentdbclient.exceptions.ServiceUnavailable(
+                "Injected failure while receiving the events."
+            )
+        return recorded_events
+
+    def read_all(
+        self,
+        *,
+        commit_position: int | None = None,
+        filter_include: Sequence[str] = (),
+        filter_by_stream_name: bool = False,
+        limit: int = 2**63 - 1,
+        timeout: float | None = None,
+    ) -> Iterator[kurrentdbclient.RecordedEvent]:
+        """Read events from all streams without simulated costs."""
+        return self._client.read_all(
+            commit_position=commit_position,
+            filter_include=filter_include,
+            filter_by_stream_name=filter_by_stream_name,
+            limit=limit,
+            **(
+                {"timeout": timeout}
+                if timeout is not None and self._forwards_read_all_timeout
+                else {}
+            ),
+        )
+
+    def _simulate(
+        self, profile: NetworkProfile, size: int, timeout: float | None
+    ) -> bool:
+        """Wait for the simulated round-trip and inject failures.
+
+        :param profile: the network conditions to simulate
+        :param size: the number of bytes to transfer
+        :param timeout: the timeout of the call, if any
+        :return: True if the response of the call should be lost
+        """
+        with self._rng_lock:
+            delay = profile.latency.sample(self._rng)
+            outcome = self._rng.random()
+        if profile.bytes_per_second is not None:
+            delay += size / profile.bytes_per_second
+
+        if timeout is not None and delay > timeout:
+            self._sleep(timeout)
+            raise kurrentdbclient.exceptions.DeadlineExceeded(
+                f"Simulated call took {delay:.3f}s, timeout was {timeout:.3f}s."
+            )
+        if outcome < profile.error_rate:
+            # The request is lost on its way to the event store.
+            self._sleep(delay / 2)
+            raise kurrentdbclient.exceptions.ServiceUnavailable("Injected failure.")
+        self._sleep(delay)
+        return outcome < profile.error_rate + profile.lost_response_rate
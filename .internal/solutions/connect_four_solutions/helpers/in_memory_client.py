@@ -1,12 +1,39 @@
-from typing import ClassVar, Iterable, Sequence
+from __future__ import annotations
 
-import kurrentdbclient
-from kurrentdbclient import exceptions as kdb_exceptions
+import dataclasses
+import json
+import re
+import threading
+from typing import TYPE_CHECKING, Iterable, Iterator, Sequence
+
+from connect_four_solutions.helpers.lazy_import import lazy_import
+
+if TYPE_CHECKING:
+    import kurrentdbclient
+else:
+    kurrentdbclient = lazy_import("kurrentdbclient")
 
 
 class InMemoryEventStoreClient:
 
-    _store: ClassVar[dict[str, list[kurrentdbclient.RecordedEvent]]] = {}
+    # The class attributes are the store that's shared by all clients;
+    # an isolated client replaces them with instance attributes.
+    _store: dict[str, list[kurrentdbclient.RecordedEvent]] = {}
+    _log: list[kurrentdbclient.RecordedEvent] = []
+    _lock: threading.Lock = threading.Lock()
+
+    def __init__(self, *, isolated: bool = False) -> None:
+        """Create a client for the shared in-memory store.
+
+        Args:
+            isolated: Give the client a store of its own instead, for
+              when multiple stores are needed, like the shards of a
+              `ShardedEventStoreClient`.
+        """
+        if isolated:
+            self._store = {}
+            self._log = []
+            self._lock = threading.Lock()
 
     def append_to_stream(
         self,
@@ -22,40 +49,49 @@ class InMemoryEventStoreClient:
             stream_name: The name of the stream (positional-only)
             current_version: The current version of the stream, provided
               as a keyword argument. For exercise 03, this is always
-              kurrentdbclient.StreamState.ANY.
+              kurrentdbclient.StreamState.ANY, but the version is
+              checked like KurrentDB does.
             events: The event or events to append to the stream, as a
               keyword argument. If you want to append multiple events,
               you have to provide an iterable of events (e.g., a list).
 
         Returns:
             The commit position of the last committed event.
+
+        Raises:
+            kurrentdbclient.exceptions.WrongCurrentVersion: If the
+              current version of the stream doesn't match.
         """
-        stream = self._store.setdefault(stream_name, [])
-        initial_len = len(stream)
         if isinstance(events, kurrentdbclient.NewEvent):
             events = (events,)
 
         if not events:
             raise ValueError("No events to append")
 
-        for i, event in enumerate(events):
-            recorded_event = kurrentdbclient.RecordedEvent(
-                type=event.type,
-                data=event.data,
-                metadata=event.metadata,
-                content_type=event.content_type,
-                id=event.id,
-                stream_name=stream_name,
-                stream_position=initial_len + i,
-                commit_position=None,
-                prepare_position=None,
-                recorded_at=None,
-                link=None,
-                retry_count=None,
-            )
-            stream.append(recorded_event)
-
-        return len(stream) - 1
+        with self._lock:
+            stream = self._store.get(stream_name, [])
+            check_current_version(stream_name, len(stream) - 1, current_version)
+            self._store[stream_name] = stream
+            initial_len = len(stream)
+            for i, event in enumerate(events):
+                recorded_event = kurrentdbclient.RecordedEvent(
+                    type=event.type,
+                    data=event.data,
+                    metadata=event.metadata,
+                    content_type=event.content_type,
+                    id=event.id,
+                    stream_name=stream_name,
+                    stream_position=initial_len + i,
+                    commit_position=None,
+                    prepare_position=None,
+                    recorded_at=None,
+                    link=None,
+                    retry_count=None,
+                )
+                stream.append(recorded_event)
+                self._log.append(recorded_event)
+
+            return len(stream) - 1
 
     def get_stream(self, stream_name: str) -> Sequence[kurrentdbclient.RecordedEvent]:
         """Get events from a stream.
@@ -65,12 +101,90 @@ class InMemoryEventStoreClient:
 
         Returns:
             A sequence of events from the stream in the order they were
-            committed to the stream.
+            committed to the stream. Like KurrentDB, events before the
+            `$tb` ("truncate before") position in the metadata of the
+            stream are left out.
 
         Raises:
-            kdb_exceptions.NotFound: If the stream does not exist.
+            kurrentdbclient.exceptions.NotFound: If the stream does not
+              exist.
         """
         try:
-            return tuple(self._store[stream_name])
+            stream = self._store[stream_name]
         except KeyError:
-            raise kdb_exceptions.NotFound(f"Stream {stream_name!r} not found") from None
+            raise kurrentdbclient.exceptions.NotFound(
+                f"Stream {stream_name!r} not found"
+            ) from None
+        # Stream metadata is stored in the "$$<stream name>" stream.
+        if metadata_stream := self._store.get(f"$${stream_name}"):
+            metadata = json.loads(metadata_stream[-1].data)
+            # The position of an event is its index in the stream.
+            return tuple(stream[metadata.get("$tb", 0) :])
+        return tuple(stream)
+
+    def read_all(
+        self,
+        *,
+        commit_position: int | None = None,
+        filter_include: Sequence[str] = (),
+        filter_by_stream_name: bool = False,
+        limit: int = 2**63 - 1,
+    ) -> Iterator[kurrentdbclient.RecordedEvent]:
+        """Read events from all streams in the order they were committed.
+
+        The in-memory store doesn't assign commit positions to the
+        events it stores. Instead, the events yielded by this method
+        carry their index in the global log as their commit position.
+
+        Args:
+            commit_position: The commit position to start reading from,
+              inclusive. Reads from the start of the log if omitted.
+            filter_include: Regular expressions; if given, only events
+              with a type (or stream name) that fully matches one of
+              them are yielded.
+            filter_by_stream_name: Match the filter against the stream
+              name instead of the event type.
+            limit: The maximum number of events to yield.
+
+        Returns:
+            An iterator of recorded events.
+        """
+        patterns = [re.compile(pattern) for pattern in filter_include]
+        start = commit_position or 0
+        yielded = 0
+        for position in range(start, len(self._log)):
+            if yielded >= limit:
+                return
+            event = self._log[position]
+            subject = event.stream_name if filter_by_stream_name else event.type
+            if patterns and not any(p.fullmatch(subject) for p in patterns):
+                continue
+            yielded += 1
+            yield dataclasses.replace(event, commit_position=position)
+
+
+def check_current_version(
+    stream_name: str,
+    actual_version: int,
+    current_version: int | kurrentdbclient.StreamState,
+) -> None:
+    """Check the expected version of a stream like KurrentDB does.
+
+    :param stream_name: the name of the stream
+    :param actual_version: the position of the last event in the
+      stream, or -1 if the stream doesn't exist
+    :param current_version: the version that the client expects
+    """
+    match current_version:
+        case kurrentdbclient.StreamState.ANY:
+            return
+        case kurrentdbclient.StreamState.NO_STREAM if actual_version == -1:
+            return
+        case kurrentdbclient.StreamState.EXISTS if actual_version >= 0:
+            return
+        case int() if current_version == actual_version:
+            return
+    raise kurrentdbclient.exceptions.WrongCurrentVersion(
+        f"Stream {stream_name!r} is at version {actual_version},"
+        f" expected {current_version}"
+    )
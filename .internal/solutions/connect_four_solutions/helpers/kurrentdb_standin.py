@@ -0,0 +1,330 @@
+"""A local stand-in for a KurrentDB server.
+
+The `KurrentDBStandIn` serves the part of the KurrentDB gRPC protocol
+that `KurrentDBClient.append_to_stream`, `get_stream` and `read_all`
+use, on a free port on localhost. The events are stored by another
+event store client, by default an isolated in-memory client, so each
+server starts out empty.
+
+This makes it possible to run the tests and benchmarks with a real
+`KurrentDBClient`, including its serialization and gRPC connection
+overhead, without a KurrentDB server:
+
+    with KurrentDBStandIn() as server:
+        client = kurrentdbclient.KurrentDBClient(server.uri)
+
+Subscriptions, backwards reads and all other services aren't
+implemented and are answered with an UNIMPLEMENTED status.
+
+Unlike the other helpers, this module imports gRPC and kurrentdbclient
+eagerly, so it isn't imported by `connect_four_solutions.helpers`.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import re
+import uuid
+from collections.abc import Iterable, Iterator
+from types import TracebackType
+from typing import TYPE_CHECKING
+
+import attrs
+import grpc
+import kurrentdbclient
+from connect_four_solutions.helpers import in_memory_client
+from google.protobuf import any_pb2
+from kurrentdbclient.protos.Grpc import (
+    code_pb2,
+    shared_pb2,
+    status_pb2,
+    streams_pb2,
+    streams_pb2_grpc,
+)
+
+if TYPE_CHECKING:
+    from connect_four_solutions.exercise_03.persistence import game_repository
+
+
+@attrs.define
+class KurrentDBStandIn:
+    """An in-process gRPC server that stands in for KurrentDB."""
+
+    _client: game_repository.IEventStoreClient = attrs.field(
+        factory=lambda: in_memory_client.InMemoryEventStoreClient(isolated=True)
+    )
+    _max_workers: int = 8
+    _server: grpc.Server | None = attrs.field(init=False, default=None)
+    _port: int | None = attrs.field(init=False, default=None)
+
+    @property
+    def uri(self) -> str:
+        """The connection string for a `KurrentDBClient`.
+
+        :raises RuntimeError: if the server isn't running
+        """
+        if self._port is None:
+            raise RuntimeError("The stand-in server isn't running.")
+        return f"kdb://127.0.0.1:{self._port}?tls=false"
+
+    def start(self) -> None:
+        """Start serving on a free port."""
+        if self._server is not None:
+            return
+        server = grpc.server(concurrent.futures.ThreadPoolExecutor(self._max_workers))
+        streams_pb2_grpc.add_StreamsServicer_to_server(
+            _StreamsServicer(self._client), server
+        )
+        self._port = server.add_insecure_port("127.0.0.1:0")
+        server.start()
+        self._server = server
+
+    def stop(self, grace: float | None = None) -> None:
+        """Stop serving, aborting calls that are still in progress.
+
+        :param grace: the number of seconds to let calls finish
+        """
+        if self._server is not None:
+            self._server.stop(grace).wait()
+            self._server, self._port = None, None
+
+    def __enter__(self) -> KurrentDBStandIn:
+        """Start the server."""
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Stop the server."""
+        self.stop()
+
+
+class _StreamsServicer(streams_pb2_grpc.StreamsServicer):
+    """The Streams service, translated to calls on an event store client."""
+
+    def __init__(self, client: game_repository.IEventStoreClient) -> None:
+        """Initialize the servicer.
+
+        :param client: the client that stores the events
+        """
+        self._client = client
+
+    def Append(
+        self,
+        request_iterator: Iterator[streams_pb2.AppendReq],
+        context: grpc.ServicerContext,
+    ) -> streams_pb2.AppendResp:
+        """Append the proposed messages that follow the options."""
+        options = next(request_iterator).options
+        stream_name = options.stream_identifier.stream_name.decode("utf8")
+        match options.WhichOneof("expected_stream_revision"):
+            case "revision":
+                current_version = options.revision
+            case "no_stream":
+                current_version = kurrentdbclient.StreamState.NO_STREAM
+            case "stream_exists":
+                current_version = kurrentdbclient.StreamState.EXISTS
+            case _:
+                current_version = kurrentdbclient.StreamState.ANY
+        events = [_to_new_event(req.proposed_message) for req in request_iterator]
+
+        try:
+            commit_position = self._client.append_to_stream(
+                stream_name, current_version=current_version, events=events
+            )
+        except kurrentdbclient.exceptions.WrongCurrentVersion:
+            wrong_version = streams_pb2.AppendResp.WrongExpectedVersion()
+            if (revision := self._get_revision(stream_name)) is None:
+                wrong_version.current_no_stream.CopyFrom(shared_pb2.Empty())
+            else:
+                wrong_version.current_revision = revision
+            return streams_pb2.AppendResp(wrong_expected_version=wrong_version)
+
+        return streams_pb2.AppendResp(
+            success=streams_pb2.AppendResp.Success(
+                position=streams_pb2.AppendResp.Position(
+                    commit_position=commit_position, prepare_position=commit_position
+                )
+            )
+        )
+
+    def BatchAppend(
+        self,
+        request_iterator: Iterator[streams_pb2.BatchAppendReq],
+        context: grpc.ServicerContext,
+    ) -> Iterator[streams_pb2.BatchAppendResp]:
+        """Append each batch in a single call to the event store client.
+
+        The client sends every batch with `is_final` set, so batches
+        that are split over several requests aren't supported.
+        """
+        for request in request_iterator:
+            options = request.options
+            stream_name = options.stream_identifier.stream_name.decode("utf8")
+            match options.WhichOneof("expected_stream_position"):
+                case "stream_position":
+                    current_version = options.stream_position
+                case "no_stream":
+                    current_version = kurrentdbclient.StreamState.NO_STREAM
+                case "stream_exists":
+                    current_version = kurrentdbclient.StreamState.EXISTS
+                case _:
+                    current_version = kurrentdbclient.StreamState.ANY
+            events = [_to_new_event(message) for message in request.proposed_messages]
+            response = streams_pb2.BatchAppendResp(
+                correlation_id=request.correlation_id,
+                stream_identifier=options.stream_identifier,
+            )
+
+            try:
+                commit_position = self._client.append_to_stream(
+                    stream_name, current_version=current_version, events=events
+                )
+            except kurrentdbclient.exceptions.WrongCurrentVersion as error:
+                wrong_version = shared_pb2.WrongExpectedVersion()
+                if (revision := self._get_revision(stream_name)) is None:
+                    wrong_version.current_no_stream.CopyFrom(shared_pb2.Empty())
+                else:
+                    wrong_version.current_stream_revision = revision
+                details = any_pb2.Any()
+                details.Pack(wrong_version)
+                response.error.CopyFrom(
+                    status_pb2.Status(
+                        code=code_pb2.FAILED_PRECONDITION,
+                        message=str(error),
+                        details=details,
+                    )
+                )
+            else:
+                response.success.position.commit_position = commit_position
+                response.success.position.prepare_position = commit_position
+            yield response
+
+    def Read(
+        self, request: streams_pb2.ReadReq, context: grpc.ServicerContext
+    ) -> Iterator[streams_pb2.ReadResp]:
+        """Read the events of a stream or of all streams, forwards."""
+        options = request.options
+        if (
+            options.WhichOneof("count_option") != "count"
+            or options.read_direction != streams_pb2.ReadReq.Options.Forwards
+        ):
+            context.abort(
+                grpc.StatusCode.UNIMPLEMENTED,
+                "Only reading forwards without a subscription is supported.",
+            )
+
+        if options.WhichOneof("stream_option") == "stream":
+            events = self._read_stream(options.stream)
+            if events is None:
+                yield streams_pb2.ReadResp(
+                    stream_not_found=streams_pb2.ReadResp.StreamNotFound(
+                        stream_identifier=options.stream.stream_identifier
+                    )
+                )
+                return
+        else:
+            events = self._read_all(options)
+
+        for count, event in enumerate(events):
+            if count >= options.count:
+                return
+            yield streams_pb2.ReadResp(event=_to_read_event(event))
+
+    def _read_stream(
+        self, options: streams_pb2.ReadReq.Options.StreamOptions
+    ) -> Iterable[kurrentdbclient.RecordedEvent] | None:
+        """The events of a stream, or None if it doesn't exist.
+
+        A truncated stream doesn't start at revision 0, so the events are
+        selected by the revisions that are stored with them.
+        """
+        stream_name = options.stream_identifier.stream_name.decode("utf8")
+        try:
+            events = self._client.get_stream(stream_name)
+        except kurrentdbclient.exceptions.NotFound:
+            return None
+        match options.WhichOneof("revision_option"):
+            case "revision":
+                return [e for e in events if e.stream_position >= options.revision]
+            case "end":
+                return ()
+            case _:
+                return events
+
+    def _read_all(
+        self, options: streams_pb2.ReadReq.Options
+    ) -> Iterator[kurrentdbclient.RecordedEvent]:
+        """The events of all streams that pass the filter of the request."""
+        commit_position = None
+        if options.all.WhichOneof("all_option") == "position":
+            commit_position = options.all.position.commit_position
+        elif options.all.WhichOneof("all_option") == "end":
+            return
+
+        # The client turns its filter into a single regular expression,
+        # which is matched as-is instead of the client's patterns.
+        pattern, by_stream_name = None, False
+        if options.WhichOneof("filter_option") == "filter":
+            filter_options = options.filter
+            by_stream_name = filter_options.WhichOneof("filter") == "stream_identifier"
+            expression = getattr(filter_options, filter_options.WhichOneof("filter"))
+            pattern = re.compile(expression.regex)
+
+        for event in self._client.read_all(commit_position=commit_position):
+            subject = event.stream_name if by_stream_name else event.type
+            if pattern is None or pattern.search(subject):
+                yield event
+
+    def _get_revision(self, stream_name: str) -> int | None:
+        """The position of the last event in a stream, if it exists."""
+        try:
+            events = self._client.get_stream(stream_name)
+        except kurrentdbclient.exceptions.NotFound:
+            return None
+        return events[-1].stream_position if events else None
+
+
+def _to_new_event(
+    message: (
+        streams_pb2.AppendReq.ProposedMessage
+        | streams_pb2.BatchAppendReq.ProposedMessage
+    ),
+) -> kurrentdbclient.NewEvent:
+    """Convert a proposed message to the event that was proposed."""
+    return kurrentdbclient.NewEvent(
+        type=message.metadata["type"],
+        data=message.data,
+        metadata=message.custom_metadata,
+        content_type=message.metadata["content-type"],
+        id=uuid.UUID(message.id.string),
+    )
+
+
+def _to_read_event(
+    event: kurrentdbclient.RecordedEvent,
+) -> streams_pb2.ReadResp.ReadEvent:
+    """Convert a recorded event to the message that's read by a client."""
+    recorded_event = streams_pb2.ReadResp.ReadEvent.RecordedEvent(
+        id=shared_pb2.UUID(string=str(event.id)),
+        stream_identifier=shared_pb2.StreamIdentifier(
+            stream_name=event.stream_name.encode("utf8")
+        ),
+        stream_revision=event.stream_position,
+        metadata={"type": event.type, "content-type": event.content_type},
+        custom_metadata=event.metadata,
+        data=event.data,
+    )
+    read_event = streams_pb2.ReadResp.ReadEvent()
+    if event.commit_position is None:
+        read_event.no_position.CopyFrom(shared_pb2.Empty())
+    else:
+        recorded_event.commit_position = event.commit_position
+        recorded_event.prepare_position = event.commit_position
+        read_event.commit_position = event.commit_position
+    read_event.event.CopyFrom(recorded_event)
+    return read_event
@@ -8,3 +8,8 @@ def pytest_addoption(parser) -> None:
         action="store_true",
         help="Use KurrentDB while running tests",
     )
+    parser.addoption(
+        "--use-kurrentdb-standin",
+        action="store_true",
+        help="Use KurrentDB with a local stand-in server while running tests",
+    )
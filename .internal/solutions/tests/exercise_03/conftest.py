@@ -1,16 +1,18 @@
 import argparse
+from collections.abc import Iterator
 
 import kurrentdbclient
 import pytest
 from _pytest import fixtures
 from connect_four_solutions import helpers
 from connect_four_solutions.exercise_03.persistence import game_repository
+from connect_four_solutions.helpers import kurrentdb_standin
 
 
 @pytest.fixture(scope="session")
 def event_store_client(
     request: fixtures.FixtureRequest,
-) -> game_repository.IEventStoreClient:
+) -> Iterator[game_repository.IEventStoreClient]:
     """Get an Event Store client.
 
     By default, this fixture will return an in-memory client. If you
@@ -19,9 +21,18 @@ def event_store_client(
 
         poetry run pytest --use-kurrentdb tests/exercise_03
 
+    To test with a real KurrentDBClient without a KurrentDB instance,
+    use the `--use-kurrentdb-standin` option instead, which starts a
+    local stand-in server for the duration of the test session.
+
     :return: an instance of esdbclient.EventStoreDBClient
     """
     if request.config.getoption("--use-kurrentdb"):
-        return kurrentdbclient.KurrentDBClient("kdb://localhost:2113?tls=false")
+        yield kurrentdbclient.KurrentDBClient("kdb://localhost:2113?tls=false")
+    elif request.config.getoption("--use-kurrentdb-standin"):
+        with kurrentdb_standin.KurrentDBStandIn() as server:
+            client = kurrentdbclient.KurrentDBClient(server.uri)
+            yield client
+            client.close()
     else:
-        return helpers.InMemoryEventStoreClient()
+        yield helpers.InMemoryEventStoreClient()
@@ -0,0 +1,106 @@
+from connect_four_solutions import helpers
+from connect_four_solutions.exercise_03 import persistence
+from connect_four_solutions.exercise_03.domain import enums
+from connect_four_solutions.exercise_03.domain import game as game_
+
+
+def _play_game(repository: persistence.GameRepository, columns: str) -> game_.Game:
+    """Play and store a game with the given moves."""
+    game = game_.Game()
+    game.start_game(player_one="p1", player_two="p2")
+    for column in columns:
+        game.make_move(game.next_player, enums.Column(column))
+    repository.add(game)
+    return game
+
+
+def test_archived_games_are_restored_from_a_single_event() -> None:
+    """A finished game is compacted and loads the same as before."""
+    # GIVEN a finished game and a game that's still going on
+    client = helpers.InMemoryEventStoreClient()
+    repository = persistence.GameRepository(client)
+    finished = _play_game(repository, "DEDEDED")
+    ongoing = _play_game(repository, "DE")
+    archiver = persistence.GameArchiver(client)
+
+    # WHEN both games are archived
+    compacted = [archiver.archive(finished.id), archiver.archive(ongoing.id)]
+
+    # THEN only the events of the finished game are compacted
+    assert compacted == [len(finished.events), 0]
+    # AND reading its stream returns a single summary event
+    [archived_event] = client.get_stream(f"game-{finished.id}")
+    assert archived_event.type == "GameArchived"
+    # AND the game is restored from that event
+    loaded = repository.get(finished.id)
+    assert loaded == game_.Game.load_from_history(finished.id, finished.events)
+    assert loaded.result is enums.GameResult.PLAYER_ONE_WON
+    # AND the ongoing game is untouched
+    assert len(client.get_stream(f"game-{ongoing.id}")) == 3
+    # AND archiving a game again doesn't change it
+    assert archiver.archive(finished.id) == 0
+    assert repository.get(finished.id) == loaded
+
+
+def test_archival_runs_compact_games_that_finished_since_the_last_run(
+    tmp_path,
+) -> None:
+    """Each run archives the newly finished games of a SQLite store."""
+    # GIVEN two finished games in a SQLite event store
+    client = persistence.SQLiteEventStoreClient(tmp_path / "events.db")
+    repository = persistence.GameRepository(client)
+    first_game = _play_game(repository, "DEDEDED")
+    second_game = _play_game(repository, "AABBCCD")
+    archiver = persistence.GameArchiver(client, batch_size=1)
+    feed = persistence.GameEventFeed(client)
+    feed_events = feed.poll()
+
+    # WHEN the archiver runs
+    summary = archiver.run()
+
+    # THEN both games are archived
+    assert summary == persistence.ArchiveSummary(
+        games_archived=2,
+        events_compacted=len(first_game.events) + len(second_game.events),
+    )
+    # AND the truncated events are deleted from the database
+    assert len(list(client.read_all(filter_include=("MoveMade",)))) == 0
+    # AND the feed doesn't see the summaries as new game events
+    assert feed.poll() == []
+    assert len(feed_events) == len(first_game.events) + len(second_game.events)
+
+    # WHEN another game finishes and the archiver runs again
+    third_game = _play_game(repository, "GFGFGFG")
+    summary = archiver.run()
+
+    # THEN only the new game is archived
+    assert summary.games_archived == 1
+    assert repository.get(third_game.id).result is enums.GameResult.PLAYER_ONE_WON
+    assert repository.get(second_game.id).result is enums.GameResult.PLAYER_ONE_WON
+    client.close()
+
+
+def test_feeds_read_archived_games_whose_events_were_deleted(tmp_path) -> None:
+    """A feed that starts after an archival reads the archived games."""
+    # GIVEN a feed that read the start of a game in a SQLite store
+    client = persistence.SQLiteEventStoreClient(tmp_path / "events.db")
+    repository = persistence.GameRepository(client)
+    game_id = _play_game(repository, "DE").id
+    feed = persistence.GameEventFeed(client)
+    started_events = feed.poll()
+    # AND the game finishes and is archived, which deletes its events
+    game = repository.get(game_id)
+    for column in "DEDED":
+        game.make_move(game.next_player, enums.Column(column))
+    repository.add(game)
+    persistence.GameArchiver(client).run()
+
+    # WHEN the feed and a new feed read the store
+    resumed_events = feed.poll()
+    new_events = persistence.GameEventFeed(client).poll()
+
+    # THEN the feed reads the rest of the game from its summary
+    assert [e for _, e in started_events + resumed_events] == game.events
+    # AND the new feed reads the whole game
+    assert new_events == [(game.id, event) for event in game.events]
+    client.close()
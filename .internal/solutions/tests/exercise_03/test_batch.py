@@ -0,0 +1,89 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from connect_four_solutions.exercise_03 import analytics
+from connect_four_solutions.exercise_03.domain import board, enums
+
+
+def _random_boards(count: int, seed: int) -> list[board.Board]:
+    """Play random games and collect boards at random points in time."""
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(count):
+        board_obj = board.Board()
+        token = enums.Token.YELLOW
+        number_of_moves = rng.randint(0, 42)
+        for _ in range(number_of_moves):
+            if board_obj.get_result() is not None:
+                break
+            columns = [c for c in enums.Column if board_obj.has_room_in_column(c)]
+            board_obj.add_move(rng.choice(columns), token)
+            token = (
+                enums.Token.RED if token == enums.Token.YELLOW else enums.Token.YELLOW
+            )
+        boards.append(board_obj)
+    return boards
+
+
+def test_batch_results_match_board_results() -> None:
+    """The vectorized results are equal to the results of `Board`."""
+    # GIVEN a few hundred boards in various stages of a game
+    boards = _random_boards(count=300, seed=1)
+    expected = [board_obj.get_result() for board_obj in boards]
+    # AND those boards packed into the grid format
+    grids = analytics.pack_board_states(b.board_state for b in boards)
+
+    # WHEN the results are computed in batch from grids and bitboards
+    grid_results = analytics.get_results(grids)
+    bitboard_results = analytics.get_results_from_bitboards(
+        analytics.grids_to_bitboards(grids)
+    )
+
+    # THEN the results equal the results computed by each board
+    assert analytics.decode_results(grid_results) == expected
+    assert analytics.decode_results(bitboard_results) == expected
+    # AND the sample contains finished and unfinished games
+    assert None in expected
+    assert enums.GameResult.PLAYER_ONE_WON in expected
+
+
+def test_pack_board_states_puts_first_token_in_bottom_row() -> None:
+    """The first token in a column ends up in row 0."""
+    # GIVEN a board with two tokens in column C
+    board_obj = board.Board()
+    board_obj.add_move(enums.Column.C, enums.Token.YELLOW)
+    board_obj.add_move(enums.Column.C, enums.Token.RED)
+
+    # WHEN the board state is packed
+    [grid] = analytics.pack_board_states([board_obj.board_state])
+
+    # THEN the tokens are in the bottom rows of the third column
+    assert grid[0, 2] == analytics.batch.YELLOW
+    assert grid[1, 2] == analytics.batch.RED
+    assert np.count_nonzero(grid) == 2
+
+
+def test_full_board_without_winner_is_tied() -> None:
+    """A filled board without four connected tokens is a tie."""
+    # GIVEN a filled board without a winning line
+    pattern = [1, 1, 1, 2, 1, 2, 2]
+    inverted = [3 - cell for cell in pattern]
+    grid = np.array(
+        [pattern, inverted, inverted, pattern, pattern, inverted], dtype=np.int8
+    )
+    # AND the same board as a `Board`
+    board_obj = board.Board()
+    for row in grid:
+        for column, cell in zip(enums.Column, row):
+            token = enums.Token.YELLOW if cell == 1 else enums.Token.RED
+            board_obj.add_move(column, token)
+
+    # WHEN the result is computed
+    [result] = analytics.decode_results(analytics.get_results(grid[np.newaxis]))
+
+    # THEN the game is tied, just like the board says
+    assert result == enums.GameResult.TIED
+    assert board_obj.get_result() == enums.GameResult.TIED
@@ -0,0 +1,101 @@
+import pytest
+from connect_four_solutions.exercise_03.domain import board, enums
+
+
+def test_incremental_hash_matches_hash_of_equivalent_state() -> None:
+    """The hash updated per move equals the hash of the final state."""
+    # GIVEN a board that receives a number of moves
+    board_obj = board.Board()
+    for column, token in [
+        (enums.Column.D, enums.Token.YELLOW),
+        (enums.Column.D, enums.Token.RED),
+        (enums.Column.C, enums.Token.YELLOW),
+        (enums.Column.G, enums.Token.RED),
+    ]:
+        board_obj.add_move(column, token)
+
+    # WHEN a new board is created from the resulting state
+    restored = board.Board(board_obj.board_state)
+
+    # THEN both boards have the same hash
+    assert restored.zobrist_hash == board_obj.zobrist_hash
+    assert restored.position_key == board_obj.position_key
+
+
+def test_empty_board_has_zero_hash() -> None:
+    """An empty board hashes to zero."""
+    # GIVEN an empty board
+    board_obj = board.Board()
+
+    # THEN the hash and position key are zero
+    assert board_obj.zobrist_hash == 0
+    assert board_obj.position_key == 0
+
+
+def test_different_positions_have_different_keys() -> None:
+    """Swapping token colors results in a different position key."""
+    # GIVEN two boards with the same moves, but with swapped colors
+    board_one = board.Board()
+    board_one.add_move(enums.Column.A, enums.Token.YELLOW)
+    board_two = board.Board()
+    board_two.add_move(enums.Column.A, enums.Token.RED)
+
+    # THEN the position keys differ
+    assert board_one.position_key != board_two.position_key
+
+
+def test_mirrored_positions_share_position_key() -> None:
+    """A position and its mirror image have the same position key."""
+    # GIVEN a board with tokens on the left-hand side
+    board_one = board.Board()
+    board_one.add_move(enums.Column.A, enums.Token.YELLOW)
+    board_one.add_move(enums.Column.B, enums.Token.RED)
+    # AND a board with the mirrored tokens on the right-hand side
+    board_two = board.Board()
+    board_two.add_move(enums.Column.G, enums.Token.YELLOW)
+    board_two.add_move(enums.Column.F, enums.Token.RED)
+
+    # THEN the raw hashes differ
+    assert board_one.zobrist_hash != board_two.zobrist_hash
+    # AND the position keys are equal
+    assert board_one.position_key == board_two.position_key
+
+
+def test_taller_board_wins_with_a_line_above_the_sixth_row() -> None:
+    """A variant board detects lines that don't fit on a standard board."""
+    # GIVEN a board with 8 rows
+    board_obj = board.Board(geometry=board.Geometry(rows=8))
+    # AND a column with two red tokens below four yellow tokens
+    for token in [enums.Token.RED] * 2 + [enums.Token.YELLOW] * 3:
+        board_obj.add_move(enums.Column.A, token)
+    assert board_obj.get_result() is None
+
+    # WHEN the fourth yellow token is added to the column
+    board_obj.add_move(enums.Column.A, enums.Token.YELLOW)
+
+    # THEN yellow has won, with tokens in rows 3 to 6
+    assert board_obj.get_result() is enums.GameResult.PLAYER_ONE_WON
+    # AND the column has room for two more tokens
+    assert board_obj.has_room_in_column(enums.Column.A)
+
+
+def test_connect_five_needs_five_tokens_in_a_row() -> None:
+    """Four connected tokens don't win a game of Connect-5."""
+    # GIVEN a Connect-5 board with four yellow tokens on a diagonal
+    board_obj = board.Board(geometry=board.Geometry(rows=7, connect=5))
+    columns = list(enums.Column)
+    for index, column in enumerate(columns[:5]):
+        for _ in range(index):
+            board_obj.add_move(column, enums.Token.RED)
+    for column in columns[:4]:
+        board_obj.add_move(column, enums.Token.YELLOW)
+    assert board_obj.get_result() is None
+
+    # WHEN the fifth token of the diagonal is added
+    board_obj.add_move(columns[4], enums.Token.YELLOW)
+
+    # THEN yellow has won
+    assert board_obj.get_result() is enums.GameResult.PLAYER_ONE_WON
+    # AND a geometry that doesn't fit the columns is rejected
+    with pytest.raises(ValueError):
+        board.Geometry(columns=8)
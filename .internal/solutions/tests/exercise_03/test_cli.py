@@ -0,0 +1,54 @@
+import pytest
+from connect_four_solutions.exercise_03 import cli
+
+
+def test_replay_plays_each_line_of_a_script_as_a_game(tmp_path, capsys) -> None:
+    """A move script is played without prompts, one game per line."""
+    # GIVEN a script with a win for player one and an unfinished game
+    script = tmp_path / "games.txt"
+    script.write_text("# Player one wins vertically\nA B A B A B A\n\nDDC\n")
+
+    # WHEN the script is replayed
+    cli.main(["replay", str(script), "--players", "alice", "bob"])
+
+    # THEN a line is printed for each game
+    [first, second] = capsys.readouterr().out.splitlines()
+    assert first.endswith("\t7 moves\talice has won")
+    assert second.endswith("\t3 moves\tin progress, next player: bob")
+
+    # AND the replayed game can be shown by its ID
+    cli.main(["show", first.split("\t")[0]])
+    assert "alice vs. bob" in capsys.readouterr().out
+
+
+def test_replay_reports_the_line_of_an_invalid_move(tmp_path) -> None:
+    """An invalid move stops the replay with the location of the move."""
+    # GIVEN a script that overfills a column
+    script = tmp_path / "games.txt"
+    script.write_text("DDDDDDD\n")
+
+    # WHEN the script is replayed
+    # THEN the replay stops with the line and move that failed
+    with pytest.raises(SystemExit, match=r"Line 1, move 7 \(D\)"):
+        cli.main(["replay", str(script)])
+
+
+def test_bench_reports_throughput_and_latency(capsys) -> None:
+    """The benchmark plays scripted games and reports on the moves."""
+    # WHEN a few games are benchmarked
+    cli.main(["bench", "--games", "3", "--seed", "1"])
+
+    # THEN the throughput and latency percentiles are reported
+    output = capsys.readouterr().out
+    assert output.startswith("Played 3 games")
+    assert "moves/s" in output
+    assert "p50" in output and "p99" in output
+
+
+def test_bench_rejects_fewer_than_one_game(capsys) -> None:
+    """The benchmark needs at least one game to report percentiles."""
+    # WHEN zero games are benchmarked
+    # THEN the arguments are rejected
+    with pytest.raises(SystemExit):
+        cli.main(["bench", "--games", "0"])
+    assert "must be at least 1" in capsys.readouterr().err
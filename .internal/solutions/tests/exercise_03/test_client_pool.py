@@ -0,0 +1,174 @@
+import threading
+import time
+
+import kurrentdbclient
+import pytest
+from connect_four_solutions import helpers
+from connect_four_solutions.exercise_03 import application, persistence
+
+
+class _SlowClient(helpers.InMemoryEventStoreClient):
+    """An in-memory client with latency that tracks concurrent calls."""
+
+    active = 0
+    max_active = 0
+    timeouts: list[float | None] = []
+    _counter_lock = threading.Lock()
+
+    def __init__(self, latency: float) -> None:
+        self._latency = latency
+
+    def get_stream(self, stream_name, timeout=None):
+        with self._counter_lock:
+            type(self).active += 1
+            type(self).max_active = max(type(self).max_active, type(self).active)
+        self.timeouts.append(timeout)
+        time.sleep(self._latency)
+        with self._counter_lock:
+            type(self).active -= 1
+        return super().get_stream(stream_name)
+
+    def append_to_stream(
+        self, /, stream_name, *, current_version, events, timeout=None
+    ):
+        return super().append_to_stream(
+            stream_name, current_version=current_version, events=events
+        )
+
+
+@pytest.fixture
+def slow_client_class() -> type[_SlowClient]:
+    """A fresh subclass, so the counters are isolated per test."""
+    return type("SlowClient", (_SlowClient,), {"timeouts": []})
+
+
+def test_pool_bounds_the_number_of_concurrent_calls(slow_client_class) -> None:
+    """No more than `size` calls are made at the same time."""
+    # GIVEN a pool of two slow clients behind a repository
+    pool = persistence.EventStoreClientPool(lambda: slow_client_class(0.02), size=2)
+    app = application.ConnectFourApp(persistence.GameRepository(pool))
+    game_id = app.create_game(player_one="p1", player_two="p2")
+
+    # WHEN eight threads read the game at the same time
+    threads = [threading.Thread(target=app.get_game, args=(game_id,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # THEN at most two reads were in progress at once
+    assert slow_client_class.max_active == 2
+
+
+def test_waiting_for_a_client_times_out(slow_client_class) -> None:
+    """A call fails if no client becomes available in time."""
+    # GIVEN a pool with a single client that's busy
+    pool = persistence.EventStoreClientPool(
+        lambda: slow_client_class(0.2), size=1, acquire_timeout=0.01
+    )
+    pool.append_to_stream("pool-stream", current_version=-1, events=_new_event())
+    busy = threading.Thread(target=pool.get_stream, args=("pool-stream",))
+    busy.start()
+    time.sleep(0.05)
+
+    # WHEN another call is made
+    # THEN it times out waiting for a client
+    with pytest.raises(persistence.PoolTimeoutError):
+        pool.get_stream("pool-stream")
+    busy.join()
+
+
+def test_calls_get_the_time_left_until_the_deadline(slow_client_class) -> None:
+    """The remaining time is passed on and expired deadlines are enforced."""
+    # GIVEN a pool and a stream
+    pool = persistence.EventStoreClientPool(lambda: slow_client_class(0.05))
+    pool.append_to_stream("deadline-stream", current_version=-1, events=_new_event())
+
+    # WHEN two calls are made within a deadline of 80 ms
+    with pool.deadline(0.08):
+        pool.get_stream("deadline-stream")
+
+        # THEN the first call gets (nearly) all the time as its timeout
+        [timeout] = slow_client_class.timeouts
+        assert 0.07 < timeout <= 0.08
+        # AND the second call fails once the deadline has passed
+        time.sleep(0.05)
+        with pytest.raises(persistence.DeadlineExceededError):
+            pool.get_stream("deadline-stream")
+
+
+def test_unhealthy_clients_are_replaced() -> None:
+    """A client that fails its health check isn't used again."""
+    # GIVEN a pool whose first client fails its health check
+    clients = []
+
+    def create_client() -> helpers.InMemoryEventStoreClient:
+        clients.append(helpers.InMemoryEventStoreClient())
+        return clients[-1]
+
+    pool = persistence.EventStoreClientPool(
+        create_client,
+        size=1,
+        health_check=lambda client: client is not clients[0],
+        health_check_interval=0,
+    )
+
+    # WHEN a call is made
+    pool.append_to_stream("health-stream", current_version=-1, events=_new_event())
+
+    # THEN the call was made with a replacement client
+    assert len(clients) == 2
+
+
+def test_timeouts_are_only_passed_to_methods_that_accept_them(
+    slow_client_class,
+) -> None:
+    """A client's methods are checked one by one for a timeout argument."""
+    # GIVEN a pool with a call timeout of clients whose `get_stream`
+    # accepts a timeout, while `read_all` doesn't
+    pool = persistence.EventStoreClientPool(
+        lambda: slow_client_class(0), call_timeout=1.0
+    )
+    pool.append_to_stream("timeout-stream", current_version=-1, events=_new_event())
+
+    # WHEN all events are read
+    # THEN the call is made without a timeout
+    assert len(list(pool.read_all(limit=1))) == 1
+    # AND a stream read gets the timeout
+    pool.get_stream("timeout-stream")
+    assert slow_client_class.timeouts == [1.0]
+
+
+def test_health_checks_that_raise_replace_the_client() -> None:
+    """A health check that raises doesn't leak the client's place."""
+    # GIVEN a pool of one client whose health check raises for the first
+    clients = []
+
+    def create_client() -> helpers.InMemoryEventStoreClient:
+        clients.append(helpers.InMemoryEventStoreClient(isolated=True))
+        return clients[-1]
+
+    def health_check(client: helpers.InMemoryEventStoreClient) -> bool:
+        if client is clients[0]:
+            raise ConnectionError("The check couldn't reach the event store.")
+        return True
+
+    pool = persistence.EventStoreClientPool(
+        create_client,
+        size=1,
+        acquire_timeout=0.01,
+        health_check=health_check,
+        health_check_interval=0,
+    )
+
+    # WHEN calls are made
+    pool.append_to_stream("check-stream", current_version=-1, events=_new_event())
+    pool.get_stream("check-stream")
+
+    # THEN they were made with a replacement client
+    assert len(clients) == 2
+
+
+def _new_event() -> kurrentdbclient.NewEvent:
+    """A new event to append."""
+    return kurrentdbclient.NewEvent(type="SomethingHappened", data=b"{}")
@@ -0,0 +1,165 @@
+import json
+import pathlib
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from connect_four_solutions import helpers
+from connect_four_solutions.exercise_03 import analytics, application, persistence
+from connect_four_solutions.exercise_03.domain import board, enums
+
+
+def _play_game(app: application.ConnectFourApp, *columns: enums.Column) -> str:
+    """Create a game and make the moves, alternating between players."""
+    game_id = app.create_game(player_one="p1", player_two="p2")
+    for index, column in enumerate(columns):
+        app.make_move(game_id, player="p1" if index % 2 == 0 else "p2", column=column)
+    return game_id
+
+
+def _load_column(directory: pathlib.Path, name: str) -> np.ndarray:
+    """Concatenate a column over all npy chunks."""
+    return np.concatenate(
+        [np.load(chunk / f"{name}.npy") for chunk in sorted(directory.glob("chunk-*"))]
+    )
+
+
+def test_exporter_writes_events_as_columns(tmp_path: pathlib.Path) -> None:
+    """Every event of a game is exported as a row."""
+    # GIVEN an application backed by an in-memory event store
+    client = helpers.InMemoryEventStoreClient()
+    app = application.ConnectFourApp(persistence.GameRepository(client))
+    # AND a game that yellow has won in column A
+    game_id = _play_game(app, *[enums.Column.A, enums.Column.B] * 3, enums.Column.A)
+
+    # WHEN all events are exported in small chunks
+    analytics.ColumnarExporter(client, tmp_path, chunk_size=5).export()
+
+    # THEN the events of the game are exported in order
+    is_game = _load_column(tmp_path, "game_id") == game_id.encode()
+    assert _load_column(tmp_path, "position")[is_game].tolist() == list(range(9))
+    event_types = _load_column(tmp_path, "event_type")[is_game].tolist()
+    assert event_types == [0] + [1] * 7 + [2]
+    # AND the moves and the result are exported
+    assert _load_column(tmp_path, "column")[is_game].tolist() == [
+        -1, 0, 1, 0, 1, 0, 1, 0, -1
+    ]  # fmt: skip
+    assert (
+        _load_column(tmp_path, "result")[is_game][-1] == analytics.batch.PLAYER_ONE_WON
+    )
+    # AND the players are exported
+    assert _load_column(tmp_path, "player_id")[is_game][0] == b"p1"
+    assert _load_column(tmp_path, "opponent_id")[is_game][0] == b"p2"
+
+
+def test_exporter_resumes_from_checkpoint(tmp_path: pathlib.Path) -> None:
+    """A second export run only exports events committed since the first."""
+    # GIVEN an application backed by an in-memory event store
+    client = helpers.InMemoryEventStoreClient()
+    app = application.ConnectFourApp(persistence.GameRepository(client))
+    # AND a completed export
+    exporter = analytics.ColumnarExporter(client, tmp_path, chunk_size=1000)
+    _play_game(app, enums.Column.D)
+    exporter.export()
+
+    # WHEN a new game is played and the export runs again
+    game_id = _play_game(app, enums.Column.C, enums.Column.D)
+    summary = exporter.export()
+
+    # THEN only the events of the new game are exported
+    assert summary == analytics.ExportSummary(events_exported=3, chunks_written=1)
+    # AND the events of the new game are in the export exactly once
+    game_ids = _load_column(tmp_path, "game_id")
+    assert np.count_nonzero(game_ids == game_id.encode()) == 3
+
+
+def test_exporter_resumes_on_each_shard_of_a_sharded_store(
+    tmp_path: pathlib.Path,
+) -> None:
+    """The checkpoint of a sharded store holds the position on each shard."""
+    # GIVEN a sharded store with two shards and a number of games
+    shards = {
+        name: helpers.InMemoryEventStoreClient(isolated=True) for name in ("a", "b")
+    }
+    client = persistence.ShardedEventStoreClient(shards)
+    app = application.ConnectFourApp(persistence.GameRepository(client))
+    for _ in range(10):
+        _play_game(app, enums.Column.D)
+    # AND a completed export
+    analytics.ColumnarExporter(client, tmp_path).export()
+
+    # WHEN the store is opened again and a move is made in a new game
+    client = persistence.ShardedEventStoreClient(shards)
+    app = application.ConnectFourApp(persistence.GameRepository(client))
+    game_id = _play_game(app, enums.Column.C)
+    # AND a new exporter runs
+    summary = analytics.ColumnarExporter(client, tmp_path).export()
+
+    # THEN only the events of the new game are exported
+    assert summary == analytics.ExportSummary(events_exported=2, chunks_written=1)
+    assert np.count_nonzero(_load_column(tmp_path, "game_id") == game_id.encode()) == 2
+    # AND the checkpoint holds a position for each shard
+    checkpoint = json.loads((tmp_path / analytics.export.CHECKPOINT_FILE).read_text())
+    assert set(checkpoint["commit_position"]["shard_positions"]) == {"a", "b"}
+
+
+def test_exporter_exports_archived_games_from_their_record(
+    tmp_path: pathlib.Path,
+) -> None:
+    """The events that an archival deleted are exported from the summary."""
+    # GIVEN an application backed by a SQLite event store
+    client = persistence.SQLiteEventStoreClient(tmp_path / "events.db")
+    app = application.ConnectFourApp(persistence.GameRepository(client))
+    # AND a game with two moves that's exported
+    exporter = analytics.ColumnarExporter(client, tmp_path / "export")
+    first_game_id = _play_game(app, enums.Column.D, enums.Column.E)
+    exporter.export()
+    # AND the game finishes, next to a game that's never exported
+    for index, column in enumerate([enums.Column.D, enums.Column.E] * 2):
+        app.make_move(first_game_id, player=("p1", "p2")[index % 2], column=column)
+    app.make_move(first_game_id, player="p1", column=enums.Column.D)
+    _play_game(app, *[enums.Column.A, enums.Column.B] * 3, enums.Column.A)
+
+    # WHEN the finished games are archived, which deletes their events
+    summary = persistence.GameArchiver(client).run()
+    assert summary == persistence.ArchiveSummary(games_archived=2, events_compacted=18)
+    # AND the exporter runs again
+    resumed = exporter.export()
+    # AND a new exporter exports all events
+    fresh = analytics.ColumnarExporter(client, tmp_path / "fresh").export()
+
+    # THEN the exporter exports the events of the games that it didn't export
+    assert resumed == analytics.ExportSummary(events_exported=15, chunks_written=1)
+    # AND the new exporter exports every event of both games
+    assert fresh == analytics.ExportSummary(events_exported=18, chunks_written=1)
+    # AND both exports replay each game to its result
+    for directory in (tmp_path / "export", tmp_path / "fresh"):
+        replayed = analytics.replay_export(directory)
+        assert len(replayed.game_ids) == 2
+        assert (
+            replayed.recorded_results.tolist() == [analytics.batch.PLAYER_ONE_WON] * 2
+        )
+        assert (replayed.computed_results == replayed.recorded_results).all()
+        positions = _load_column(directory, "position")
+        assert sorted(positions.tolist()) == sorted(list(range(9)) * 2)
+    client.close()
+
+
+def test_exporter_skips_games_on_other_boards(tmp_path: pathlib.Path) -> None:
+    """Games that aren't played on the standard board aren't exported."""
+    # GIVEN a game on a board with eight rows, which started before an export
+    client = helpers.InMemoryEventStoreClient(isolated=True)
+    app = application.ConnectFourApp(persistence.GameRepository(client))
+    geometry = board.Geometry(rows=8, columns=7, connect=4)
+    game_id = app.create_game(player_one="p1", player_two="p2", geometry=geometry)
+    exporter = analytics.ColumnarExporter(client, tmp_path, chunk_size=1)
+    _play_game(app, enums.Column.D)
+    exporter.export()
+
+    # WHEN moves are made in the game and the export runs again
+    app.make_move(game_id, player="p1", column=enums.Column.D)
+    exporter.export()
+
+    # THEN none of the events of the game are exported
+    assert game_id.encode() not in _load_column(tmp_path, "game_id")
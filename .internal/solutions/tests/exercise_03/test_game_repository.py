@@ -1,11 +1,16 @@
 """Tests for the EventStoreDB-backed `GameRepository`"""
 
+import dataclasses
 import json
+import threading
+import time
 
+import pytest
 from connect_four_solutions.exercise_03 import persistence
 from connect_four_solutions.exercise_03.application import application
-from connect_four_solutions.exercise_03.domain import events
+from connect_four_solutions.exercise_03.domain import board, events
 from connect_four_solutions.exercise_03.domain import game as game_
+from kurrentdbclient import exceptions as kdb_exceptions
 
 from connect_four.exercise_03.domain import enums
 
@@ -78,3 +83,106 @@ def test_game_repository_stores_move_made_events(
     # AND the event contains the relevant move information
     event_data = json.loads(move_made.data.decode("utf-8"))
     assert event_data == {"player": "player_one", "column": "A"}
+
+
+def test_game_repository_restores_games_on_other_boards(
+    event_store_client: persistence.IEventStoreClient,
+) -> None:
+    """The geometry of a board is stored with the `GameStarted` event."""
+    # GIVEN a game on a board with eight rows and five columns
+    repository = persistence.GameRepository(client=event_store_client)
+    app = application.ConnectFourApp(game_repository=repository)
+    geometry = board.Geometry(rows=8, columns=5, connect=5)
+    game_id = app.create_game(player_one="p1", player_two="p2", geometry=geometry)
+
+    # WHEN more tokens than fit on a standard board are put in a column
+    for move in range(8):
+        app.make_move(game_id, player=f"p{move % 2 + 1}", column=enums.Column.A)
+
+    # THEN the game is restored on a board with its geometry
+    game_state = app.get_game(game_id)
+    assert game_state.geometry == geometry
+    assert len(game_state.board[enums.Column.A]) == 8
+    assert list(game_state.board) == list(geometry.column_labels)
+    # AND the geometry is stored with the GameStarted event
+    started = event_store_client.get_stream(f"game-{game_id}")[0]
+    assert json.loads(started.data)["geometry"] == {
+        "rows": 8,
+        "columns": 5,
+        "connect": 5,
+    }
+
+
+def test_game_repository_decodes_lazy_events_on_first_use(
+    event_store_client: persistence.IEventStoreClient,
+) -> None:
+    """The types of lazy events are known without decoding them."""
+    # GIVEN a stored game with a move
+    repository = persistence.GameRepository(client=event_store_client)
+    app = application.ConnectFourApp(game_repository=repository)
+    game_id = app.create_game(player_one="player_one", player_two="player_two")
+    app.make_move(game_id=game_id, player="player_one", column=enums.Column.A)
+    # AND a move of which the data is corrupt
+    [recorded_event] = event_store_client.get_stream(f"game-{game_id}")[1:]
+    corrupt_event = persistence.LazyGameEvent(
+        dataclasses.replace(recorded_event, data=b"not json")
+    )
+
+    # WHEN the events of the game are read without decoding them
+    lazy_events = repository.get_events(game_id)
+
+    # THEN their types are available
+    assert [event.type for event in lazy_events] == ["GameStarted", "MoveMade"]
+    # AND their attributes are those of the decoded domain events
+    assert lazy_events[1].column == enums.Column.A
+    assert lazy_events[1].domain_event == events.MoveMade("player_one", enums.Column.A)
+    # AND corrupt data is only noticed when it's used
+    assert corrupt_event.type == "MoveMade"
+    with pytest.raises(json.JSONDecodeError):
+        corrupt_event.column
+
+
+class _ConcurrencyTrackingClient:
+    """Wraps a client and records how many reads overlap."""
+
+    def __init__(self, client: persistence.IEventStoreClient) -> None:
+        self._client = client
+        self._lock = threading.Lock()
+        self._active = 0
+        self.max_active = 0
+
+    def get_stream(self, stream_name: str):
+        with self._lock:
+            self._active += 1
+            self.max_active = max(self.max_active, self._active)
+        try:
+            time.sleep(0.01)
+            return self._client.get_stream(stream_name)
+        finally:
+            with self._lock:
+                self._active -= 1
+
+
+def test_game_repository_gets_many_games_with_bounded_concurrency(
+    event_store_client: persistence.IEventStoreClient,
+) -> None:
+    """Games are read concurrently and a missing game doesn't fail the rest."""
+    # GIVEN a number of stored games
+    app = application.ConnectFourApp(persistence.GameRepository(event_store_client))
+    game_ids = [app.create_game(player_one=f"p{n}", player_two="p") for n in range(8)]
+    # AND a repository that reads at most three streams at a time
+    client = _ConcurrencyTrackingClient(event_store_client)
+    repository = persistence.GameRepository(client, max_concurrency=3)
+
+    # WHEN the games and a game that doesn't exist are loaded at once
+    games = repository.get_many([*game_ids, "does-not-exist"])
+
+    # THEN each stored game is loaded, in the order of the IDs
+    assert list(games) == [*game_ids, "does-not-exist"]
+    assert [games[game_id].player_one for game_id in game_ids] == [
+        f"p{n}" for n in range(8)
+    ]
+    # AND the missing game is reported as an error
+    assert isinstance(games["does-not-exist"], kdb_exceptions.NotFound)
+    # AND the reads overlapped, but never more than three at a time
+    assert 1 < client.max_active <= 3
@@ -0,0 +1,151 @@
+import json
+import threading
+
+import attrs
+import pytest
+from connect_four_solutions import helpers
+from connect_four_solutions.exercise_03 import application, persistence
+from connect_four_solutions.exercise_03.domain import enums, exceptions
+from connect_four_solutions.exercise_03.domain import game as game_
+
+
+def test_retried_move_is_made_once() -> None:
+    """A retry with the same idempotency key doesn't make a second move."""
+    # GIVEN a game in which player one made a move with an idempotency key
+    client = helpers.InMemoryEventStoreClient()
+    app = application.ConnectFourApp(persistence.GameRepository(client))
+    game_id = app.create_game(player_one="p1", player_two="p2")
+    app.make_move(game_id, "p1", enums.Column.D, idempotency_key="move-1")
+
+    # WHEN the move is retried
+    app.make_move(game_id, "p1", enums.Column.D, idempotency_key="move-1")
+
+    # THEN the move was only stored once
+    [_, move_made] = client.get_stream(f"game-{game_id}")
+    # AND the idempotency key is stored in the metadata of the event
+    assert json.loads(move_made.metadata) == {
+        "idempotency_key": "move-1",
+        "schema_version": 1,
+    }
+    assert app.get_game(game_id).next_player == "p2"
+
+
+def test_retry_is_recognized_from_the_stream_without_a_cached_key() -> None:
+    """The stream is the source of truth if the key isn't cached."""
+    # GIVEN a move that was made through one application instance
+    client = helpers.InMemoryEventStoreClient()
+    repository = persistence.GameRepository(client)
+    first_app = application.ConnectFourApp(repository)
+    game_id = first_app.create_game(player_one="p1", player_two="p2")
+    first_app.make_move(game_id, "p1", enums.Column.D, idempotency_key="move-1")
+
+    # WHEN the move is retried through another instance
+    second_app = application.ConnectFourApp(repository)
+    second_app.make_move(game_id, "p1", enums.Column.D, idempotency_key="move-1")
+
+    # THEN the retry doesn't make a second move
+    assert len(client.get_stream(f"game-{game_id}")) == 2
+    # AND a new move with another key is made
+    second_app.make_move(game_id, "p2", enums.Column.D, idempotency_key="move-2")
+    assert _get_column_height(second_app, game_id, enums.Column.D) == 2
+
+
+def test_idempotency_key_of_another_move_is_rejected() -> None:
+    """A key that's sent with a different move isn't treated as a retry."""
+    # GIVEN a move with an idempotency key through a first instance
+    client = helpers.InMemoryEventStoreClient()
+    repository = persistence.GameRepository(client)
+    first_app = application.ConnectFourApp(repository)
+    game_id = first_app.create_game(player_one="p1", player_two="p2")
+    first_app.make_move(game_id, "p1", enums.Column.D, idempotency_key="move-1")
+    second_app = application.ConnectFourApp(repository)
+
+    # WHEN the key is sent with another column, with and without a cached key
+    # THEN the move is rejected
+    for app in (first_app, second_app):
+        with pytest.raises(exceptions.IdempotencyKeyReusedError):
+            app.make_move(game_id, "p1", enums.Column.E, idempotency_key="move-1")
+    # AND no move was made
+    assert len(client.get_stream(f"game-{game_id}")) == 2
+
+
+def test_idempotency_keys_are_cached_across_threads() -> None:
+    """Concurrent moves keep the bounded cache of keys consistent."""
+    # GIVEN an application that caches a few idempotency keys
+    app = application.ConnectFourApp(
+        persistence.GameRepository(helpers.InMemoryEventStoreClient()),
+        max_idempotency_keys=8,
+    )
+    game_ids = [app.create_game(player_one="p1", player_two="p2") for _ in range(16)]
+
+    # WHEN moves are made and retried from a number of threads
+    def play(game_id: str) -> None:
+        for _ in range(20):
+            app.make_move(game_id, "p1", enums.Column.D, idempotency_key="move-1")
+
+    threads = [threading.Thread(target=play, args=(g,)) for g in game_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # THEN each move was made once
+    assert all(app.get_game(g).next_player == "p2" for g in game_ids)
+
+
+def _get_column_height(
+    app: application.ConnectFourApp, game_id: str, column: enums.Column
+) -> int:
+    """The number of tokens in a column of a game."""
+    return len(app.get_game(game_id).board[column])
+
+
+@attrs.define
+class _RendezvousRepository:
+    """A repository where the games are read before any is added."""
+
+    _repository: persistence.GameRepository
+    _barrier: threading.Barrier
+
+    def get(self, game_id: str) -> game_.Game:
+        game = self._repository.get(game_id)
+        self._barrier.wait(timeout=5)
+        return game
+
+    def add(self, game: game_.Game) -> None:
+        self._repository.add(game)
+
+
+def test_concurrent_retries_make_the_move_once() -> None:
+    """Retries that both miss the cache don't both append the move."""
+    # GIVEN a started game
+    client = helpers.InMemoryEventStoreClient()
+    repository = persistence.GameRepository(client)
+    game_id = application.ConnectFourApp(repository).create_game("p1", "p2")
+    # AND an application where two requests read the game at the same time
+    app = application.ConnectFourApp(
+        _RendezvousRepository(repository, threading.Barrier(2))
+    )
+
+    # WHEN the same move is sent twice at the same time
+    errors = []
+
+    def make_move() -> None:
+        try:
+            app.make_move(game_id, "p1", enums.Column.D, idempotency_key="move-1")
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=make_move) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # THEN both requests succeed
+    assert errors == []
+    # AND the move was only stored once
+    assert [e.type for e in client.get_stream(f"game-{game_id}")] == [
+        "GameStarted",
+        "MoveMade",
+    ]
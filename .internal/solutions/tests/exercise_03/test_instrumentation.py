@@ -0,0 +1,104 @@
+import pathlib
+import urllib.request
+
+from connect_four_solutions import helpers
+from connect_four_solutions.exercise_03 import (
+    application,
+    instrumentation,
+    persistence,
+)
+from connect_four_solutions.exercise_03.domain import enums
+
+
+def _instrumented_app(
+    sink: instrumentation.IInstrumentationSink,
+) -> application.ConnectFourApp:
+    """Create an app where both the app and repository are instrumented."""
+    instruments = instrumentation.Instrumentation(sinks=[sink])
+    repository = persistence.GameRepository(
+        helpers.InMemoryEventStoreClient(), instrumentation=instruments
+    )
+    return application.ConnectFourApp(repository, instrumentation=instruments)
+
+
+def test_make_move_records_every_stage() -> None:
+    """Each stage of a move is timed and the events are counted."""
+    # GIVEN an instrumented application with a started game
+    sink = instrumentation.HistogramSink()
+    app = _instrumented_app(sink)
+    game_id = app.create_game(player_one="p1", player_two="p2")
+
+    # WHEN a move is made
+    app.make_move(game_id, player="p1", column=enums.Column.D)
+
+    # THEN every stage of the move has been timed
+    assert {
+        "application.make_move",
+        "repository.get",
+        "client.read",
+        "repository.decode",
+        "repository.replay",
+        "domain.make_move",
+        "repository.add",
+        "repository.encode",
+        "client.append",
+    } <= set(sink.histograms)
+    assert sink.histograms["application.make_move"].count == 1
+    # AND the events read and written are counted
+    assert sink.counters[("client.read", "events_read")] == 1
+    assert sink.counters[("client.append", "events_written")] == 2
+
+
+def test_disabled_instrumentation_reuses_a_single_context() -> None:
+    """Disabled instrumentation doesn't allocate anything per stage."""
+    # GIVEN instrumentation without sinks
+    instruments = instrumentation.Instrumentation()
+
+    # WHEN two stages are measured
+    # THEN the same no-op context manager is returned for both
+    assert not instruments.enabled
+    assert instruments.stage("a") is instruments.stage("b")
+
+
+def test_prometheus_exporter_renders_histograms_and_counters(
+    tmp_path: pathlib.Path,
+) -> None:
+    """The exporter writes the metrics in the Prometheus text format."""
+    # GIVEN a histogram sink with a recorded stage
+    sink = instrumentation.HistogramSink(buckets=(0.5, 1.0))
+    stage = instrumentation.Stage(name="client.read", started_at=0.0, duration=0.75)
+    stage.count("events_read", 3)
+    sink.stage_finished(stage)
+    exporter = instrumentation.PrometheusExporter(sink)
+
+    # WHEN the metrics are written to a file
+    exporter.write(tmp_path / "metrics.prom")
+
+    # THEN the file contains cumulative buckets, the sum and the count
+    lines = (tmp_path / "metrics.prom").read_text().splitlines()
+    metric = "connect_four_stage_duration_seconds"
+    assert f'{metric}_bucket{{stage="client.read",le="0.5"}} 0' in lines
+    assert f'{metric}_bucket{{stage="client.read",le="1.0"}} 1' in lines
+    assert f'{metric}_bucket{{stage="client.read",le="+Inf"}} 1' in lines
+    assert f'{metric}_count{{stage="client.read"}} 1' in lines
+    # AND the counter is exported
+    assert 'connect_four_events_read_total{stage="client.read"} 3' in lines
+
+
+def test_prometheus_exporter_serves_metrics_over_http() -> None:
+    """The metrics can be scraped from an HTTP endpoint."""
+    # GIVEN an exporter that serves the metrics of an instrumented app
+    sink = instrumentation.HistogramSink()
+    _instrumented_app(sink).create_game(player_one="p1", player_two="p2")
+    server = instrumentation.PrometheusExporter(sink).serve(port=0)
+
+    # WHEN the endpoint is scraped
+    try:
+        host, port = server.server_address
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics") as response:
+            body = response.read().decode()
+    finally:
+        server.shutdown()
+
+    # THEN the response contains the metrics
+    assert 'stage="application.create_game"' in body
@@ -0,0 +1,77 @@
+import pathlib
+
+import pytest
+from connect_four_solutions.exercise_03 import persistence
+from connect_four_solutions.exercise_03.domain import board, enums, solver
+
+
+def test_opening_book_round_trips_evaluations(tmp_path: pathlib.Path) -> None:
+    """Saved evaluations can be loaded by a new opening book."""
+    # GIVEN an opening book with a few evaluations
+    path = tmp_path / "book.bin"
+    book = persistence.OpeningBook(path)
+    evaluations = {
+        12345: solver.PositionEvaluation(None, enums.Column.D, depth=8),
+        2**64
+        - 1: solver.PositionEvaluation(
+            enums.GameResult.PLAYER_TWO_WON, enums.Column.A, depth=3
+        ),
+        0: solver.PositionEvaluation(enums.GameResult.TIED, None, depth=0),
+    }
+    for position_key, evaluation in evaluations.items():
+        book.put(position_key, evaluation)
+
+    # WHEN the book is saved and loaded again
+    book.save()
+    reloaded = persistence.OpeningBook(path)
+
+    # THEN the evaluations can be retrieved
+    for position_key, evaluation in evaluations.items():
+        assert reloaded.get(position_key) == evaluation
+    # AND unknown positions are not found
+    assert reloaded.get(42) is None
+    assert len(reloaded) == 3
+
+
+def test_opening_book_merges_new_evaluations(tmp_path: pathlib.Path) -> None:
+    """Saving a book merges new evaluations with the stored ones."""
+    # GIVEN a saved opening book
+    path = tmp_path / "book.bin"
+    book = persistence.OpeningBook(path)
+    book.put(1, solver.PositionEvaluation(None, enums.Column.D, depth=4))
+    book.save()
+
+    # WHEN a new evaluation is added and saved by another instance
+    other_book = persistence.OpeningBook(path)
+    other_book.put(2, solver.PositionEvaluation(None, enums.Column.C, depth=4))
+    other_book.save()
+
+    # THEN both evaluations are in the book
+    reloaded = persistence.OpeningBook(path)
+    assert reloaded.get(1).best_move == enums.Column.D
+    assert reloaded.get(2).best_move == enums.Column.C
+
+
+def test_opening_book_rejects_invalid_file(tmp_path: pathlib.Path) -> None:
+    """A file that isn't an opening book raises an error on lookup."""
+    # GIVEN a file that is not an opening book
+    path = tmp_path / "book.bin"
+    path.write_bytes(b"definitely not an opening book")
+
+    # WHEN a position is looked up
+    # THEN an InvalidOpeningBookError is raised
+    with pytest.raises(persistence.InvalidOpeningBookError):
+        persistence.OpeningBook(path).get(1)
+
+
+def test_solver_populates_opening_book(tmp_path: pathlib.Path) -> None:
+    """The solver stores its evaluations in the opening book."""
+    # GIVEN a solver that uses an opening book
+    book = persistence.OpeningBook(tmp_path / "book.bin")
+    solver_obj = solver.Solver(depth=2, cache=book)
+
+    # WHEN the solver evaluates the empty board
+    evaluation = solver_obj.solve(board.Board())
+
+    # THEN the evaluation is stored in the book
+    assert book.get(0) == evaluation
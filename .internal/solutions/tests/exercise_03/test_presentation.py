@@ -0,0 +1,65 @@
+import pytest
+from connect_four_solutions.exercise_03 import presentation
+from connect_four_solutions.exercise_03.domain import board, enums
+
+
+def test_equal_positions_render_to_the_same_string() -> None:
+    """Renders are cached by position, not by board state object."""
+    # GIVEN two separate boards with the same position
+    board_one, board_two = board.Board(), board.Board()
+    for board_ in (board_one, board_two):
+        board_.add_move(enums.Column.D, enums.Token.YELLOW)
+        board_.add_move(enums.Column.D, enums.Token.RED)
+
+    # WHEN both boards are rendered
+    rendered_one = presentation.generate_board_string(board_one.board_state)
+    rendered_two = presentation.generate_board_string(board_two.board_state)
+
+    # THEN the renders are equal
+    assert rendered_one == rendered_two
+    # AND they have the documented height
+    assert len(rendered_one.splitlines()) == presentation.BOARD_HEIGHT
+    # AND they differ from the render of another position
+    board_two.add_move(enums.Column.A, enums.Token.YELLOW)
+    assert presentation.generate_board_string(board_two.board_state) != rendered_one
+
+
+def test_incremental_renderer_only_redraws_changed_cells() -> None:
+    """After the first frame, only the changed cells are redrawn."""
+    # GIVEN a renderer that has drawn the full board at line 3, column 5
+    renderer = presentation.IncrementalBoardRenderer(top=3, left=5)
+    game_board = board.Board()
+    first_frame = renderer.render(game_board.board_state)
+    assert first_frame.startswith("\x1b[3;5H")
+    assert first_frame.count("\x1b[") > presentation.BOARD_HEIGHT
+
+    # WHEN a token is dropped in the bottom row of column B
+    game_board.add_move(enums.Column.B, enums.Token.RED)
+    frame = renderer.render(game_board.board_state)
+
+    # THEN the frame moves the cursor to that cell and draws the token
+    assert frame.startswith("\x1b[15;11H")
+    assert frame.count("●") == 1
+    # AND a frame without changes is empty
+    assert renderer.render(game_board.board_state) == ""
+
+
+def test_boards_are_rendered_with_their_geometry() -> None:
+    """A board with more rows and fewer columns is drawn in full."""
+    # GIVEN a board with eight rows and five columns, with a full column A
+    geometry = board.Geometry(rows=8, columns=5, connect=5)
+    tall_board = board.Board(geometry=geometry)
+    for row in range(8):
+        tall_board.add_move(enums.Column.A, enums.Token.YELLOW)
+
+    # WHEN the board is rendered
+    rendered = presentation.generate_board_string(tall_board.board_state, geometry)
+
+    # THEN it has the size of a board with that geometry
+    lines = rendered.splitlines()
+    assert len(lines) == presentation.get_board_size(geometry)[0]
+    # AND every row has the token in column A
+    assert all(line.count("●") == 1 for line in lines[2:-1:2])
+    # AND the board can't be rendered as a standard board
+    with pytest.raises(ValueError):
+        presentation.generate_board_string(tall_board.board_state)
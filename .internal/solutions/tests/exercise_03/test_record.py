@@ -0,0 +1,54 @@
+import pytest
+from connect_four_solutions.exercise_03.domain import enums, exceptions
+from connect_four_solutions.exercise_03.domain import game as game_
+from connect_four_solutions.exercise_03.domain import record
+
+
+def test_game_round_trips_through_a_packed_record() -> None:
+    """A game restored from its packed record equals the original game."""
+    # GIVEN a game that yellow wins with a vertical line in column D
+    game = game_.Game()
+    game.start_game(player_one="Ada", player_two="Grace")
+    for column in "DEDEDED":
+        game.make_move(game.next_player, enums.Column(column))
+
+    # WHEN the record of the game is packed and unpacked
+    game_record = record.GameRecord.from_events(game.events)
+    packed = game_record.to_bytes()
+    unpacked = record.GameRecord.from_bytes(packed)
+
+    # THEN the record lists the moves as column letters
+    assert unpacked == game_record == record.GameRecord("Ada", "Grace", "DEDEDED")
+    # AND each move takes half a byte
+    assert len(packed) == 1 + len("Ada") + 1 + len("Grace") + 1 + 4
+    # AND the restored game equals a game loaded from the original events
+    restored = game_.Game.from_record(unpacked, game_id=game.id)
+    assert restored == game_.Game.load_from_history(game.id, game.events)
+    assert restored.result is enums.GameResult.PLAYER_ONE_WON
+    # AND the events of the game can be recreated from its record
+    assert unpacked.to_events() == game.events
+
+
+def test_invalid_records_are_rejected() -> None:
+    """Records with impossible moves or corrupt data aren't restored."""
+    # GIVEN a record with a move after yellow has won
+    finished_too_soon = record.GameRecord("Ada", "Grace", "DEDEDEDE")
+    # AND a record with a seventh token in column A
+    overflowing = record.GameRecord("Ada", "Grace", "AAAAAAA")
+
+    # WHEN the games are restored
+    # THEN the impossible moves are rejected
+    with pytest.raises(exceptions.InvalidMoveError):
+        game_.Game.from_record(finished_too_soon)
+    with pytest.raises(exceptions.InvalidMoveError):
+        game_.Game.from_record(overflowing)
+
+    # WHEN packed records are truncated or contain invalid columns
+    packed = record.GameRecord("Ada", "Grace", "DDC").to_bytes()
+    # THEN they can't be unpacked
+    for corrupt in (packed[:-1], packed[:-1] + b"\x90", packed[:4]):
+        with pytest.raises(record.InvalidRecordError):
+            record.GameRecord.from_bytes(corrupt)
+    # AND a record only accepts column letters as moves
+    with pytest.raises(record.InvalidRecordError):
+        record.GameRecord("Ada", "Grace", "DDH")
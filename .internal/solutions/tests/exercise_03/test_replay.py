@@ -0,0 +1,60 @@
+import pathlib
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from connect_four_solutions import helpers
+from connect_four_solutions.exercise_03 import analytics, application, persistence
+from connect_four_solutions.exercise_03.domain import enums
+
+
+def _play_random_games(
+    app: application.ConnectFourApp, count: int, seed: int
+) -> list[str]:
+    """Play random games until they finish or run out of moves."""
+    rng = random.Random(seed)
+    game_ids = []
+    for _ in range(count):
+        game_id = app.create_game(player_one="p1", player_two="p2")
+        game_state = app.get_game(game_id)
+        for _ in range(rng.randint(1, 42)):
+            if game_state.is_finished:
+                break
+            columns = [c for c, tokens in game_state.board.items() if len(tokens) < 6]
+            app.make_move(game_id, game_state.next_player, rng.choice(columns))
+            game_state = app.get_game(game_id)
+        game_ids.append(game_id)
+    return game_ids
+
+
+def test_replay_matches_games_loaded_from_history(tmp_path: pathlib.Path) -> None:
+    """Replayed final positions equal the positions of the aggregates."""
+    # GIVEN a number of random games in an event store
+    client = helpers.InMemoryEventStoreClient()
+    repository = persistence.GameRepository(client)
+    game_ids = _play_random_games(application.ConnectFourApp(repository), 40, 2)
+    # AND an export of all events in small chunks
+    analytics.ColumnarExporter(client, tmp_path, chunk_size=64).export()
+
+    # WHEN the export is replayed
+    replayed = analytics.replay_export(tmp_path)
+
+    # THEN all games are reconstructed
+    replayed_ids = {game_id.decode() for game_id in replayed.game_ids}
+    assert set(game_ids) <= replayed_ids
+    # AND the replayed games match the games loaded from history
+    assert analytics.verify_against_history(replayed, repository, sample_size=50) == []
+    # AND the recomputed results equal the recorded results
+    assert np.array_equal(replayed.computed_results, replayed.recorded_results)
+
+
+def test_replay_of_empty_export_has_no_games(tmp_path: pathlib.Path) -> None:
+    """An export without chunks results in zero games."""
+    # WHEN an empty directory is replayed
+    replayed = analytics.replay_export(tmp_path)
+
+    # THEN there are no games
+    assert len(replayed) == 0
+    assert replayed.grids.shape == (0, 6, 7)
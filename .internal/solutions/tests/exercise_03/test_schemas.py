@@ -0,0 +1,244 @@
+import json
+
+import kurrentdbclient
+import pytest
+from connect_four_solutions import helpers
+from connect_four_solutions.exercise_03 import persistence
+from connect_four_solutions.exercise_03.domain import enums
+from connect_four_solutions.exercise_03.domain import events as domain_events
+
+
+def test_upcasters_are_composed_from_each_old_version() -> None:
+    """Old data passes through each upcaster up to the current version."""
+    # GIVEN a registry where MoveMade is at version 3
+    registry = persistence.UpcasterRegistry({"MoveMade": 3})
+
+    @registry.register("MoveMade", from_version=1)
+    def _rename_col(data):
+        return {"player": data["player"], "column": data["col"]}
+
+    @registry.register("MoveMade", from_version=2)
+    def _add_move_number(data):
+        return {**data, "move_number": None}
+
+    # WHEN data of each version is upcast
+    # THEN it's converted to the current version
+    assert registry.upcast("MoveMade", 1, {"player": "p1", "col": "D"}) == {
+        "player": "p1",
+        "column": "D",
+        "move_number": None,
+    }
+    assert registry.upcast("MoveMade", 2, {"player": "p1", "column": "D"}) == {
+        "player": "p1",
+        "column": "D",
+        "move_number": None,
+    }
+    # AND current data is returned as it is
+    current = {"player": "p1", "column": "D", "move_number": 1}
+    assert registry.upcast("MoveMade", 3, current) is current
+    # AND versions without a path to the current version are rejected
+    with pytest.raises(persistence.UnknownSchemaVersionError):
+        registry.upcast("MoveMade", 4, current)
+    with pytest.raises(ValueError):
+        registry.register("MoveMade", from_version=3)
+
+
+def _append_legacy_game(
+    client: persistence.IEventStoreClient, game_id: str, columns: str
+) -> None:
+    """Store a game with MoveMade events in an old schema without versions."""
+    events = [
+        kurrentdbclient.NewEvent(
+            "GameStarted", data=b'{"player_one": "p1", "player_two": "p2"}'
+        )
+    ]
+    for number, column in enumerate(columns):
+        data = {"player": f"p{number % 2 + 1}", "col": column}
+        events.append(kurrentdbclient.NewEvent("MoveMade", json.dumps(data).encode()))
+    if len(columns) == 7:
+        events.append(
+            kurrentdbclient.NewEvent(
+                "GameFinished", data=b'{"result": "PLAYER_ONE_WON"}'
+            )
+        )
+    client.append_to_stream(
+        f"game-{game_id}",
+        current_version=kurrentdbclient.StreamState.NO_STREAM,
+        events=events,
+    )
+
+
+def test_old_streams_are_read_and_migrated_to_current_versions() -> None:
+    """Legacy events are upcast on read and rewritten once games finish."""
+    # GIVEN a registry where MoveMade is at version 2
+    registry = persistence.UpcasterRegistry({"MoveMade": 2})
+    registry.register("MoveMade", from_version=1)(
+        lambda data: {"player": data["player"], "column": data["col"]}
+    )
+    # AND a finished and an ongoing game stored at version 1
+    client = helpers.InMemoryEventStoreClient(isolated=True)
+    _append_legacy_game(client, "finished", "DEDEDED")
+    _append_legacy_game(client, "ongoing", "D")
+    repository = persistence.GameRepository(client, upcasters=registry)
+
+    # WHEN the games are read
+    finished = repository.get("finished")
+    # THEN the old events are upcast
+    assert finished.result is enums.GameResult.PLAYER_ONE_WON
+
+    # WHEN the migration runs
+    migrator = persistence.SchemaMigrator(client, upcasters=registry)
+    summary = migrator.run()
+
+    # THEN the finished game is rewritten at the current versions
+    assert summary == persistence.MigrationSummary(
+        streams_migrated=1, events_rewritten=9, streams_deferred=1
+    )
+    moves = [e for e in client.get_stream("game-finished") if e.type == "MoveMade"]
+    assert len(moves) == 7
+    assert [json.loads(e.metadata) for e in moves] == [
+        {"schema_version": 2, "migrated": position} for position in range(1, 8)
+    ]
+    assert json.loads(moves[0].data) == {"player": "p1", "column": "D"}
+    # AND it's restored the same as before
+    assert repository.get("finished") == finished
+
+    # WHEN the ongoing game finishes and the migration runs again
+    ongoing = repository.get("ongoing")
+    for column in "EDEDED":
+        ongoing.make_move(ongoing.next_player, enums.Column(column))
+    repository.add(ongoing)
+    summary = migrator.run()
+
+    # THEN the deferred game is migrated too
+    assert summary == persistence.MigrationSummary(
+        streams_migrated=1, events_rewritten=9, streams_deferred=0
+    )
+    assert repository.get("ongoing").result is enums.GameResult.PLAYER_ONE_WON
+
+
+def test_every_reader_and_writer_uses_the_given_registry() -> None:
+    """The feed, archiver and unit of work upcast with their registry."""
+    # GIVEN a registry where MoveMade is at version 2
+    registry = persistence.UpcasterRegistry({"MoveMade": 2})
+    registry.register("MoveMade", from_version=1)(
+        lambda data: {"player": data["player"], "column": data["col"]}
+    )
+    # AND a finished and an ongoing game stored at version 1
+    client = helpers.InMemoryEventStoreClient(isolated=True)
+    _append_legacy_game(client, "finished", "DEDEDED")
+    _append_legacy_game(client, "ongoing", "D")
+
+    # WHEN the feed is polled
+    feed_events = persistence.GameEventFeed(client, upcasters=registry).poll()
+    # THEN the old events are upcast
+    assert len(feed_events) == 11
+
+    # WHEN a move is made in the ongoing game through a unit of work
+    with persistence.UnitOfWork(client, upcasters=registry) as unit_of_work:
+        ongoing = unit_of_work.get("ongoing")
+        ongoing.make_move("p2", enums.Column.E)
+        unit_of_work.add(ongoing)
+    # THEN the move is stored at the current version
+    new_move = client.get_stream("game-ongoing")[-1]
+    assert json.loads(new_move.metadata) == {"schema_version": 2}
+
+    # WHEN the finished game is archived
+    archiver = persistence.GameArchiver(client, upcasters=registry)
+    assert archiver.archive("finished") == 9
+    # THEN the summary is stored at the current version
+    [archived_event] = client.get_stream("game-finished")
+    assert json.loads(archived_event.metadata) == {"schema_version": 1}
+    repository = persistence.GameRepository(client, upcasters=registry)
+    assert repository.get("finished").result is enums.GameResult.PLAYER_ONE_WON
+
+
+def test_migrated_games_are_followed_and_exported_once(tmp_path) -> None:
+    """The feed and the exporter skip the events rewritten by a migration."""
+    pytest.importorskip("numpy")
+    from connect_four_solutions.exercise_03 import analytics
+
+    # GIVEN a registry where MoveMade is at version 2
+    registry = persistence.UpcasterRegistry({"MoveMade": 2})
+    registry.register("MoveMade", from_version=1)(
+        lambda data: {"player": data["player"], "column": data["col"]}
+    )
+    # AND two finished games stored at version 1, which are migrated
+    client = helpers.InMemoryEventStoreClient(isolated=True)
+    _append_legacy_game(client, "first", "DEDEDED")
+    _append_legacy_game(client, "second", "AABBCCD")
+    migrator = persistence.SchemaMigrator(client, upcasters=registry)
+    assert migrator.run().streams_migrated == 2
+    # AND the rewritten events are marked as migrated
+    assert all(
+        persistence.is_migrated(event) for event in client.get_stream("game-first")
+    )
+
+    # WHEN all events are read by a feed
+    feed_events = persistence.GameEventFeed(client, upcasters=registry).poll()
+    # THEN each game is started and finished once
+    started = [g for g, e in feed_events if isinstance(e, domain_events.GameStarted)]
+    assert sorted(started) == ["first", "second"]
+    assert len(feed_events) == 18
+
+    # WHEN all events are exported and replayed
+    exporter = analytics.ColumnarExporter(client, tmp_path, upcasters=registry)
+    summary = exporter.export()
+    replayed = analytics.replay_export(tmp_path)
+
+    # THEN each event is exported once
+    assert summary.events_exported == 18
+    # AND each game is replayed to its recorded result
+    assert replayed.game_ids.tolist() == [b"first", b"second"]
+    assert replayed.recorded_results.tolist() == [analytics.batch.PLAYER_ONE_WON] * 2
+    assert (replayed.computed_results == replayed.recorded_results).all()
+
+
+def test_migrated_games_are_read_by_consumers_that_start_later(tmp_path) -> None:
+    """The rewritten events are read if the originals were deleted."""
+    pytest.importorskip("numpy")
+    from connect_four_solutions.exercise_03 import analytics
+
+    # GIVEN a registry where MoveMade is at version 2
+    registry = persistence.UpcasterRegistry({"MoveMade": 2})
+    registry.register("MoveMade", from_version=1)(
+        lambda data: {"player": data["player"], "column": data["col"]}
+    )
+    # AND a SQLite store with a finished game stored at version 1
+    client = persistence.SQLiteEventStoreClient(tmp_path / "events.db")
+    _append_legacy_game(client, "first", "DEDEDED")
+    # AND a feed that read the game before it was migrated
+    feed = persistence.GameEventFeed(client, upcasters=registry)
+    feed_events = feed.poll()
+    # AND a second game that's migrated next to it, before anything read it
+    _append_legacy_game(client, "second", "AABBCCD")
+
+    # WHEN the migration runs, which deletes the original events
+    assert persistence.SchemaMigrator(client, upcasters=registry).run() == (
+        persistence.MigrationSummary(
+            streams_migrated=2, events_rewritten=18, streams_deferred=0
+        )
+    )
+    assert len(list(client.read_all(filter_include=("MoveMade",)))) == 14
+    # AND the feed and a new feed read the store
+    feed_events += feed.poll()
+    new_feed_events = persistence.GameEventFeed(client, upcasters=registry).poll()
+    # AND a new exporter exports the store
+    summary = analytics.ColumnarExporter(
+        client, tmp_path / "export", upcasters=registry
+    ).export()
+
+    # THEN each feed reads each event of both games once
+    repository = persistence.GameRepository(client, upcasters=registry)
+    for events in (feed_events, new_feed_events):
+        assert sorted(events, key=lambda e: e[0]) == [
+            (game_id, event)
+            for game_id in ("first", "second")
+            for event in repository.get(game_id).events
+        ]
+    # AND each event is exported once and replayed
+    assert summary.events_exported == 18
+    replayed = analytics.replay_export(tmp_path / "export")
+    assert replayed.game_ids.tolist() == [b"first", b"second"]
+    assert (replayed.computed_results == replayed.recorded_results).all()
+    client.close()
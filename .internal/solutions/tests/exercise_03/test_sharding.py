@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import dataclasses
+from collections.abc import Iterable, Iterator, Sequence
+from typing import TYPE_CHECKING
+
+import attrs
+from connect_four_solutions import helpers
+from connect_four_solutions.exercise_03 import application, persistence
+from connect_four_solutions.exercise_03.domain import enums
+from connect_four_solutions.exercise_03.domain import events as domain_events
+
+if TYPE_CHECKING:
+    import kurrentdbclient
+
+
+def _create_shards(*names: str) -> dict[str, helpers.InMemoryEventStoreClient]:
+    """Create an isolated in-memory store per shard."""
+    return {name: helpers.InMemoryEventStoreClient(isolated=True) for name in names}
+
+
+@attrs.define
+class _SparseClient:
+    """An in-memory store with gaps between its commit positions.
+
+    Like the commit positions of KurrentDB, which are byte offsets, a
+    read can only start at the commit position of an event.
+    """
+
+    _client: helpers.InMemoryEventStoreClient = attrs.field(
+        factory=lambda: helpers.InMemoryEventStoreClient(isolated=True)
+    )
+
+    def append_to_stream(
+        self,
+        /,
+        stream_name: str,
+        *,
+        current_version: int | kurrentdbclient.StreamState,
+        events: kurrentdbclient.NewEvent | Iterable[kurrentdbclient.NewEvent],
+    ) -> int:
+        commit_position = self._client.append_to_stream(
+            stream_name, current_version=current_version, events=events
+        )
+        return _SPARSE_GAP * (commit_position + 1)
+
+    def get_stream(self, stream_name: str) -> Sequence[kurrentdbclient.RecordedEvent]:
+        return self._client.get_stream(stream_name)
+
+    def read_all(
+        self,
+        *,
+        commit_position: int | None = None,
+        filter_include: Sequence[str] = (),
+        filter_by_stream_name: bool = False,
+        limit: int = 2**63 - 1,
+    ) -> Iterator[kurrentdbclient.RecordedEvent]:
+        if commit_position is not None:
+            if commit_position % _SPARSE_GAP != 0:
+                raise ValueError(f"No event is committed at {commit_position}.")
+            commit_position = commit_position // _SPARSE_GAP - 1
+        for event in self._client.read_all(
+            commit_position=commit_position,
+            filter_include=filter_include,
+            filter_by_stream_name=filter_by_stream_name,
+            limit=limit,
+        ):
+            yield dataclasses.replace(
+                event, commit_position=_SPARSE_GAP * (event.commit_position + 1)
+            )
+
+
+_SPARSE_GAP = 100
+
+
+def _play_games(app: application.ConnectFourApp, number_of_games: int) -> list[str]:
+    """Create games with a move each and return their IDs."""
+    game_ids = []
+    for number in range(number_of_games):
+        game_id = app.create_game(player_one=f"p{number}", player_two="p2")
+        app.make_move(game_id, player=f"p{number}", column=enums.Column.D)
+        game_ids.append(game_id)
+    return game_ids
+
+
+def test_games_are_partitioned_over_the_shards() -> None:
+    """Each game is stored on one shard and all shards are read."""
+    # GIVEN a sharded store with four in-memory shards
+    shards = _create_shards("a", "b", "c", "d")
+    client = persistence.ShardedEventStoreClient(shards)
+    app = application.ConnectFourApp(persistence.GameRepository(client))
+
+    # WHEN games are played
+    game_ids = _play_games(app, 40)
+
+    # THEN each game is stored on the shard it hashes to, and only there
+    for game_id in game_ids:
+        stream_name = f"game-{game_id}"
+        owners = [
+            name
+            for name, shard in shards.items()
+            if any(e.stream_name == stream_name for e in shard.read_all())
+        ]
+        assert owners == [client.get_shard_name(stream_name)]
+    # AND every shard has games
+    assert all(len(list(shard.read_all())) > 0 for shard in shards.values())
+    # AND the games can be loaded through the sharded store
+    assert app.get_game(game_ids[0]).next_player == "p2"
+    # AND reading all events merges the shards by commit position
+    events = list(client.read_all())
+    positions = [event.commit_position for event in events]
+    assert len(events) == 2 * len(game_ids) == len(set(positions))
+    assert positions == sorted(positions)
+    # AND a read resumes from a merged commit position
+    resumed = client.read_all(commit_position=positions[30], limit=5)
+    assert [e.commit_position for e in resumed] == positions[30:35]
+
+
+def test_adding_shards_moves_only_the_streams_that_belong_to_them() -> None:
+    """Rebalancing copies streams to new shards and nothing else."""
+    # GIVEN a sharded store with two shards and a number of games
+    client = persistence.ShardedEventStoreClient(_create_shards("a", "b"))
+    app = application.ConnectFourApp(persistence.GameRepository(client))
+    game_ids = _play_games(app, 60)
+    owners_before = {
+        game_id: client.get_shard_name(f"game-{game_id}") for game_id in game_ids
+    }
+
+    # WHEN two shards are added
+    summary = client.add_shards(_create_shards("c", "d"))
+
+    # THEN only streams that now belong to a new shard were moved
+    owners_after = {
+        game_id: client.get_shard_name(f"game-{game_id}") for game_id in game_ids
+    }
+    moved = [g for g in game_ids if owners_before[g] != owners_after[g]]
+    assert {owners_after[g] for g in moved} <= {"c", "d"}
+    assert summary == persistence.RebalanceSummary(
+        streams_moved=len(moved), events_moved=2 * len(moved)
+    )
+    assert 0 < len(moved) < len(game_ids)
+    # AND all games can still be loaded and played
+    for game_id in game_ids:
+        app.make_move(game_id, player="p2", column=enums.Column.E)
+    # AND reading all events doesn't return the copies left behind
+    assert len(list(client.read_all())) == 3 * len(game_ids)
+
+
+def test_feed_follows_every_shard_through_a_rebalance() -> None:
+    """A resumed read continues on each shard, also on new shards."""
+    # GIVEN a feed that has caught up with a sharded store with two shards
+    client = persistence.ShardedEventStoreClient(_create_shards("a", "b"))
+    repository = persistence.GameRepository(client)
+    app = application.ConnectFourApp(repository)
+    game_ids = _play_games(app, 20)
+    feed = persistence.GameEventFeed(client, batch_size=7)
+    while feed.poll():
+        pass
+
+    # WHEN one move is made in each game, so the shards get different numbers
+    for game_id in game_ids:
+        app.make_move(game_id, player="p2", column=enums.Column.E)
+    # AND two shards are added before another move is made in each game
+    client.add_shards(_create_shards("c", "d"))
+    for game_id, player in zip(game_ids, (f"p{n}" for n in range(20))):
+        app.make_move(game_id, player=player, column=enums.Column.F)
+
+    # THEN the feed returns each of the new moves once
+    events = []
+    while batch := feed.poll():
+        events += batch
+    assert sorted(events, key=lambda e: game_ids.index(e[0])) == [
+        (game_id, domain_events.MoveMade(player=player, column=column))
+        for game_id, number in zip(game_ids, range(20))
+        for player, column in (("p2", enums.Column.E), (f"p{number}", enums.Column.F))
+    ]
+    # AND a new feed reads every game in order, without the copies
+    new_feed = persistence.GameEventFeed(client)
+    events_by_game: dict[str, list[domain_events.GameEvent]] = {}
+    while batch := new_feed.poll():
+        for game_id, event in batch:
+            events_by_game.setdefault(game_id, []).append(event)
+    for game_id in game_ids:
+        assert events_by_game[game_id] == repository.get(game_id).events
+
+
+def test_reads_resume_on_each_shard_after_a_restart() -> None:
+    """A merged position holds the position on each shard, by name."""
+    # GIVEN a sharded store with three shards and a number of games
+    shards = _create_shards("a", "b", "c")
+    client = persistence.ShardedEventStoreClient(shards)
+    app = application.ConnectFourApp(persistence.GameRepository(client))
+    game_ids = _play_games(app, 20)
+    # AND the position of the last event that was read
+    last_position = list(client.read_all())[-1].commit_position
+
+    # WHEN the store is opened again over the same shards
+    client = persistence.ShardedEventStoreClient(shards)
+    app = application.ConnectFourApp(persistence.GameRepository(client))
+    # AND a move is made in each game
+    for game_id in game_ids:
+        app.make_move(game_id, player="p2", column=enums.Column.E)
+
+    # THEN a feed that resumes from the position only reads the new moves
+    feed = persistence.GameEventFeed(client, commit_position=last_position)
+    events = []
+    while batch := feed.poll():
+        events += batch
+    assert sorted(events, key=lambda e: game_ids.index(e[0])) == [
+        (game_id, domain_events.MoveMade(player="p2", column=enums.Column.E))
+        for game_id in game_ids
+    ]
+    # AND the position holds the commit position of the event on each shard
+    assert isinstance(last_position, persistence.ShardedPosition)
+    assert set(last_position.shard_positions) == {"a", "b", "c"}
+    for shard_name, shard in shards.items():
+        commit_positions = [e.commit_position for e in shard.read_all()]
+        assert last_position.shard_positions[shard_name] in commit_positions
+
+
+def test_feed_follows_shards_with_sparse_commit_positions() -> None:
+    """Reads resume from the commit positions that the shards returned."""
+    # GIVEN a sharded store with a shard that leaves gaps between positions
+    client = persistence.ShardedEventStoreClient(
+        {"a": _SparseClient(), "b": helpers.InMemoryEventStoreClient(isolated=True)}
+    )
+    repository = persistence.GameRepository(client)
+    app = application.ConnectFourApp(repository)
+    game_ids = _play_games(app, 20)
+
+    # WHEN a feed reads the store in small batches while moves are made
+    feed = persistence.GameEventFeed(client, batch_size=3)
+    events_by_game: dict[str, list[domain_events.GameEvent]] = {}
+    for game_id in game_ids:
+        for batch in (feed.poll(), feed.poll()):
+            for event_game_id, event in batch:
+                events_by_game.setdefault(event_game_id, []).append(event)
+        app.make_move(game_id, player="p2", column=enums.Column.E)
+    while batch := feed.poll():
+        for event_game_id, event in batch:
+            events_by_game.setdefault(event_game_id, []).append(event)
+
+    # THEN the feed reads every event of every game once, in order
+    assert events_by_game == {
+        game_id: repository.get(game_id).events for game_id in game_ids
+    }
@@ -0,0 +1,138 @@
+from connect_four_solutions.exercise_03.domain import board, enums, solver
+
+
+def _board_with_moves(
+    *columns: enums.Column, geometry: board.Geometry = board.STANDARD
+) -> board.Board:
+    """Create a board with alternating yellow and red moves."""
+    board_obj = board.Board(geometry=geometry)
+    for index, column in enumerate(columns):
+        token = enums.Token.YELLOW if index % 2 == 0 else enums.Token.RED
+        board_obj.add_move(column, token)
+    return board_obj
+
+
+def test_solver_finds_immediate_win() -> None:
+    """The solver finds a winning move for the player to move."""
+    # GIVEN a board where yellow can complete four in a row in column A
+    board_obj = _board_with_moves(
+        enums.Column.A,
+        enums.Column.B,
+        enums.Column.A,
+        enums.Column.B,
+        enums.Column.A,
+        enums.Column.B,
+    )
+    position_key = board_obj.position_key
+
+    # WHEN the solver evaluates the position
+    evaluation = solver.Solver(depth=2).solve(board_obj)
+
+    # THEN yellow is expected to win by playing in column A
+    assert evaluation.result == enums.GameResult.PLAYER_ONE_WON
+    assert evaluation.best_move == enums.Column.A
+    # AND the board is restored to its original position
+    assert board_obj.position_key == position_key
+
+
+class _FakeCache:
+    """A dict-backed position cache."""
+
+    def __init__(self) -> None:
+        self.evaluations: dict[int, solver.PositionEvaluation] = {}
+
+    def get(self, position_key: int) -> solver.PositionEvaluation | None:
+        return self.evaluations.get(position_key)
+
+    def put(self, position_key: int, evaluation: solver.PositionEvaluation) -> None:
+        self.evaluations[position_key] = evaluation
+
+
+def test_solver_consults_cache_before_searching() -> None:
+    """A cached evaluation is returned without searching."""
+    # GIVEN a cache with an evaluation for the empty board
+    cache = _FakeCache()
+    cached = solver.PositionEvaluation(result=None, best_move=enums.Column.D, depth=10)
+    cache.put(board.Board().position_key, cached)
+
+    # WHEN the solver evaluates an empty board
+    evaluation = solver.Solver(depth=4, cache=cache).solve(board.Board())
+
+    # THEN the cached evaluation is returned
+    assert evaluation == cached
+
+
+def test_solver_mirrors_cached_best_move_for_mirrored_position() -> None:
+    """The best move for a mirrored position is mirrored as well."""
+    # GIVEN a solver with a cache
+    cache = _FakeCache()
+    solver_obj = solver.Solver(depth=2, cache=cache)
+    # AND a position where yellow wins in column A, which gets cached
+    solver_obj.solve(
+        _board_with_moves(
+            enums.Column.A,
+            enums.Column.B,
+            enums.Column.A,
+            enums.Column.B,
+            enums.Column.A,
+            enums.Column.B,
+        )
+    )
+
+    # WHEN the mirrored position is evaluated
+    evaluation = solver_obj.solve(
+        _board_with_moves(
+            enums.Column.G,
+            enums.Column.F,
+            enums.Column.G,
+            enums.Column.F,
+            enums.Column.G,
+            enums.Column.F,
+        )
+    )
+
+    # THEN the position was found in the cache
+    assert len(cache.evaluations) == 1
+    # AND the best move is in the mirrored column
+    assert evaluation.best_move == enums.Column.G
+
+
+def test_solver_orders_and_mirrors_moves_by_the_geometry() -> None:
+    """The solver only searches and mirrors the columns of the board."""
+    # GIVEN a solver with a cache
+    cache = _FakeCache()
+    solver_obj = solver.Solver(depth=2, cache=cache)
+    # AND a board that's five columns wide
+    narrow = board.Geometry(rows=6, columns=5)
+    # AND a position where yellow wins in column A, which gets cached
+    solver_obj.solve(
+        _board_with_moves(
+            enums.Column.A,
+            enums.Column.B,
+            enums.Column.A,
+            enums.Column.B,
+            enums.Column.A,
+            enums.Column.B,
+            geometry=narrow,
+        )
+    )
+
+    # WHEN the mirrored position is evaluated
+    evaluation = solver_obj.solve(
+        _board_with_moves(
+            enums.Column.E,
+            enums.Column.D,
+            enums.Column.E,
+            enums.Column.D,
+            enums.Column.E,
+            enums.Column.D,
+            geometry=narrow,
+        )
+    )
+    # AND the empty board is searched
+    opening = solver_obj.solve(board.Board(geometry=narrow))
+
+    # THEN the best move is mirrored onto the last column of the board
+    assert evaluation.best_move == enums.Column.E
+    # AND the search of the empty board starts in its center column
+    assert opening.best_move == enums.Column.C
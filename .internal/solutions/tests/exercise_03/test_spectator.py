@@ -0,0 +1,77 @@
+import io
+
+from connect_four_solutions import helpers
+from connect_four_solutions.exercise_03 import application, persistence, presentation
+from connect_four_solutions.exercise_03.domain import enums
+from connect_four_solutions.exercise_03.domain import events as domain_events
+
+
+def test_feed_returns_each_appended_event_once() -> None:
+    """The feed follows the tail of the game streams."""
+    # GIVEN a feed that has caught up with the event store
+    client = helpers.InMemoryEventStoreClient()
+    app = application.ConnectFourApp(persistence.GameRepository(client))
+    feed = persistence.GameEventFeed(client, batch_size=2)
+    while feed.poll():
+        pass
+
+    # WHEN a game is started and a move is made
+    game_id = app.create_game(player_one="p1", player_two="p2")
+    app.make_move(game_id, player="p1", column=enums.Column.C)
+
+    # THEN the next poll returns exactly those events
+    assert feed.poll() == [
+        (game_id, domain_events.GameStarted(player_one="p1", player_two="p2")),
+        (game_id, domain_events.MoveMade(player="p1", column=enums.Column.C)),
+    ]
+    assert feed.poll() == []
+
+
+class _ManualClock:
+    """A clock that only moves when told to."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_dashboard_only_redraws_changed_games_at_a_capped_rate() -> None:
+    """Frames contain only changed games and are rate limited."""
+    # GIVEN a dashboard that has drawn two games
+    client = helpers.InMemoryEventStoreClient()
+    app = application.ConnectFourApp(persistence.GameRepository(client))
+    feed = persistence.GameEventFeed(client)
+    while feed.poll():
+        pass
+    first_game = app.create_game(player_one="alice", player_two="bob")
+    app.create_game(player_one="carol", player_two="dave")
+    output, clock = io.StringIO(), _ManualClock()
+    dashboard = presentation.SpectatorDashboard(
+        feed, output=output, max_frames_per_second=10, clock=clock
+    )
+    dashboard.update()
+    assert dashboard.draw()
+    assert "alice vs bob" in output.getvalue()
+    assert "carol vs dave" in output.getvalue()
+
+    # WHEN a move is made in the first game before the next frame is due
+    app.make_move(first_game, player="alice", column=enums.Column.A)
+    dashboard.update()
+    clock.now = 0.05
+
+    # THEN no frame is drawn
+    output.seek(0), output.truncate()
+    assert not dashboard.draw()
+    assert output.getvalue() == ""
+
+    # WHEN the next frame is due
+    clock.now = 0.1
+
+    # THEN only the first game is redrawn
+    assert dashboard.draw()
+    frame = output.getvalue()
+    assert "alice vs bob" in frame
+    assert "carol vs dave" not in frame
+    assert frame.count("●") == 1
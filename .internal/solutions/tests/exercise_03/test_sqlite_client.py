@@ -0,0 +1,76 @@
+import concurrent.futures
+
+import kurrentdbclient
+import pytest
+from connect_four_solutions.exercise_03 import persistence
+from connect_four_solutions.exercise_03.domain import enums
+from connect_four_solutions.exercise_03.domain import game as game_
+from kurrentdbclient import exceptions as kdb_exceptions
+
+
+def test_games_survive_reopening_the_database(tmp_path) -> None:
+    """Games are read back from the file by a new client."""
+    # GIVEN a game that's stored in a SQLite database
+    path = tmp_path / "events.db"
+    client = persistence.SQLiteEventStoreClient(path)
+    game = game_.Game()
+    game.start_game(player_one="p1", player_two="p2")
+    game.make_move("p1", enums.Column.D, idempotency_key="move-1")
+    persistence.GameRepository(client).add(game)
+    client.close()
+
+    # WHEN the game is loaded with a new client for the same file
+    reopened = persistence.SQLiteEventStoreClient(path)
+    loaded = persistence.GameRepository(reopened).get(game.id)
+
+    # THEN the game has the same events
+    assert list(loaded.historical_events) == game.uncommitted_events
+    # AND an append with an outdated version is rejected
+    with pytest.raises(kdb_exceptions.WrongCurrentVersion):
+        reopened.append_to_stream(
+            f"game-{game.id}",
+            current_version=kurrentdbclient.StreamState.NO_STREAM,
+            events=kurrentdbclient.NewEvent("SomethingHappened", data=b"{}"),
+        )
+    # AND a stream that doesn't exist isn't found
+    with pytest.raises(kdb_exceptions.NotFound):
+        reopened.get_stream("game-that-does-not-exist")
+    reopened.close()
+
+
+def test_concurrent_appends_get_unique_global_positions(tmp_path) -> None:
+    """Appends from many threads are read back in commit order."""
+    # GIVEN a SQLite client that's shared by a number of threads
+    client = persistence.SQLiteEventStoreClient(tmp_path / "events.db")
+
+    def append_events(stream_number: int) -> None:
+        for _ in range(5):
+            client.append_to_stream(
+                f"stream-{stream_number}",
+                current_version=kurrentdbclient.StreamState.ANY,
+                events=[
+                    kurrentdbclient.NewEvent("SomethingHappened", data=b"{}"),
+                    kurrentdbclient.NewEvent("SomethingElseHappened", data=b"{}"),
+                ],
+            )
+
+    # WHEN each thread appends to its own stream
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        list(executor.map(append_events, range(8)))
+
+    # THEN all events are read in the order of their global position
+    events = list(client.read_all())
+    assert [e.commit_position for e in events] == list(range(80))
+    # AND each stream has consecutive stream positions
+    assert [e.stream_position for e in client.get_stream("stream-3")] == list(range(10))
+    # AND reading all events can be filtered and limited
+    filtered = client.read_all(
+        commit_position=40,
+        filter_include=("stream-[12]",),
+        filter_by_stream_name=True,
+        limit=3,
+    )
+    assert [e.stream_name for e in filtered] == [
+        e.stream_name for e in events[40:] if e.stream_name in {"stream-1", "stream-2"}
+    ][:3]
+    client.close()
@@ -0,0 +1,109 @@
+import pytest
+from connect_four_solutions import helpers
+from connect_four_solutions.exercise_03 import (
+    application,
+    instrumentation,
+    persistence,
+)
+from connect_four_solutions.exercise_03.domain import enums, exceptions
+
+
+def test_make_move_emits_nested_spans() -> None:
+    """A move results in a tree of spans down to the event store."""
+    # GIVEN an application that emits spans to an in-process collector
+    collector = instrumentation.InMemorySpanCollector()
+    instruments = instrumentation.Instrumentation(
+        sinks=[instrumentation.TracingSink(collector)]
+    )
+    repository = persistence.GameRepository(
+        helpers.InMemoryEventStoreClient(), instrumentation=instruments
+    )
+    app = application.ConnectFourApp(repository, instrumentation=instruments)
+    # AND a started game
+    game_id = app.create_game(player_one="p1", player_two="p2")
+    collector.spans.clear()
+
+    # WHEN a move is made
+    app.make_move(game_id, player="p1", column=enums.Column.D)
+
+    # THEN the root span is the application command
+    [root] = [span for span in collector.spans if span.parent is None]
+    assert root.name == "application.make_move"
+    assert root.attributes["connect_four.game_id"] == game_id
+    # AND the repository and domain spans are its children, in order
+    get, domain, add = collector.children(root)
+    assert [get.name, domain.name, add.name] == [
+        "repository.get",
+        "domain.make_move",
+        "repository.add",
+    ]
+    # AND the stream reads and appends are nested in the repository spans
+    assert [s.name for s in collector.children(get)] == [
+        "client.read",
+        "repository.decode",
+        "repository.replay",
+    ]
+    assert get.attributes["connect_four.stream_length"] == 1
+    [_, append] = collector.children(add)
+    assert append.name == "client.append"
+    assert append.attributes["connect_four.events_written"] == 1
+    assert append.attributes["connect_four.bytes_written"] > 0
+    # AND all spans have ended
+    assert all(span.ended_at is not None for span in collector.spans)
+
+
+def test_failed_stages_end_their_spans_with_an_error() -> None:
+    """A stage that raises marks its span and the enclosing spans."""
+    # GIVEN an application that emits spans to an in-process collector
+    collector = instrumentation.InMemorySpanCollector()
+    instruments = instrumentation.Instrumentation(
+        sinks=[instrumentation.TracingSink(collector)]
+    )
+    repository = persistence.GameRepository(
+        helpers.InMemoryEventStoreClient(), instrumentation=instruments
+    )
+    app = application.ConnectFourApp(repository, instrumentation=instruments)
+    game_id = app.create_game(player_one="p1", player_two="p2")
+    collector.spans.clear()
+
+    # WHEN a player makes a move out of turn
+    with pytest.raises(exceptions.InvalidMoveError) as error:
+        app.make_move(game_id, player="p2", column=enums.Column.D)
+
+    # THEN the domain span and the root span ended with the exception
+    [root] = [span for span in collector.spans if span.parent is None]
+    get, domain = collector.children(root)
+    assert (root.status, root.exception) == ("ERROR", error.value)
+    assert (domain.status, domain.exception) == ("ERROR", error.value)
+    assert domain.attributes["connect_four.error"] == "InvalidMoveError"
+    # AND the stages that succeeded didn't
+    assert get.status == "UNSET"
+    assert all(span.ended_at is not None for span in collector.spans)
+
+
+def test_disabled_instrumentation_emits_no_spans() -> None:
+    """Only the layers with a tracing sink emit spans."""
+    # GIVEN a traced repository in an application without instrumentation
+    collector = instrumentation.InMemorySpanCollector()
+    instruments = instrumentation.Instrumentation(
+        sinks=[instrumentation.TracingSink(collector)]
+    )
+    repository = persistence.GameRepository(
+        helpers.InMemoryEventStoreClient(), instrumentation=instruments
+    )
+    app = application.ConnectFourApp(
+        repository, instrumentation=instrumentation.DISABLED
+    )
+    game_id = app.create_game(player_one="p1", player_two="p2")
+    collector.spans.clear()
+
+    # WHEN a move is made
+    app.make_move(game_id, player="p1", column=enums.Column.D)
+
+    # THEN the repository spans are the roots
+    roots = [span for span in collector.spans if span.parent is None]
+    assert [span.name for span in roots] == ["repository.get", "repository.add"]
+    # AND the application and domain stages emitted no spans
+    assert not any(
+        span.name.startswith(("application.", "domain.")) for span in collector.spans
+    )
@@ -0,0 +1,99 @@
+import pytest
+from connect_four_solutions import helpers
+from connect_four_solutions.exercise_03 import persistence
+from connect_four_solutions.exercise_03.domain import enums
+from connect_four_solutions.exercise_03.domain import game as game_
+
+
+def _start_game() -> game_.Game:
+    """A new game with an opening move that hasn't been committed."""
+    game = game_.Game()
+    game.start_game(player_one="p1", player_two="p2")
+    game.make_move("p1", enums.Column.D)
+    return game
+
+
+def test_commit_appends_the_events_of_all_games() -> None:
+    """All changed games are committed with their new stream versions."""
+    # GIVEN a unit of work with three new games
+    client = helpers.InMemoryEventStoreClient()
+    unit_of_work = persistence.UnitOfWork(client, max_concurrency=2)
+    games = [_start_game() for _ in range(3)]
+    for game in games:
+        unit_of_work.add(game)
+
+    # WHEN the unit of work is committed
+    commits = unit_of_work.commit()
+
+    # THEN each game was committed at version 1
+    assert [(c.game_id, c.version) for c in commits] == [(g.id, 1) for g in games]
+    # AND the events of each game are now historical
+    assert all(len(g.historical_events) == 2 for g in games)
+    assert all(not g.uncommitted_events for g in games)
+
+    # WHEN a loaded game is changed in a second unit of work
+    with persistence.UnitOfWork(client) as second_unit_of_work:
+        game = second_unit_of_work.get(games[0].id)
+        game.make_move("p2", enums.Column.D)
+        second_unit_of_work.add(game)
+
+    # THEN the change is stored after the committed events
+    repository = persistence.GameRepository(client)
+    assert len(repository.get(games[0].id).historical_events) == 3
+
+
+def test_failed_appends_are_reported_and_can_be_retried() -> None:
+    """A conflicting change fails its own game, but not the others."""
+    # GIVEN two committed games
+    client = helpers.InMemoryEventStoreClient()
+    unit_of_work = persistence.UnitOfWork(client)
+    conflicting, other = _start_game(), _start_game()
+    unit_of_work.add(conflicting)
+    unit_of_work.add(other)
+    unit_of_work.commit()
+    # AND a move in each game that's collected by a unit of work
+    for game in (conflicting, other):
+        game.make_move("p2", enums.Column.A)
+        unit_of_work.add(game)
+    # AND a concurrent move in one of the games
+    repository = persistence.GameRepository(client)
+    concurrent_game = repository.get(conflicting.id)
+    concurrent_game.make_move("p2", enums.Column.G)
+    unit_of_work_two = persistence.UnitOfWork(client)
+    unit_of_work_two.add(concurrent_game)
+    unit_of_work_two.commit()
+
+    # WHEN the unit of work is committed
+    # THEN the failed game is reported along with the committed game
+    with pytest.raises(persistence.UnitOfWorkError) as exc_info:
+        unit_of_work.commit()
+    assert [c.game_id for c in exc_info.value.committed] == [other.id]
+    assert list(exc_info.value.failed) == [conflicting.id]
+
+    # AND a retry only attempts the failed game again
+    with pytest.raises(persistence.UnitOfWorkError) as exc_info:
+        unit_of_work.commit()
+    assert exc_info.value.committed == []
+    assert list(exc_info.value.failed) == [conflicting.id]
+
+
+def test_events_that_cant_be_encoded_fail_their_own_game() -> None:
+    """An encoding error is reported like a failed append."""
+    # GIVEN a unit of work with a valid game
+    client = helpers.InMemoryEventStoreClient()
+    unit_of_work = persistence.UnitOfWork(client, max_concurrency=1)
+    valid = _start_game()
+    unit_of_work.add(valid)
+    # AND a game with an event that isn't a domain event
+    broken = _start_game()
+    broken.uncommitted_events.append("not an event")
+    unit_of_work.add(broken)
+
+    # WHEN the unit of work is committed
+    # THEN the broken game is reported as failed
+    with pytest.raises(persistence.UnitOfWorkError) as exc_info:
+        unit_of_work.commit()
+    assert isinstance(exc_info.value.failed[broken.id], ValueError)
+    # AND the valid game is reported as committed
+    assert [c.game_id for c in exc_info.value.committed] == [valid.id]
+    assert len(client.get_stream(f"game-{valid.id}")) == 2
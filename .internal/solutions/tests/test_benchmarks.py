@@ -0,0 +1,56 @@
+import json
+
+from benchmarks import __main__ as cli
+from benchmarks import corpus, harness
+from benchmarks import repository as benchmarks
+from connect_four_solutions import helpers
+
+
+def test_corpus_is_reproducible() -> None:
+    """The same seed generates the same games."""
+    # WHEN two corpora are generated with the same seed
+    games_one = corpus.generate_games(count=5, seed=7)
+    games_two = corpus.generate_games(count=5, seed=7)
+
+    # THEN the games have the same events
+    assert [g.events for g in games_one] == [g.events for g in games_two]
+    # AND all games are finished
+    assert all(game.is_finished for game in games_one)
+
+
+def test_benchmark_run_writes_json_report(tmp_path) -> None:
+    """A run of the suite writes a report with a result per benchmark."""
+    # GIVEN a path for the report
+    output = tmp_path / "report.json"
+
+    # WHEN a small run of the repository benchmarks is performed
+    cli.main(
+        ["run", "--games", "3", "--repeat", "1", "--select", "repository.",
+         "--output", str(output)]
+    )  # fmt: skip
+
+    # THEN the report contains the results of the selected benchmarks
+    report = json.loads(output.read_text())
+    assert set(report["results"]) == {"repository.add", "repository.get"}
+    assert report["metadata"]["options"] == {"seed": 2025, "games": 3, "repeat": 1}
+    # AND the report can be compared with itself
+    [(_, _, _, ratio), _] = harness.compare_reports(report, report)
+    assert ratio == 1.0
+
+
+def test_repository_benchmarks_can_run_twice_in_a_process() -> None:
+    """Each preparation stores its games in an event store of its own."""
+    # GIVEN the options of a small run
+    options = harness.Options(games=2, repeat=1)
+
+    # WHEN the repository benchmarks are prepared and run twice
+    for _ in range(2):
+        for setup in (benchmarks.add, benchmarks.get, benchmarks.get_archived):
+            setup(options).run()
+
+    # THEN no games were stored in the shared in-memory event store
+    game_ids = [game.id for game in corpus.generate_games(2, options.seed)]
+    assert not any(
+        event.stream_name.removeprefix("game-").startswith(tuple(game_ids))
+        for event in helpers.InMemoryEventStoreClient().read_all()
+    )
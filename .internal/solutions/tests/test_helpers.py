@@ -1,6 +1,8 @@
 import kurrentdbclient
 import pytest
 from connect_four_solutions import helpers
+from connect_four_solutions.exercise_03 import persistence
+from connect_four_solutions.helpers import kurrentdb_standin
 from kurrentdbclient import exceptions as kdb_exceptions
 
 
@@ -144,3 +146,196 @@ def test_stream_position_accounts_for_existing_events() -> None:
 
     # THEN the last event has the appropriate stream position
     assert client.get_stream(stream_name)[-1].stream_position == 20
+
+
+def test_append_with_wrong_current_version_is_rejected() -> None:
+    """The current version is checked like KurrentDB does."""
+    # GIVEN a stream with one event
+    client = helpers.InMemoryEventStoreClient()
+    stream_name = "stream-with-a-version-check"
+    client.append_to_stream(
+        stream_name,
+        current_version=kurrentdbclient.StreamState.NO_STREAM,
+        events=kurrentdbclient.NewEvent("SomethingHappened", data=b"{}"),
+    )
+
+    # WHEN an event is appended with an outdated version
+    # THEN the append is rejected
+    with pytest.raises(kdb_exceptions.WrongCurrentVersion):
+        client.append_to_stream(
+            stream_name,
+            current_version=kurrentdbclient.StreamState.NO_STREAM,
+            events=kurrentdbclient.NewEvent("SomethingHappened", data=b"{}"),
+        )
+    # AND an append with the current version succeeds
+    assert (
+        client.append_to_stream(
+            stream_name,
+            current_version=0,
+            events=kurrentdbclient.NewEvent("SomethingHappened", data=b"{}"),
+        )
+        == 1
+    )
+
+
+def test_fault_injecting_client_is_reproducible() -> None:
+    """The same seed simulates the same latencies."""
+    # GIVEN two fault-injecting clients with the same seed
+    profile = helpers.NetworkProfile(latency=helpers.LogNormalLatency(median=0.01))
+    delays_one, delays_two = [], []
+    client_one, client_two = (
+        helpers.FaultInjectingClient(
+            helpers.InMemoryEventStoreClient(),
+            append_profile=profile,
+            seed=42,
+            sleep=delays.append,
+        )
+        for delays in (delays_one, delays_two)
+    )
+
+    # WHEN both clients append events
+    for index, client in enumerate((client_one, client_two)):
+        for _ in range(3):
+            client.append_to_stream(
+                f"reproducible-stream-{index}",
+                current_version=kurrentdbclient.StreamState.ANY,
+                events=kurrentdbclient.NewEvent("SomethingHappened", data=b"{}"),
+            )
+
+    # THEN the simulated delays are the same
+    assert delays_one == delays_two
+    assert len(set(delays_one)) == 3
+
+
+def test_lost_response_is_raised_after_the_append() -> None:
+    """A lost response fails the call, but the events were appended."""
+    # GIVEN a client that loses every response
+    in_memory_client = helpers.InMemoryEventStoreClient()
+    client = helpers.FaultInjectingClient(
+        in_memory_client,
+        append_profile=helpers.NetworkProfile(lost_response_rate=1.0),
+        sleep=lambda seconds: None,
+    )
+
+    # WHEN an event is appended
+    # THEN the call fails
+    with pytest.raises(kdb_exceptions.ServiceUnavailable):
+        client.append_to_stream(
+            "stream-with-a-lost-response",
+            current_version=kurrentdbclient.StreamState.NO_STREAM,
+            events=kurrentdbclient.NewEvent("SomethingHappened", data=b"{}"),
+        )
+    # AND the event was appended anyway
+    assert len(in_memory_client.get_stream("stream-with-a-lost-response")) == 1
+
+
+def test_fault_injecting_client_passes_on_the_timeout_of_read_all() -> None:
+    """A pool with a call timeout can read all events through the client."""
+    # GIVEN pools with a call timeout of fault-injecting clients that wrap
+    # a client without and a client with a timeout for `read_all`
+    timeouts = []
+
+    class _TimedClient(helpers.InMemoryEventStoreClient):
+        def read_all(self, *, timeout=None, **kwargs):
+            timeouts.append(timeout)
+            return super().read_all(**kwargs)
+
+    for client_class in (helpers.InMemoryEventStoreClient, _TimedClient):
+        client = client_class(isolated=True)
+        client.append_to_stream(
+            "timed-stream",
+            current_version=kurrentdbclient.StreamState.NO_STREAM,
+            events=kurrentdbclient.NewEvent("SomethingHappened", data=b"{}"),
+        )
+        pool = persistence.EventStoreClientPool(
+            lambda client=client: helpers.FaultInjectingClient(client),
+            call_timeout=1.0,
+        )
+
+        # WHEN all events are read
+        # THEN the event is returned
+        assert len(list(pool.read_all(limit=1))) == 1
+
+    # AND the timeout was passed on to the client that accepts it
+    assert timeouts == [1.0]
+
+
+def test_kurrentdb_client_works_with_the_standin_server() -> None:
+    """A real KurrentDBClient appends and reads through the stand-in."""
+    # GIVEN a KurrentDBClient connected to a running stand-in server
+    with kurrentdb_standin.KurrentDBStandIn() as server:
+        client = kurrentdbclient.KurrentDBClient(server.uri)
+        stream_name = "stream-behind-the-standin"
+        events = [
+            kurrentdbclient.NewEvent("FirstHappened", data=b"{}", metadata=b"meta"),
+            kurrentdbclient.NewEvent("SecondHappened", data=b'{"key": 1}'),
+        ]
+
+        # WHEN a single event and a batch of events are appended
+        client.append_to_stream(
+            stream_name,
+            current_version=kurrentdbclient.StreamState.NO_STREAM,
+            events=events[0],
+        )
+        client.append_to_stream(stream_name, current_version=0, events=events[1:])
+
+        # THEN the stream is read back with the same events
+        recorded = client.get_stream(stream_name)
+        assert [(e.id, e.type, e.data, e.metadata) for e in recorded] == [
+            (e.id, e.type, e.data, e.metadata) for e in events
+        ]
+        # AND the events can be found by a filtered read of all streams
+        assert [
+            event.id
+            for event in client.read_all(
+                filter_include=(stream_name,), filter_by_stream_name=True
+            )
+        ] == [event.id for event in events]
+        # AND the errors of the in-memory store are passed on
+        with pytest.raises(kdb_exceptions.WrongCurrentVersion):
+            client.append_to_stream(stream_name, current_version=0, events=events)
+        with pytest.raises(kdb_exceptions.NotFound):
+            client.get_stream("stream-that-isnt-behind-the-standin")
+        client.close()
+
+
+def test_standin_server_reads_truncated_streams_by_revision() -> None:
+    """The revisions of a truncated stream are the stored revisions."""
+    # GIVEN a stand-in server with a stream that was truncated before
+    # its third event
+    with kurrentdb_standin.KurrentDBStandIn() as server:
+        client = kurrentdbclient.KurrentDBClient(server.uri)
+        stream_name = "truncated-stream-behind-the-standin"
+        client.append_to_stream(
+            stream_name,
+            current_version=kurrentdbclient.StreamState.NO_STREAM,
+            events=[
+                kurrentdbclient.NewEvent(f"Event{number}", data=b"{}")
+                for number in range(4)
+            ],
+        )
+        client.append_to_stream(
+            f"$${stream_name}",
+            current_version=kurrentdbclient.StreamState.ANY,
+            events=kurrentdbclient.NewEvent("$metadata", data=b'{"$tb": 2}'),
+        )
+
+        # WHEN the stream is read from a revision
+        # THEN the events from that revision are returned
+        recorded = client.get_stream(stream_name, stream_position=3)
+        assert [e.type for e in recorded] == ["Event3"]
+        # AND a conflicting append reports the revision of the last event
+        with pytest.raises(kdb_exceptions.WrongCurrentVersion, match=" 3"):
+            client.append_to_stream(
+                stream_name,
+                current_version=1,
+                events=kurrentdbclient.NewEvent("Event4", data=b"{}"),
+            )
+        client.close()
+
+    # AND a new server doesn't have the stream
+    with kurrentdb_standin.KurrentDBStandIn() as server:
+        client = kurrentdbclient.KurrentDBClient(server.uri)
+        with pytest.raises(kdb_exceptions.NotFound):
+            client.get_stream(stream_name)
+        client.close()
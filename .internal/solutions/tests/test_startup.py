@@ -0,0 +1,14 @@
+import pytest
+from benchmarks import startup
+
+
+@pytest.mark.parametrize("module", startup.ENTRY_POINTS)
+def test_entry_point_does_not_import_heavy_modules(module: str) -> None:
+    """Heavy dependencies are only imported on the paths that need them."""
+    # WHEN the entry point is imported in a fresh interpreter
+    profile = startup.profile_import(module)
+
+    # THEN the entry point itself was imported
+    assert profile.total_microseconds > 0
+    # AND none of the heavy modules were imported
+    assert profile.imported_heavy_modules() == []
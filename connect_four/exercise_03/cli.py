@@ -1,9 +1,6 @@
 import argparse
 import warnings
 
-with warnings.catch_warnings():
-    import kurrentdbclient
-
 from connect_four import helpers
 from connect_four.exercise_03 import application, persistence, presentation
 from connect_four.exercise_03.domain import enums, game
@@ -16,14 +13,7 @@ def _play(event_store_client: persistence.IEventStoreClient) -> None:
     app = application.ConnectFourApp(game_repository=repository)
 
     print("Welcome to a new game of Connect Four!")
-    match event_store_client:
-        case kurrentdbclient.KurrentDBClient():
-            store_type = "KurrentDB"
-        case helpers.InMemoryEventStoreClient():
-            store_type = "In-Memory Event Store"
-        case _:
-            raise RuntimeError("Unknown Event Store Client!")
-
+    store_type = _get_store_type(event_store_client)
     print(f"This version of the game uses {store_type} to store the game events.")
     print("========================================")
     print("Please enter the name of the players")
@@ -73,6 +63,18 @@ def _get_move() -> enums.Column:
             print("Invalid column. Please try again.")
 
 
+def _get_store_type(event_store_client: persistence.IEventStoreClient) -> str:
+    # Checking the module instead of using isinstance keeps us from
+    # importing kurrentdbclient just to find out it isn't used.
+    match event_store_client:
+        case helpers.InMemoryEventStoreClient():
+            return "In-Memory Event Store"
+        case _ if type(event_store_client).__module__.startswith("kurrentdbclient"):
+            return "KurrentDB"
+        case _:
+            raise RuntimeError("Unknown Event Store Client!")
+
+
 def _get_client() -> persistence.IEventStoreClient:
     parser = argparse.ArgumentParser(
         prog="Connect Four CLI",
@@ -85,6 +87,10 @@ def _get_client() -> persistence.IEventStoreClient:
     )
     args = parser.parse_args()
     if args.use_kurrentdb:
+        # Only import kurrentdbclient (and with it gRPC) when it's used.
+        with warnings.catch_warnings():
+            import kurrentdbclient
+
         return kurrentdbclient.KurrentDBClient(uri=_CONNECTION_STRING)
     else:
         return helpers.InMemoryEventStoreClient()
@@ -2,13 +2,20 @@
 
 from __future__ import annotations
 
-from typing import Iterable, Protocol, Sequence
+from typing import TYPE_CHECKING, Iterable, Protocol, Sequence
 
 import attrs
-import kurrentdbclient
 
 from connect_four.exercise_03.domain import events as domain_events
 from connect_four.exercise_03.domain import game as game_
+from connect_four.helpers.lazy_import import lazy_import
+
+if TYPE_CHECKING:
+    import kurrentdbclient
+else:
+    # kurrentdbclient pulls in gRPC, which is only loaded when the first
+    # event is mapped to or from the event store format.
+    kurrentdbclient = lazy_import("kurrentdbclient")
 
 
 class IEventStoreClient(Protocol):
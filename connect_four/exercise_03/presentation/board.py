@@ -5,10 +5,17 @@ terminal that supports it. It may look a bit funky in a terminal that
 does not.
 """
 
-import colorama
+from typing import TYPE_CHECKING
 
 from connect_four.exercise_03.domain import enums
 from connect_four.exercise_03.domain.board import BoardState
+from connect_four.helpers.lazy_import import lazy_import
+
+if TYPE_CHECKING:
+    import colorama
+else:
+    # Headless processes import this module without ever rendering.
+    colorama = lazy_import("colorama")
 
 
 def _colorize_string(string: str, color: str) -> str:
@@ -1,3 +1,4 @@
 from .in_memory_client import InMemoryEventStoreClient
+from .lazy_import import lazy_import
 
-__all__ = ["InMemoryEventStoreClient"]
+__all__ = ["InMemoryEventStoreClient", "lazy_import"]
@@ -1,7 +1,13 @@
-from typing import ClassVar, Iterable, Sequence
+from __future__ import annotations
 
-import kurrentdbclient
-from kurrentdbclient import exceptions as kdb_exceptions
+from typing import TYPE_CHECKING, ClassVar, Iterable, Sequence
+
+from connect_four.helpers.lazy_import import lazy_import
+
+if TYPE_CHECKING:
+    import kurrentdbclient
+else:
+    kurrentdbclient = lazy_import("kurrentdbclient")
 
 
 class InMemoryEventStoreClient:
@@ -68,9 +74,12 @@ class InMemoryEventStoreClient:
             committed to the stream.
 
         Raises:
-            kdb_exceptions.NotFound: If the stream does not exist.
+            kurrentdbclient.exceptions.NotFound: If the stream does not
+              exist.
         """
         try:
             return tuple(self._store[stream_name])
         except KeyError:
-            raise kdb_exceptions.NotFound(f"Stream {stream_name!r} not found") from None
+            raise kurrentdbclient.exceptions.NotFound(
+                f"Stream {stream_name!r} not found"
+            ) from None
@@ -0,0 +1,35 @@
+"""Defer importing heavy modules until they're actually used."""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+import types
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """Import a top-level module lazily.
+
+    The returned module object is only executed when one of its
+    attributes is accessed for the first time. This keeps modules like
+    `kurrentdbclient`, which pulls in gRPC and protobuf, out of the
+    startup time of processes that never use them.
+
+    Note that submodules can't be imported lazily this way, because
+    finding a submodule imports its parent package.
+
+    :param name: the name of a top-level module
+    :return: the (lazily loaded) module
+    """
+    if (module := sys.modules.get(name)) is not None:
+        return module
+
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module